@@ -16,6 +16,7 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 
+import asyncio
 import logging as log
 import sys
 
@@ -28,3 +29,28 @@ class BaseInterface:
     def run_detection(self, input_data):
         log.error("Subclass Implementation for api:run_detection(input_data) Missing")
         sys.exit(1)
+
+    async def async_run_detection(self, input_data):
+        #Adaptors without native asyncio support run inference on the loop's executor,
+        #to_thread keeps the rpc's trace context
+        return await asyncio.to_thread(self.run_detection, input_data)
+
+    def parallelism(self):
+        #Number of inferences the backend runs concurrently
+        return 1
+
+    def modelFootprint(self):
+        #Models served out of process are not counted against the memory budget
+        return None
+
+    def unload(self):
+        #Release the loaded model but keep its files, isModelLoaded loads it again
+        pass
+
+    def close(self):
+        #Nothing to release by default
+        pass
+
+    async def async_close(self):
+        #Awaited by the aio servers at shutdown, grpc.aio channels have to be closed on their loop
+        self.close()
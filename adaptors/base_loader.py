@@ -0,0 +1,105 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import logging as log
+import sys
+from adaptors.upload_writer import UploadWriter
+from adaptors.model_store import modelKey
+
+
+class BaseModelLoader:
+    '''
+    Receives the uploaded xml and bin files of a model and keeps them in the
+    model store. Subclasses place the files with modelPaths and load them in
+    isModelLoaded, which calls finishUploads once the model is loaded.
+    '''
+    def __init__(self):
+        #open UploadWriter per file kind while a sendXml/sendBin stream is running
+        self.uploads = {}
+        #committed UploadWriter per file kind, further streams append to it until the model is loaded
+        self.committed = {}
+        self.digests = {}
+        self.model_store = None
+
+    def modelPaths(self):
+        log.error("Subclass Implementation for api:modelPaths() Missing")
+        sys.exit(1)
+
+    def isModelLoaded(self, interface_obj, timeout_in_ms):
+        log.error("Subclass Implementation for api:isModelLoaded(interface_obj, timeout_in_ms) Missing")
+        sys.exit(1)
+
+    def saveChunk(self, kind, path, chunk):
+        upload = self.uploads.get(kind)
+        if upload is None:
+            upload = self.committed.pop(kind, None)
+            if upload is not None:
+                upload.reopen()
+            else:
+                upload = UploadWriter(path)
+            self.uploads[kind] = upload
+        upload.write(chunk.data)
+        return True
+
+    def commitUpload(self, kind):
+        upload = self.uploads.pop(kind, None)
+        if upload is None:
+            return None
+        self.digests[kind] = upload.commit()
+        self.committed[kind] = upload
+        log.info("{} upload of {} complete".format(kind, upload.path))
+        return self.digests[kind]
+
+    def abortUploads(self):
+        for upload in self.uploads.values():
+            upload.abort()
+        self.uploads = {}
+        self.committed = {}
+        self.digests = {}
+
+    def finishUploads(self):
+        #called when the model is loaded, the next stream starts a new file
+        if self.model_store is not None and len(self.committed) == 2:
+            self.model_store.add(modelKey(self.digests['xml'], self.digests['bin']), *self.modelPaths())
+        self.committed = {}
+
+    def setModelStore(self, model_store):
+        self.model_store = model_store
+
+    def useStoredModel(self, xml_sha256, bin_sha256):
+        #place a previously uploaded model instead of receiving it again
+        key = modelKey(xml_sha256, bin_sha256)
+        if self.model_store is None or key is None:
+            return False
+        self.abortUploads()
+        if not self.model_store.fetch(key, *self.modelPaths()):
+            return False
+        self.digests = {'xml': xml_sha256.lower(), 'bin': bin_sha256.lower()}
+        return True
+
+    def saveXML(self, chunk):
+        return self.saveChunk('xml', self.modelPaths()[0], chunk)
+
+    def saveBin(self, chunk):
+        return self.saveChunk('bin', self.modelPaths()[1], chunk)
+
+    def commitXML(self):
+        return self.commitUpload('xml')
+
+    def commitBin(self):
+        return self.commitUpload('bin')
@@ -0,0 +1,194 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import logging as log
+import queue
+import threading
+import time
+import numpy as np
+from adaptors.base_adaptor import BaseInterface
+import common.metrics as metrics
+import common.tracing as tracing
+
+
+def splitOutputs(result, batches):
+    '''
+    Split the outputs of a batched inference along the batch dimension.
+    :param result: adaptor output dictionary of the batched inference
+    :param batches: batch size of every part, in order
+    :return: list with one output dictionary per part, arrays are views on result
+    '''
+    parts = []
+    offset = 0
+    for batch in batches:
+        response = {}
+        for key, (out, shape) in result.items():
+            response[key] = (out[offset:offset + batch], [batch] + list(shape[1:]))
+        parts.append(response)
+        offset += batch
+    return parts
+
+
+class PendingRequest:
+    def __init__(self, input_data):
+        self.input_data = input_data
+        #batch dimension of this request, taken from the first input
+        self.batch = int(next(iter(input_data.values()))[1][0])
+        self.done = threading.Event()
+        self.enqueued = time.perf_counter()
+        #trace of the rpc, inference runs on a batcher thread outside its context
+        self.trace = tracing.current()
+        self.result = None
+        self.error = None
+
+    def signature(self):
+        #requests can only be stacked if node names and non batch dims match
+        return tuple(sorted((key, tuple(shape[1:])) for key, (_, shape) in self.input_data.items()))
+
+
+class BatchingInterface(BaseInterface):
+    '''
+    Collects concurrent run_detection calls for the wrapped interface into one
+    batched inference. A batch is dispatched once it holds max_batch_size
+    samples or when max_delay_ms has passed since its first request.
+    num_workers batches run concurrently, 0 matches the parallelism of the
+    wrapped interface, which may grow once its model is loaded.
+    The model served by the wrapped interface must accept a dynamic batch dimension.
+    '''
+    def __init__(self, interface, max_batch_size, max_delay_ms=5, num_workers=0):
+        super().__init__()
+        self.interface = interface
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000.0
+        self.pending = queue.Queue()
+        #workers take turns collecting, the batches of different workers run concurrently
+        self.collect_lock = threading.Lock()
+        #request that did not fit into the previous batch, it starts the next one
+        self.carry = None
+        self.workers_lock = threading.Lock()
+        self.workers = []
+        self.num_workers = num_workers
+        #workers run from the start so that no request waits on a queue nobody serves
+        self.startWorkers(num_workers if num_workers > 0 else interface.parallelism())
+
+    def startWorkers(self, num_workers):
+        with self.workers_lock:
+            while len(self.workers) < num_workers:
+                worker = threading.Thread(target=self._batchLoop, name="Batcher-{}".format(len(self.workers)),
+                                          daemon=True)
+                worker.start()
+                self.workers.append(worker)
+
+    def __getattr__(self, name):
+        #everything except inference is served by the wrapped interface
+        if name == 'interface':
+            raise AttributeError(name)
+        return getattr(self.interface, name)
+
+    def isModelLoaded(self, timeout_in_ms):
+        loaded = self.interface.isModelLoaded(timeout_in_ms)
+        if loaded and self.num_workers <= 0:
+            #without an explicit count one worker per inference the wrapped interface runs concurrently
+            self.startWorkers(self.interface.parallelism())
+        return loaded
+
+    def modelFootprint(self):
+        #defined on BaseInterface, so __getattr__ would not forward it
+        return self.interface.modelFootprint()
+
+    def unload(self):
+        self.interface.unload()
+
+    def close(self):
+        self.interface.close()
+
+    async def async_close(self):
+        await self.interface.async_close()
+
+    def run_detection(self, input_data):
+        request = PendingRequest(input_data)
+        self.pending.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect(self):
+        with self.collect_lock:
+            first = self.carry if self.carry is not None else self.pending.get()
+            self.carry = None
+            batch = [first]
+            size = first.batch
+            deadline = time.monotonic() + self.max_delay
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self.pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if size + request.batch > self.max_batch_size:
+                    self.carry = request
+                    break
+                batch.append(request)
+                size += request.batch
+            return batch
+
+    def _batchLoop(self):
+        while True:
+            groups = {}
+            for request in self._collect():
+                groups.setdefault(request.signature(), []).append(request)
+            for requests in groups.values():
+                self._runBatch(requests)
+
+    def _runBatch(self, requests):
+        label = self.interface.metrics_label
+        for request in requests:
+            metrics.observeStage(label, 'batch_wait', request.enqueued, request.trace)
+        start_time = time.perf_counter()
+        try:
+            if len(requests) == 1:
+                requests[0].result = self.interface.run_detection(requests[0].input_data)
+            else:
+                self._scatter(requests, self.interface.run_detection(self._gather(requests)))
+        except Exception as inst:
+            log.error("Batched inference failed: {}".format(inst))
+            for request in requests:
+                request.error = inst
+        end_time = time.perf_counter()
+        for request in requests:
+            if request.trace is not None:
+                #the inner adaptor stages are not part of the rpc traces, the batch as a whole is
+                request.trace.record('batch_inference', label, start_time, end_time)
+            request.done.set()
+
+    def _gather(self, requests):
+        batch_size = sum(request.batch for request in requests)
+        batched_input = {}
+        for key, (_, shape) in requests[0].input_data.items():
+            data = [np.asarray(request.input_data[key][0]).reshape(request.input_data[key][1])
+                    for request in requests]
+            batched_input[key] = (np.concatenate(data, axis=0), [batch_size] + list(shape[1:]))
+        log.debug("Running batch of {} samples from {} requests".format(batch_size, len(requests)))
+        return batched_input
+
+    def _scatter(self, requests, result):
+        for request, response in zip(requests, splitOutputs(result, [request.batch for request in requests])):
+            request.result = response
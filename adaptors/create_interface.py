@@ -18,15 +18,37 @@
 
 from adaptors.ovms.interface import OvmsInterface
 from adaptors.ovtoolkit.interface import OvtkInterface
+from adaptors.stub.interface import StubInterface
+from adaptors.batching import BatchingInterface
 import sys
 
 
 def createInterfaceObj(interface_type, device, serving_address, serving_port,
-                       serving_model_name, dir_path):
+                       serving_model_name, dir_path, serving_channels=4,
+                       performance_hint='LATENCY', max_batch_size=1, max_batch_delay_ms=5,
+                       preprocess=None, named_outputs=False, server_concurrency=1, metrics_label=None):
     if(interface_type == 'ovms'):
-        return OvmsInterface(serving_address, serving_port, serving_model_name, dir_path)
+        interface = OvmsInterface(serving_address, serving_port, serving_model_name, dir_path,
+                                  serving_channels)
+    elif(interface_type == 'kserve'):
+        #imported here, its grpc stubs are only generated for deployments using it
+        from adaptors.kserve.interface import KServeInterface
+        interface = KServeInterface(serving_address, serving_port, serving_model_name, dir_path,
+                                    serving_channels)
     elif(interface_type == 'ovtk'):
-        return OvtkInterface(serving_model_name, dir_path, device)
+        interface = OvtkInterface(serving_model_name, dir_path, device, performance_hint,
+                                  preprocess=preprocess, named_outputs=named_outputs,
+                                  min_infer_requests=server_concurrency)
+    elif(interface_type == 'stub'):
+        #in process echo adaptor for benchmarks, see benchmark/benchmark.py
+        interface = StubInterface(serving_model_name)
     else:
         print("Error: Interface {} is not supported".format(interface_type))
         sys.exit(1)
+    #bounded model label of the metrics when serving_model_name is unique per session
+    if metrics_label is not None:
+        interface.metrics_label = metrics_label
+    #batching is opt-in, the model has to accept a dynamic batch dimension
+    if(max_batch_size > 1):
+        return BatchingInterface(interface, max_batch_size, max_batch_delay_ms)
+    return interface
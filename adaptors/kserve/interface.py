@@ -0,0 +1,192 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import logging as log
+import time
+import grpc
+import numpy as np
+import common.metrics as metrics
+from adaptors.base_adaptor import BaseInterface
+from adaptors.ovms.load_model import ModelLoader
+from adaptors.ovms.channel_pool import ChannelPool, DEFAULT_POOL_SIZE
+from adaptors.ovms.status_watcher import AVAILABLE
+from adaptors.kserve.tensor_codec import encode_input, decode_output
+#generated from grpc_predict_v2.proto
+from adaptors.kserve import grpc_predict_v2_pb2
+from adaptors.kserve import grpc_predict_v2_pb2_grpc
+
+LOADING = 20
+TIMEOUT_S = 10.0
+
+
+class KServeInterface(BaseInterface):
+    '''
+    Adaptor for servers speaking the KServe v2 gRPC protocol, like OVMS or Triton.
+    Tensors travel as raw bytes in raw_input_contents and raw_output_contents.
+    Inputs are converted to the datatype of the model metadata and their shape
+    is checked against it. Uploaded models are placed in the mounted model
+    directory as for ovms, servers with explicit model control are in addition
+    asked to load them through the model repository extension.
+    '''
+    def __init__(self, address, port, model_name, path, channels=DEFAULT_POOL_SIZE):
+        super().__init__()
+        self.channel_pool = ChannelPool(address, port, channels)
+        self.model_name = model_name
+        #model label of the metrics, createInterfaceObj sets a bounded one for per session model names
+        self.metrics_label = self.model_name
+        self.model_loader = ModelLoader()
+        self.model_loader.setModelDir(path)
+        #cleared once the server rejects the repository extension
+        self.repository_control = True
+        #input name -> (datatype, shape) of the loaded model version
+        self.inputs = {}
+        self.metadata_version = None
+
+    def call(self, method, request):
+        return self.channel_pool.call(grpc_predict_v2_pb2_grpc.GRPCInferenceServiceStub, method, request,
+                                      TIMEOUT_S)
+
+    def repositoryCall(self, method):
+        if not self.repository_control:
+            return
+        try:
+            self.call(method, getattr(grpc_predict_v2_pb2, method + 'Request')(model_name=str(self.model_name)))
+        except grpc.RpcError as err:
+            if err.code() == grpc.StatusCode.UNIMPLEMENTED:
+                log.info("Server has no model repository extension, it manages {} on its own".format(
+                    self.model_name))
+                self.repository_control = False
+            else:
+                log.warning("{} of {} failed: {}".format(method, self.model_name, err.details()))
+
+    def checkModelStatus(self, curr_state, version=1):
+        if curr_state == 0:
+            #first poll of this version
+            self.repositoryCall('RepositoryModelLoad')
+        request = grpc_predict_v2_pb2.ModelReadyRequest(name=str(self.model_name), version=str(version))
+        try:
+            response = self.call('ModelReady', request)
+        except grpc.RpcError as err:
+            log.warning("ModelReady of {} failed: {}".format(self.model_name, err.details()))
+            return 0
+        return AVAILABLE if response.ready else LOADING
+
+    def fetchMetadata(self, version):
+        request = grpc_predict_v2_pb2.ModelMetadataRequest(name=str(self.model_name), version=str(version))
+        try:
+            response = self.call('ModelMetadata', request)
+            self.inputs = {tensor.name: (tensor.datatype, list(tensor.shape)) for tensor in response.inputs}
+        except grpc.RpcError as err:
+            log.warning("No metadata for {}, inputs are sent as they are: {}".format(self.model_name, err.details()))
+            self.inputs = {}
+        self.metadata_version = version
+
+    def inputSpec(self, name, shape):
+        '''
+        :return: tuple of (input name, KServe datatype or None to keep the dtype of the data)
+        '''
+        spec = self.inputs.get(name)
+        if spec is None and len(self.inputs) == 1:
+            #the services name their input after the model they were written for
+            name, spec = next(iter(self.inputs.items()))
+        if spec is None:
+            return name, None
+        datatype, expected = spec
+        if len(expected) != len(shape) or any(dim >= 0 and dim != size for dim, size in zip(expected, shape)):
+            raise ValueError("Input {} has shape {}, model {} expects {}".format(
+                name, list(shape), self.model_name, expected))
+        return name, datatype
+
+    def buildInferRequest(self, input_data):
+        version = self.model_loader.loaded_version
+        request = grpc_predict_v2_pb2.ModelInferRequest(model_name=str(self.model_name),
+                                                        model_version=str(version) if version > 0 else "")
+        for key, (data, shape) in input_data.items():
+            shape = list(shape)
+            name, datatype = self.inputSpec(key, shape)
+            encode_input(request, name, np.asarray(data).reshape(shape), datatype)
+        return request
+
+    def parseInferResponse(self, response):
+        #returns dictionary with keyword as nodename and values :tupple of data and their shape
+        return {output.name: (decode_output(response, index), list(output.shape))
+                for index, output in enumerate(response.outputs)}
+
+    def run_detection(self, input_data):
+        with metrics.timeStage(self.metrics_label, 'serialization'):
+            request = self.buildInferRequest(input_data)
+        with metrics.timeStage(self.metrics_label, 'inference'):
+            response = self.call('ModelInfer', request)
+        with metrics.timeStage(self.metrics_label, 'deserialization'):
+            return self.parseInferResponse(response)
+
+    async def async_run_detection(self, input_data):
+        with metrics.timeStage(self.metrics_label, 'serialization'):
+            request = self.buildInferRequest(input_data)
+        start_time = time.perf_counter()
+        response = await self.channel_pool.asyncCall(grpc_predict_v2_pb2_grpc.GRPCInferenceServiceStub,
+                                                     'ModelInfer', request, TIMEOUT_S)
+        metrics.observeStage(self.metrics_label, 'inference', start_time)
+        with metrics.timeStage(self.metrics_label, 'deserialization'):
+            return self.parseInferResponse(response)
+
+    def prepareDir(self):
+        self.model_loader.prepareDir()
+
+    def saveXML(self, chunk):
+        self.model_loader.saveXML(chunk)
+
+    def saveBin(self, chunk):
+        self.model_loader.saveBin(chunk)
+
+    def commitXML(self):
+        return self.model_loader.commitXML()
+
+    def commitBin(self):
+        return self.model_loader.commitBin()
+
+    def abortUploads(self):
+        self.model_loader.abortUploads()
+
+    def setModelStore(self, model_store):
+        self.model_loader.setModelStore(model_store)
+
+    def useStoredModel(self, xml_sha256, bin_sha256):
+        return self.model_loader.useStoredModel(xml_sha256, bin_sha256)
+
+    def isModelLoaded(self, timeout_in_ms):
+        if not self.model_loader.isModelLoaded(self, timeout_in_ms):
+            return False
+        if self.metadata_version != self.model_loader.loaded_version:
+            self.fetchMetadata(self.model_loader.loaded_version)
+        return True
+
+    def cleanUp(self):
+        #the token is released, its model is not needed on the server anymore
+        self.model_loader.abortUploads()
+        self.repositoryCall('RepositoryModelUnload')
+
+    def parallelism(self):
+        return self.channel_pool.size
+
+    def close(self):
+        self.channel_pool.close()
+
+    async def async_close(self):
+        await self.channel_pool.closeAio()
+        self.channel_pool.close()
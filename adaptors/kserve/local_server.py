@@ -0,0 +1,157 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import argparse
+import logging as log
+import sys
+from concurrent import futures
+import grpc
+from adaptors.kserve.tensor_codec import DATATYPE_TO_NP, decode_input, encode_output
+#generated from grpc_predict_v2.proto
+from adaptors.kserve import grpc_predict_v2_pb2
+from adaptors.kserve import grpc_predict_v2_pb2_grpc
+
+SERVER_OPTIONS = [
+    ('grpc.max_send_message_length', 1024*1024*1024),
+    ('grpc.max_receive_message_length', 1024*1024*1024),
+]
+
+
+class LocalInferenceServicer(grpc_predict_v2_pb2_grpc.GRPCInferenceServiceServicer):
+    '''
+    Stand-in KServe v2 server to run the kserve adaptor without OVMS or Triton.
+    It serves a single model that returns every input as an output named
+    <input>_out. Inputs are checked against the model metadata like a real
+    server would. Without repository control the model is always ready and
+    the repository extension answers UNIMPLEMENTED, as for a server that
+    loads its models on its own.
+    '''
+    def __init__(self, model_name, inputs, repository_control=False):
+        '''
+        :param inputs: list of (name, datatype, shape) of the model inputs, -1 marks a dynamic dimension
+        :param repository_control: model is only ready after RepositoryModelLoad
+        '''
+        self.model_name = str(model_name)
+        self.inputs = {name: (datatype, list(shape)) for name, datatype, shape in inputs}
+        self.repository_control = repository_control
+        self.loaded = not repository_control
+
+    def checkModel(self, name, context):
+        if name != self.model_name:
+            context.abort(grpc.StatusCode.NOT_FOUND, "Model {} is not served".format(name))
+
+    def checkRepository(self, context):
+        if not self.repository_control:
+            context.abort(grpc.StatusCode.UNIMPLEMENTED, "Model repository extension is disabled")
+
+    def ServerLive(self, request, context):
+        return grpc_predict_v2_pb2.ServerLiveResponse(live=True)
+
+    def ServerReady(self, request, context):
+        return grpc_predict_v2_pb2.ServerReadyResponse(ready=True)
+
+    def ServerMetadata(self, request, context):
+        extensions = ['model_repository'] if self.repository_control else []
+        return grpc_predict_v2_pb2.ServerMetadataResponse(name='local', extensions=extensions)
+
+    def ModelReady(self, request, context):
+        return grpc_predict_v2_pb2.ModelReadyResponse(ready=(request.name == self.model_name and self.loaded))
+
+    def ModelMetadata(self, request, context):
+        self.checkModel(request.name, context)
+        response = grpc_predict_v2_pb2.ModelMetadataResponse(name=self.model_name, versions=['1'])
+        for name, (datatype, shape) in self.inputs.items():
+            response.inputs.add(name=name, datatype=datatype, shape=shape)
+            response.outputs.add(name=name + '_out', datatype=datatype, shape=shape)
+        return response
+
+    def ModelInfer(self, request, context):
+        self.checkModel(request.model_name, context)
+        if not self.loaded:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "Model {} is not loaded".format(self.model_name))
+        response = grpc_predict_v2_pb2.ModelInferResponse(model_name=self.model_name,
+                                                          model_version=request.model_version, id=request.id)
+        for index, tensor in enumerate(request.inputs):
+            if tensor.name not in self.inputs:
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Unknown input {}".format(tensor.name))
+            datatype, shape = self.inputs[tensor.name]
+            if tensor.datatype != datatype or len(tensor.shape) != len(shape) or \
+                    any(dim >= 0 and dim != size for dim, size in zip(shape, tensor.shape)):
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Input {} is {} {}, expected {} {}".format(
+                    tensor.name, tensor.datatype, list(tensor.shape), datatype, shape))
+            try:
+                encode_output(response, tensor.name + '_out', decode_input(request, index))
+            except ValueError as inst:
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(inst))
+        return response
+
+    def RepositoryModelLoad(self, request, context):
+        self.checkRepository(context)
+        self.checkModel(request.model_name, context)
+        self.loaded = True
+        return grpc_predict_v2_pb2.RepositoryModelLoadResponse()
+
+    def RepositoryModelUnload(self, request, context):
+        self.checkRepository(context)
+        self.checkModel(request.model_name, context)
+        self.loaded = False
+        return grpc_predict_v2_pb2.RepositoryModelUnloadResponse()
+
+
+def startServer(servicer, address='localhost', port=0):
+    '''
+    :return: tuple of (started grpc server, bound port)
+    '''
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10), options=SERVER_OPTIONS)
+    grpc_predict_v2_pb2_grpc.add_GRPCInferenceServiceServicer_to_server(servicer, server)
+    port = server.add_insecure_port("{}:{}".format(address, port))
+    server.start()
+    return server, port
+
+def parseInputs(text):
+    #name:DATATYPE:1x3x224x224, several inputs separated by commas
+    inputs = []
+    for spec in text.split(','):
+        name, datatype, shape = spec.split(':')
+        assert datatype in DATATYPE_TO_NP, "Invalid datatype provided: " + datatype
+        inputs.append((name, datatype, [int(dim) for dim in shape.lower().split('x')]))
+    return inputs
+
+
+if __name__ == '__main__':
+    log.basicConfig(level=log.INFO)
+    parser = argparse.ArgumentParser(description='Stand-in KServe v2 gRPC server for the kserve adaptor,\
+                                     its model returns the inputs it receives.')
+    parser.add_argument('--port', required=False, default=9000, type=int,
+                        help='Specify port to listen on. default: 9000')
+    parser.add_argument('--model_name', required=False, default='model',
+                        help='Specify name of the served model. default: model')
+    parser.add_argument('--inputs', required=False, default='input_0:FP32:-1x3x224x224',
+                        help='Comma separated inputs of the model as name:DATATYPE:shape, -1 marks a dynamic\
+                         dimension. default: input_0:FP32:-1x3x224x224')
+    parser.add_argument('--repository_control', required=False, default='false',
+                        help='Specify \'true\' to serve the model repository extension, the model is then\
+                         only ready after RepositoryModelLoad. default: false')
+    args = vars(parser.parse_args(sys.argv[1:]))
+    assert args['repository_control'] in ["true", "false"], "Invalid repository_control provided: " \
+        + args['repository_control']
+    server, port = startServer(LocalInferenceServicer(args['model_name'], parseInputs(args['inputs']),
+                                                      args['repository_control'] == 'true'),
+                               '[::]', args['port'])
+    log.info("Serving {} on port {}".format(args['model_name'], port))
+    server.wait_for_termination()
@@ -0,0 +1,110 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import numpy as np
+
+#KServe v2 tensor datatypes, BYTES and BF16 have no numpy counterpart, raw contents are little endian
+DATATYPE_TO_NP = {
+    'BOOL': np.dtype(np.bool_),
+    'UINT8': np.dtype(np.uint8),
+    'UINT16': np.dtype(np.uint16),
+    'UINT32': np.dtype(np.uint32),
+    'UINT64': np.dtype(np.uint64),
+    'INT8': np.dtype(np.int8),
+    'INT16': np.dtype(np.int16),
+    'INT32': np.dtype(np.int32),
+    'INT64': np.dtype(np.int64),
+    'FP16': np.dtype(np.float16),
+    'FP32': np.dtype(np.float32),
+    'FP64': np.dtype(np.float64),
+}
+NP_TO_DATATYPE = {value: key for key, value in DATATYPE_TO_NP.items()}
+
+#typed value fields used when a tensor carries no raw contents
+CONTENTS_FIELDS = {
+    'BOOL': 'bool_contents',
+    'UINT8': 'uint_contents',
+    'UINT16': 'uint_contents',
+    'UINT32': 'uint_contents',
+    'UINT64': 'uint64_contents',
+    'INT8': 'int_contents',
+    'INT16': 'int_contents',
+    'INT32': 'int_contents',
+    'INT64': 'int64_contents',
+    'FP32': 'fp32_contents',
+    'FP64': 'fp64_contents',
+}
+
+def encode_input(request, name, array, datatype=None):
+    '''
+    Add an input tensor to a ModelInferRequest, its data is appended to raw_input_contents in one copy.
+    :param request: ModelInferRequest to fill
+    :param array: numpy array in the shape sent to the model
+    :param datatype: KServe datatype sent on the wire, None to keep the dtype of array
+    '''
+    if datatype is None:
+        array = np.ascontiguousarray(array)
+        datatype = NP_TO_DATATYPE.get(array.dtype)
+    elif datatype in DATATYPE_TO_NP:
+        array = np.ascontiguousarray(array, dtype=DATATYPE_TO_NP[datatype])
+    else:
+        datatype = None
+    if datatype is None:
+        raise ValueError("Unsupported datatype of input {}".format(name))
+    request.inputs.add(name=name, datatype=datatype, shape=array.shape)
+    request.raw_input_contents.append(array.tobytes())
+    return request
+
+def encode_output(response, name, array):
+    '''
+    Add an output tensor to a ModelInferResponse, its data is appended to raw_output_contents.
+    '''
+    array = np.ascontiguousarray(array)
+    datatype = NP_TO_DATATYPE.get(array.dtype)
+    if datatype is None:
+        raise ValueError("Unsupported datatype of output {}".format(name))
+    response.outputs.add(name=name, datatype=datatype, shape=array.shape)
+    response.raw_output_contents.append(array.tobytes())
+    return response
+
+def _decode_tensor(tensor, raw_contents, index):
+    dtype = DATATYPE_TO_NP.get(tensor.datatype)
+    if dtype is None:
+        raise ValueError("Unsupported datatype {} of {}".format(tensor.datatype, tensor.name))
+    shape = list(tensor.shape)
+    if index < len(raw_contents):
+        return np.frombuffer(raw_contents[index], dtype=dtype).reshape(shape)
+    if tensor.datatype not in CONTENTS_FIELDS:
+        raise ValueError("Tensor {} of datatype {} carries no raw contents".format(tensor.name, tensor.datatype))
+    return np.array(getattr(tensor.contents, CONTENTS_FIELDS[tensor.datatype]), dtype=dtype).reshape(shape)
+
+def decode_input(request, index):
+    '''
+    :param request: ModelInferRequest
+    :param index: position of the input in request.inputs
+    :return: numpy array, a read only view on the raw input contents when they are set
+    '''
+    return _decode_tensor(request.inputs[index], request.raw_input_contents, index)
+
+def decode_output(response, index):
+    '''
+    :param response: ModelInferResponse
+    :param index: position of the output in response.outputs
+    :return: numpy array, a read only view on the raw output contents when they are set
+    '''
+    return _decode_tensor(response.outputs[index], response.raw_output_contents, index)
@@ -0,0 +1,137 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import collections
+import logging as log
+import os
+import re
+import shutil
+import threading
+
+SHA256_HEX = re.compile("^[0-9a-f]{64}$")
+MODEL_KEY = re.compile("^[0-9a-f]{64}-[0-9a-f]{64}$")
+STORE_XML = "model.xml"
+STORE_BIN = "model.bin"
+
+
+def modelKey(xml_sha256, bin_sha256):
+    '''
+    :return: store key of a model given the sha256 hex digests of its files, None if invalid
+    '''
+    xml_sha256 = xml_sha256.lower()
+    bin_sha256 = bin_sha256.lower()
+    if not SHA256_HEX.match(xml_sha256) or not SHA256_HEX.match(bin_sha256):
+        return None
+    return "{}-{}".format(xml_sha256, bin_sha256)
+
+def _placeFile(src, dst):
+    #hard link when possible, the store and model directory never modify files in place
+    tmp = dst + ".part"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+class ModelStore:
+    '''
+    Content addressed on disk cache of uploaded models, one directory per model
+    named after the sha256 of its xml and bin files. Least recently used models
+    are evicted once the store grows beyond max_bytes.
+    The store is shared by all tokens of a service.
+    '''
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        #key -> size in bytes, least recently used first
+        self.entries = collections.OrderedDict()
+        os.makedirs(root, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        found = []
+        for key in os.listdir(self.root):
+            path = os.path.join(self.root, key)
+            files = [os.path.join(path, STORE_XML), os.path.join(path, STORE_BIN)]
+            if not os.path.isdir(path):
+                continue
+            if not MODEL_KEY.match(key) or not all(os.path.isfile(f) for f in files):
+                #left over from an interrupted add
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            found.append((os.path.getmtime(path), key, sum(os.path.getsize(f) for f in files)))
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+        log.info("Model store {} holds {} models, {} bytes".format(self.root, len(self.entries), self.size()))
+
+    def size(self):
+        return sum(self.entries.values())
+
+    def stats(self):
+        with self.lock:
+            return {'models': len(self.entries), 'bytes': self.size()}
+
+    def _entryDir(self, key):
+        return os.path.join(self.root, key)
+
+    def fetch(self, key, xml_path, bin_path):
+        '''
+        Place the stored model at xml_path and bin_path.
+        :return: True if the model is in the store
+        '''
+        with self.lock:
+            if key not in self.entries:
+                return False
+            self.entries.move_to_end(key)
+            entry = self._entryDir(key)
+            os.utime(entry)
+            _placeFile(os.path.join(entry, STORE_XML), xml_path)
+            _placeFile(os.path.join(entry, STORE_BIN), bin_path)
+        log.info("Model {} served from store".format(key[:16]))
+        return True
+
+    def add(self, key, xml_path, bin_path):
+        '''
+        Store the model files found at xml_path and bin_path under key and
+        evict least recently used models beyond the size limit.
+        '''
+        size = os.path.getsize(xml_path) + os.path.getsize(bin_path)
+        if size > self.max_bytes:
+            log.warning("Model {} of {} bytes exceeds the model store size".format(key[:16], size))
+            return
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return
+            entry = self._entryDir(key)
+            tmp = entry + ".part"
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.mkdir(tmp)
+            _placeFile(xml_path, os.path.join(tmp, STORE_XML))
+            _placeFile(bin_path, os.path.join(tmp, STORE_BIN))
+            os.replace(tmp, entry)
+            self.entries[key] = size
+            while self.size() > self.max_bytes:
+                evicted, evicted_size = self.entries.popitem(last=False)
+                shutil.rmtree(self._entryDir(evicted), ignore_errors=True)
+                log.info("Evicted model {} ({} bytes) from store".format(evicted[:16], evicted_size))
+        log.info("Model {} added to store".format(key[:16]))
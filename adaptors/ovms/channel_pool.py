@@ -0,0 +1,214 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import asyncio
+import itertools
+import logging as log
+import threading
+import grpc
+
+DEFAULT_POOL_SIZE = 4
+
+DEFAULT_CHANNEL_OPTIONS = {
+    'grpc.max_send_message_length': 1024*1024*1024,
+    'grpc.max_receive_message_length': 1024*1024*1024,
+    'grpc.keepalive_time_ms': 30000,
+    'grpc.keepalive_timeout_ms': 10000,
+    'grpc.keepalive_permit_without_calls': 1,
+    'grpc.http2.max_pings_without_data': 0,
+    #grpc shares subchannels between channels with identical arguments,
+    #a local pool is needed so that every channel owns its own connection
+    'grpc.use_local_subchannel_pool': 1,
+}
+
+
+class ChannelPool:
+    '''
+    Pool of long lived insecure channels to a single target.
+    Calls are spread round-robin over the channels, stubs are created once per
+    channel and a channel is rebuilt after it reports the server as unavailable.
+    The pool is shared by all server worker threads.
+    '''
+    def __init__(self, address, port, size=DEFAULT_POOL_SIZE, options=None):
+        self.target = "{}:{}".format(address, port)
+        self.size = max(1, int(size))
+        self.options = dict(DEFAULT_CHANNEL_OPTIONS)
+        if options:
+            self.options.update(options)
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+        self.channels = [None] * self.size
+        self.stubs = [{} for _ in range(self.size)]
+        #calls running per sync channel, replaced channels are closed once they have none
+        self.inflight = {}
+        self.draining = set()
+        self.aio_channels = []
+        self.aio_stubs = []
+        #loop the aio channels belong to, replaced channel -> task closing it
+        self.aio_loop = None
+        self.aio_draining = {}
+        #closeAio scheduled by close
+        self.aio_closing = None
+
+    def _createChannel(self, idx):
+        log.debug("Opening channel {} to {}".format(idx, self.target))
+        self.channels[idx] = grpc.insecure_channel(self.target, options=list(self.options.items()))
+        self.stubs[idx] = {}
+
+    def getStub(self, stub_class):
+        '''
+        :param stub_class: generated grpc stub class, e.g. PredictionServiceStub
+        :return: tuple of (channel index, channel, stub) for the next channel in the pool,
+                 the call has to be ended with release(channel)
+        '''
+        idx = next(self.counter) % self.size
+        with self.lock:
+            if self.channels[idx] is None:
+                self._createChannel(idx)
+            channel = self.channels[idx]
+            stub = self.stubs[idx].get(stub_class)
+            if stub is None:
+                stub = stub_class(channel)
+                self.stubs[idx][stub_class] = stub
+            self.inflight[channel] = self.inflight.get(channel, 0) + 1
+        return idx, channel, stub
+
+    def release(self, channel):
+        #the last call on a replaced channel closes it
+        with self.lock:
+            self.inflight[channel] -= 1
+            if self.inflight[channel] > 0:
+                return
+            del self.inflight[channel]
+            if channel not in self.draining:
+                return
+            self.draining.remove(channel)
+        channel.close()
+
+    def getAioStub(self, stub_class):
+        '''
+        Same as getStub for grpc.aio, must be called from the event loop thread.
+        grpc.aio channels are bound to the running loop.
+        :return: tuple of (channel index, stub)
+        '''
+        if not self.aio_channels:
+            self.aio_loop = asyncio.get_running_loop()
+            self.aio_channels = [grpc.aio.insecure_channel(self.target, options=list(self.options.items()))
+                                 for _ in range(self.size)]
+            self.aio_stubs = [{} for _ in range(self.size)]
+        idx = next(self.counter) % self.size
+        stub = self.aio_stubs[idx].get(stub_class)
+        if stub is None:
+            stub = stub_class(self.aio_channels[idx])
+            self.aio_stubs[idx][stub_class] = stub
+        return idx, stub
+
+    def reset(self, idx, channel):
+        #Replace the channel unless a concurrent call already did, it is reopened on next use.
+        #Calls still running on the old channel finish before it is closed
+        with self.lock:
+            if self.channels[idx] is not channel:
+                return
+            self.channels[idx] = None
+            self.stubs[idx] = {}
+            busy = channel in self.inflight
+            if busy:
+                self.draining.add(channel)
+        log.warning("Reconnecting channel {} to {}".format(idx, self.target))
+        if not busy:
+            channel.close()
+
+    def call(self, stub_class, method, request, timeout):
+        '''
+        Invoke stub_class.method(request) on the next channel. If the server is
+        unavailable the channel is rebuilt and the call is retried once.
+        '''
+        idx, channel, stub = self.getStub(stub_class)
+        try:
+            return getattr(stub, method)(request, timeout)
+        except grpc.RpcError as err:
+            if err.code() != grpc.StatusCode.UNAVAILABLE:
+                raise
+        finally:
+            self.release(channel)
+        self.reset(idx, channel)
+        idx, channel, stub = self.getStub(stub_class)
+        try:
+            return getattr(stub, method)(request, timeout)
+        finally:
+            self.release(channel)
+
+    async def resetAio(self, idx, channel, grace):
+        #Replace the aio channel unless a concurrent call already did
+        if self.aio_channels[idx] is not channel:
+            return
+        log.warning("Reconnecting aio channel {} to {}".format(idx, self.target))
+        self.aio_channels[idx] = grpc.aio.insecure_channel(self.target, options=list(self.options.items()))
+        self.aio_stubs[idx] = {}
+        #calls still running on the old channel get up to grace seconds to finish, the retry does not wait
+        closing = asyncio.get_running_loop().create_task(channel.close(grace))
+        self.aio_draining[channel] = closing
+        closing.add_done_callback(lambda _: self.aio_draining.pop(channel, None))
+
+    async def asyncCall(self, stub_class, method, request, timeout):
+        '''
+        Same as call for grpc.aio, must be awaited on the event loop thread.
+        '''
+        idx, stub = self.getAioStub(stub_class)
+        channel = self.aio_channels[idx]
+        try:
+            return await getattr(stub, method)(request, timeout=timeout)
+        except grpc.RpcError as err:
+            if err.code() != grpc.StatusCode.UNAVAILABLE:
+                raise
+            await self.resetAio(idx, channel, timeout)
+        idx, stub = self.getAioStub(stub_class)
+        return await getattr(stub, method)(request, timeout=timeout)
+
+    async def closeAio(self):
+        '''
+        Close the grpc.aio channels, must be awaited on the event loop thread that opened them.
+        '''
+        channels = self.aio_channels + list(self.aio_draining)
+        self.aio_channels = []
+        self.aio_stubs = []
+        self.aio_draining = {}
+        self.aio_loop = None
+        await asyncio.gather(*(channel.close() for channel in channels))
+
+    def close(self):
+        with self.lock:
+            channels = self.channels + list(self.draining)
+            self.channels = [None] * self.size
+            self.stubs = [{} for _ in range(self.size)]
+            self.draining = set()
+        for channel in channels:
+            if channel is not None:
+                channel.close()
+        loop = self.aio_loop
+        if loop is None or loop.is_closed():
+            return
+        #aio channels can only be closed on their loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self.aio_closing = loop.create_task(self.closeAio())
+        else:
+            self.aio_closing = asyncio.run_coroutine_threadsafe(self.closeAio(), loop)
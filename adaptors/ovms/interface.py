@@ -16,24 +16,35 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 
-import datetime
-import grpc
-import tensorflow as tf
-from tensorflow import make_tensor_proto, make_ndarray
+import time
+import numpy as np
+import common.metrics as metrics
 from adaptors.base_adaptor import BaseInterface
 from adaptors.ovms.load_model import ModelLoader
-from tensorflow_serving.apis import predict_pb2
-from tensorflow_serving.apis import prediction_service_pb2_grpc
-from tensorflow_serving.apis import model_service_pb2_grpc
-from tensorflow_serving.apis import get_model_status_pb2
+from adaptors.ovms.channel_pool import ChannelPool, DEFAULT_POOL_SIZE
+from adaptors.ovms.tensor_codec import encode_tensor, decode_tensor
+try:
+    #serving api protos compiled without the tensorflow package
+    from ovmsclient.tfs_compat.protos.tensorflow_serving.apis import predict_pb2
+    from ovmsclient.tfs_compat.protos.tensorflow_serving.apis import prediction_service_pb2_grpc
+    from ovmsclient.tfs_compat.protos.tensorflow_serving.apis import model_service_pb2_grpc
+    from ovmsclient.tfs_compat.protos.tensorflow_serving.apis import get_model_status_pb2
+except ImportError:
+    from tensorflow_serving.apis import predict_pb2
+    from tensorflow_serving.apis import prediction_service_pb2_grpc
+    from tensorflow_serving.apis import model_service_pb2_grpc
+    from tensorflow_serving.apis import get_model_status_pb2
 
 
 class OvmsInterface(BaseInterface):
-    def __init__(self, ovms_address, ovms_port, model_name, path):
+    def __init__(self, ovms_address, ovms_port, model_name, path, channels=DEFAULT_POOL_SIZE):
         super().__init__()
         self.grpc_address = ovms_address
         self.grpc_port = ovms_port
+        self.channel_pool = ChannelPool(ovms_address, ovms_port, channels)
         self.model_name = model_name
+        #model label of the metrics, createInterfaceObj sets a bounded one for per session model names
+        self.metrics_label = self.model_name
         self.state_names = {
             0: "UNKNOWN",
             10: "START",
@@ -47,13 +58,12 @@ class OvmsInterface(BaseInterface):
 
     def checkModelStatus(self, curr_state, version=1):
         print('Checking Model Status')
-        channel = grpc.insecure_channel("{}:{}".format(self.grpc_address, self.grpc_port))
-        stub = model_service_pb2_grpc.ModelServiceStub(channel)
         request = get_model_status_pb2.GetModelStatusRequest()
         request.model_spec.name = self.model_name
         request.model_spec.version.value = version
         try:
-            response = stub.GetModelStatus(request, 10.0)
+            response = self.channel_pool.call(model_service_pb2_grpc.ModelServiceStub,
+                                              'GetModelStatus', request, 10.0)
         except Exception as inst:
             print(type(inst))    # the exception instance
             print(inst)
@@ -69,9 +79,7 @@ class OvmsInterface(BaseInterface):
                 return i.state
         return 0
 
-    def run_detection(self, input_data):
-        channel = grpc.insecure_channel("{}:{}".format(self.grpc_address, self.grpc_port))
-        stub = prediction_service_pb2_grpc.PredictionServiceStub(channel)
+    def buildPredictRequest(self, input_data):
         request = predict_pb2.PredictRequest()
         request.model_spec.name = self.model_name
 
@@ -79,22 +87,35 @@ class OvmsInterface(BaseInterface):
             input_shape = input_data[key][1]
             img = input_data[key][0]
             img = img.reshape(input_shape[0],input_shape[1], input_shape[2], input_shape[3])
-            request.inputs[key].CopyFrom(make_tensor_proto(img, dtype=tf.float32,\
-                                                           shape=(img.shape)))
+            encode_tensor(request.inputs[key], img, np.float32)
+        return request
 
-        start_time = datetime.datetime.now()
-        result = stub.Predict(request, 10.0)
+    def parsePredictResponse(self, result):
         #returns dictionary with keyword as nodename and values :tupple of data and their shape
         response = {}
         for key in result.outputs.keys():
             shape = [d.size for d in result.outputs[key].tensor_shape.dim]
-            response[key] = (make_ndarray(result.outputs[key]),shape)
+            response[key] = (decode_tensor(result.outputs[key]),shape)
+        return response
 
-        end_time = datetime.datetime.now()
-        duration = (end_time - start_time).total_seconds() * 1000
-        print("Predict time in ms: ", duration)
+    def run_detection(self, input_data):
+        with metrics.timeStage(self.metrics_label, 'serialization'):
+            request = self.buildPredictRequest(input_data)
+        with metrics.timeStage(self.metrics_label, 'inference'):
+            result = self.channel_pool.call(prediction_service_pb2_grpc.PredictionServiceStub,
+                                            'Predict', request, 10.0)
+        with metrics.timeStage(self.metrics_label, 'deserialization'):
+            return self.parsePredictResponse(result)
 
-        return response
+    async def async_run_detection(self, input_data):
+        with metrics.timeStage(self.metrics_label, 'serialization'):
+            request = self.buildPredictRequest(input_data)
+        start_time = time.perf_counter()
+        result = await self.channel_pool.asyncCall(prediction_service_pb2_grpc.PredictionServiceStub,
+                                                   'Predict', request, 10.0)
+        metrics.observeStage(self.metrics_label, 'inference', start_time)
+        with metrics.timeStage(self.metrics_label, 'deserialization'):
+            return self.parsePredictResponse(result)
 
     def prepareDir(self):
         self.model_loader.prepareDir()
@@ -105,5 +126,30 @@ class OvmsInterface(BaseInterface):
     def saveBin(self, chunk):
         self.model_loader.saveBin(chunk)
 
+    def commitXML(self):
+        return self.model_loader.commitXML()
+
+    def commitBin(self):
+        return self.model_loader.commitBin()
+
+    def abortUploads(self):
+        self.model_loader.abortUploads()
+
+    def setModelStore(self, model_store):
+        self.model_loader.setModelStore(model_store)
+
+    def useStoredModel(self, xml_sha256, bin_sha256):
+        return self.model_loader.useStoredModel(xml_sha256, bin_sha256)
+
     def isModelLoaded(self, timeout_in_ms):
         return self.model_loader.isModelLoaded(self, timeout_in_ms)
+
+    def parallelism(self):
+        return self.channel_pool.size
+
+    def close(self):
+        self.channel_pool.close()
+
+    async def async_close(self):
+        await self.channel_pool.closeAio()
+        self.channel_pool.close()
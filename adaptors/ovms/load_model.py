@@ -19,15 +19,20 @@
 import os
 import shutil
 import datetime
+import common.metrics as metrics
+from adaptors.base_loader import BaseModelLoader
+from adaptors.ovms.status_watcher import ModelStatusWatcher
 
 
-class ModelLoader:
+class ModelLoader(BaseModelLoader):
     def __init__(self):
+        super().__init__()
         self.version_counter = 0
         self.loaded_version = -1
         self.DIR_PATH = ''
         self.XML_PATH = ''
         self.BIN_PATH = ''
+        self.status_watcher = None
 
     def setModelDir(self, path):
         self.DIR_PATH = path
@@ -38,6 +43,9 @@ class ModelLoader:
         #Using model version: 1,2,3
         self.version_counter = self.version_counter%3 +1
         self.loaded_version = -1
+        if self.status_watcher is not None:
+            self.status_watcher.forget(self.version_counter)
+        self.abortUploads()
         files = os.listdir(self.DIR_PATH)
         for i in files:
             full_path = self.DIR_PATH + i
@@ -49,46 +57,26 @@ class ModelLoader:
                 print("Not deleting {} ".format(full_path))
         os.mkdir(self.DIR_PATH + str(self.version_counter))
 
-    def saveXML(self, chunk):
-        with open(self.XML_PATH.format(self.version_counter), 'ab') as out_file:
-            print("xml chunk size {}".format(len(chunk.data)))
-            out_file.write(chunk.data)
-        print("saveXML for model {} ".format(self.version_counter))
-
-        return True
-
-    def saveBin(self, chunk):
-        with open(self.BIN_PATH.format(self.version_counter), 'ab') as out_file:
-            print("bin chunk size {}".format(len(chunk.data)))
-            out_file.write(chunk.data)
-        print("saveBin for model {} ".format(self.version_counter))
-
-        return True
+    def modelPaths(self):
+        return self.XML_PATH.format(self.version_counter), self.BIN_PATH.format(self.version_counter)
 
     #Make sure this is called at least once
     def isModelLoaded(self, interface_obj, timeout_in_ms):
-        curr_status = 0
-        AVAILABLE = 30
         if(self.loaded_version==self.version_counter):
             return True
-        start_time = datetime.datetime.now()
-        last_print_delay = 0
+        if self.status_watcher is None:
+            self.status_watcher = ModelStatusWatcher(interface_obj.checkModelStatus)
         #adding this for object Detection and FaceMaskDetection as version is not required
         #so statically adding version, version 0 is invalid so reseting to 1
         if(self.version_counter == 0):
             self.version_counter = 1
-        while(curr_status != AVAILABLE):
-            curr_status = interface_obj.checkModelStatus(curr_status, self.version_counter)
-            curr_time = datetime.datetime.now()
-            elapsed_time = (curr_time-start_time).total_seconds()*1000
-            if((elapsed_time - last_print_delay) > 100):
-                last_print_delay = elapsed_time
-                print("Model version {} not loaded yet".format(self.version_counter))
-            if(elapsed_time > timeout_in_ms):
-                break
-        if(curr_status == AVAILABLE):
-            print("Model version {} loaded successfully".format(self.version_counter))
+        start_time = datetime.datetime.now()
+        if self.status_watcher.waitAvailable(self.version_counter, timeout_in_ms):
+            elapsed_time = (datetime.datetime.now() - start_time).total_seconds()*1000
+            print("Model version {} loaded successfully in {} ms".format(self.version_counter, elapsed_time))
+            metrics.model_load_seconds.observe(elapsed_time / 1000, interface_obj.metrics_label)
             self.loaded_version = self.version_counter
+            self.finishUploads()
             return True
-
+        print("Model version {} not loaded yet".format(self.version_counter))
         return False
@@ -0,0 +1,93 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import logging as log
+import random
+import threading
+import time
+
+AVAILABLE = 30
+POLL_INITIAL_MS = 20
+POLL_MAX_MS = 1000
+
+
+class ModelStatusWatcher:
+    '''
+    Polls the serving model status in the background and caches the last state
+    per model version. Threads waiting for the same version share one poll loop,
+    which backs off exponentially with jitter so a loading server is not flooded
+    with status requests.
+    '''
+    def __init__(self, check_status):
+        '''
+        :param check_status: function(curr_state, version) returning the current state
+        '''
+        self.check_status = check_status
+        self.cond = threading.Condition()
+        self.states = {}
+        self.waiters = {}
+        self.pollers = {}
+
+    def state(self, version):
+        with self.cond:
+            return self.states.get(version, 0)
+
+    def forget(self, version):
+        #the version number is reused for the next model
+        with self.cond:
+            self.states.pop(version, None)
+
+    def _poll(self, version):
+        delay_ms = POLL_INITIAL_MS
+        state = self.state(version)
+        while True:
+            state = self.check_status(state, version)
+            with self.cond:
+                self.states[version] = state
+                self.cond.notify_all()
+                if state == AVAILABLE or self.waiters.get(version, 0) == 0:
+                    del self.pollers[version]
+                    return
+            #equal jitter keeps pollers of different services from synchronizing
+            time.sleep(random.uniform(delay_ms / 2, delay_ms) / 1000)
+            delay_ms = min(delay_ms * 2, POLL_MAX_MS)
+
+    def waitAvailable(self, version, timeout_in_ms):
+        '''
+        :return: True once the version is available, False on timeout
+        '''
+        deadline = time.monotonic() + timeout_in_ms / 1000
+        with self.cond:
+            if self.states.get(version) == AVAILABLE:
+                return True
+            self.waiters[version] = self.waiters.get(version, 0) + 1
+            try:
+                if version not in self.pollers:
+                    poller = threading.Thread(target=self._poll, args=(version,),
+                                              name="ModelStatus-{}".format(version), daemon=True)
+                    self.pollers[version] = poller
+                    poller.start()
+                while self.states.get(version) != AVAILABLE:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        log.warning("Model version {} not available after {} ms".format(version, timeout_in_ms))
+                        return False
+                    self.cond.wait(remaining)
+                return True
+            finally:
+                self.waiters[version] -= 1
@@ -0,0 +1,122 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import numpy as np
+
+#tensorflow DataType enum values from tensorflow/core/framework/types.proto
+NP_TO_TF_DTYPE = {
+    np.dtype(np.float32): 1,    #DT_FLOAT
+    np.dtype(np.float64): 2,    #DT_DOUBLE
+    np.dtype(np.int32): 3,      #DT_INT32
+    np.dtype(np.uint8): 4,      #DT_UINT8
+    np.dtype(np.int16): 5,      #DT_INT16
+    np.dtype(np.int8): 6,       #DT_INT8
+    np.dtype(np.int64): 9,      #DT_INT64
+    np.dtype(np.bool_): 10,     #DT_BOOL
+    np.dtype(np.uint16): 17,    #DT_UINT16
+    np.dtype(np.float16): 19,   #DT_HALF
+    np.dtype(np.uint32): 22,    #DT_UINT32
+    np.dtype(np.uint64): 23,    #DT_UINT64
+}
+TF_TO_NP_DTYPE = {value: key for key, value in NP_TO_TF_DTYPE.items()}
+
+#TensorProto field 4 tensor_content, length delimited
+TAG_TENSOR_CONTENT = 0x22
+
+#typed value fields used when a TensorProto carries no tensor_content
+VALUE_FIELDS = {
+    1: 'float_val',
+    2: 'double_val',
+    3: 'int_val',
+    4: 'int_val',
+    5: 'int_val',
+    6: 'int_val',
+    9: 'int64_val',
+    10: 'bool_val',
+    17: 'int_val',
+    19: 'half_val',
+    22: 'uint32_val',
+    23: 'uint64_val',
+}
+
+def encode_varint(value):
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return out
+
+def content_field(array, dtype):
+    '''
+    Serialized tensor_content field holding array in C order as dtype.
+    numpy converts and orders the data while writing it into the field, in one copy.
+    '''
+    header = bytearray([TAG_TENSOR_CONTENT]) + encode_varint(array.size * dtype.itemsize)
+    field = bytearray(len(header) + array.size * dtype.itemsize)
+    field[:len(header)] = header
+    np.copyto(np.frombuffer(field, dtype, offset=len(header)).reshape(array.shape), array, casting='unsafe')
+    return field
+
+def encode_tensor(tensor_proto, array, dtype=np.float32):
+    '''
+    Fill a TensorProto in place. Tensor data is converted straight into the
+    serialized tensor_content field, which the message parses in, so a change
+    of dtype or a non contiguous array costs no extra copy.
+    :param tensor_proto: TensorProto to fill, e.g. request.inputs[name]
+    :param array: numpy array
+    :param dtype: numpy dtype sent on the wire
+    '''
+    array = np.asarray(array)
+    dtype = np.dtype(dtype)
+    tensor_proto.dtype = NP_TO_TF_DTYPE[dtype]
+    for size in array.shape:
+        tensor_proto.tensor_shape.dim.add().size = size
+    if array.size > 0:
+        tensor_proto.MergeFromString(content_field(array, dtype))
+    return tensor_proto
+
+def decode_tensor(tensor_proto):
+    '''
+    :param tensor_proto: TensorProto from a PredictResponse
+    :return: numpy array, a read only view on tensor_content when it is set
+    '''
+    shape = [dim.size for dim in tensor_proto.tensor_shape.dim]
+    dtype = TF_TO_NP_DTYPE.get(tensor_proto.dtype)
+    if dtype is None:
+        raise ValueError("Unsupported tensor dtype {}".format(tensor_proto.dtype))
+    if tensor_proto.tensor_content:
+        return np.frombuffer(tensor_proto.tensor_content, dtype=dtype).reshape(shape)
+
+    values = getattr(tensor_proto, VALUE_FIELDS[tensor_proto.dtype])
+    if tensor_proto.dtype == 19:
+        #half_val holds the raw float16 bits
+        values = np.array(values, dtype=np.uint16).view(np.float16)
+    else:
+        values = np.array(values, dtype=dtype)
+    num_elements = int(np.prod(shape))
+    if values.size == num_elements:
+        return values.reshape(shape)
+    #same as tensorflow: a shorter value list is padded with its last element
+    result = np.empty(num_elements, dtype=dtype)
+    if values.size > 0:
+        result[:values.size] = values
+        result[values.size:] = values[-1]
+    else:
+        result.fill(0)
+    return result.reshape(shape)
@@ -0,0 +1,60 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import logging as log
+import queue
+from contextlib import contextmanager
+
+
+class InferRequestPool:
+    '''
+    Fixed set of infer requests created from one compiled model.
+    A request is checked out for the duration of a single inference so that
+    concurrent server threads never share input or output tensors.
+    '''
+    def __init__(self, compiled_model, size=0, min_size=1):
+        if size <= 0:
+            size = max(min_size, self.optimalSize(compiled_model))
+        self.size = size
+        self.requests = queue.Queue()
+        for _ in range(size):
+            self.requests.put(compiled_model.create_infer_request())
+        log.info("Created {} infer requests".format(size))
+
+    @staticmethod
+    def optimalSize(compiled_model):
+        try:
+            return max(1, int(compiled_model.get_property('OPTIMAL_NUMBER_OF_INFER_REQUESTS')))
+        except Exception as inst:
+            log.warning("OPTIMAL_NUMBER_OF_INFER_REQUESTS unavailable: {}".format(inst))
+            return 1
+
+    def acquire(self):
+        #Blocks until one of the requests is returned
+        return self.requests.get()
+
+    def release(self, infer_request):
+        self.requests.put(infer_request)
+
+    @contextmanager
+    def request(self):
+        infer_request = self.acquire()
+        try:
+            yield infer_request
+        finally:
+            self.release(infer_request)
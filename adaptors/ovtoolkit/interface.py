@@ -20,20 +20,42 @@ import os
 import logging as log
 from adaptors.base_adaptor import BaseInterface
 from adaptors.ovtoolkit.load_model import ModelLoader
+from adaptors.ovtoolkit.infer_pool import InferRequestPool
+from adaptors.ovtoolkit.model_registry import registry, fileDigest
+import common.metrics as metrics
 import datetime
+import inspect
 import sys
+import time
 import openvino.runtime as ov
 
+#share_inputs lets openvino use writable input arrays of matching type without a copy
+INFER_KWARGS = {'share_inputs': True} \
+    if 'share_inputs' in inspect.signature(ov.InferRequest.infer).parameters else {}
+
 class OvtkInterface(BaseInterface):
-    def __init__(self, model_name, path, device):
+    def __init__(self, model_name, path, device, performance_hint='LATENCY', infer_requests=0,
+                 preprocess=None, named_outputs=False, min_infer_requests=1):
         super().__init__()
-        self.ie = ov.Core()
+        #PreprocessSpec compiled into the model, inputs are then raw uint8 images
+        self.preprocess = preprocess
+        #key outputs by tensor name like the ovms adaptor instead of by index
+        self.named_outputs = named_outputs
         self.device = device
-        self.net = ''
+        self.performance_hint = performance_hint
+        #0 uses the optimal number of infer requests reported by the compiled model
+        self.num_infer_requests = infer_requests
+        #concurrent inferences of the service, LATENCY usually reports a single optimal
+        #infer request which would serialize all of them on the pool
+        self.min_infer_requests = min_infer_requests
         self.outputs_len = 0
-        self.model_loader = ModelLoader(str(model_name))
+        self.model_name = str(model_name)
+        #model label of the metrics, createInterfaceObj sets a bounded one for per session model names
+        self.metrics_label = self.model_name
+        self.model_loader = ModelLoader(self.model_name)
         self.model_loader.setModelDir(path)
-        self.infer_request = ''
+        self.infer_pool = None
+        self.shared_model = None
         self.quant_model = False
 
     def load_model(self, model_xml=None, model_name=None):
@@ -45,56 +67,85 @@ class OvtkInterface(BaseInterface):
         # ---------- 1. Read IR Generated by ModelOptimizer (.xml and .bin files) -------------
         model_bin = os.path.splitext(model_xml)[0] + ".bin"
         log.info("loading network files:\n\t{}\n\t{}".format(model_xml, model_bin))
-        self.net = self.ie.read_model(model=model_xml, weights=model_bin)
         if(self.quant_model):
             self.device = "CPU"
             log.warning("Forcing device for Quant: "+ self.device)
         log.info("using device: "+ self.device)
-        tput = {'PERFORMANCE_HINT': 'LATENCY'}
-        exec_net = ''
-        try:
-            exec_net = self.ie.compile_model(self.net, self.device, tput)
-        except Exception as inst:
-            log.warning(type(inst))    # the exception instance
-            log.warning(inst)
-            log.warning("using Fallback device CPU ")
-            exec_net = self.ie.compile_model(self.net, "CPU")
-        self.infer_request = exec_net.create_infer_request()
+        tput = {'PERFORMANCE_HINT': self.performance_hint}
+        #tokens with identical model files share the compiled model
+        digests = self.model_loader.digests
+        if model_xml == self.model_loader.XML_PATH and len(digests) == 2:
+            content_key = (digests['xml'], digests['bin'])
+        else:
+            content_key = (fileDigest(model_xml), fileDigest(model_bin))
+        shared_model = registry.acquire(model_xml, model_bin, content_key, self.device, tput,
+                                        self.preprocess)
+        self.releaseModel()
+        self.shared_model = shared_model
+        exec_net = shared_model.compiled_model
+        min_requests = self.min_infer_requests if self.performance_hint == 'LATENCY' else 1
+        self.infer_pool = InferRequestPool(exec_net, self.num_infer_requests, min_requests)
         self.outputs_len = len(exec_net.outputs)
+        self.output_keys = [output.get_any_name() if self.named_outputs else str(idx)
+                            for idx, output in enumerate(exec_net.outputs)]
         curr_time = (datetime.datetime.now() - start_time).total_seconds()
         log.info("Time spent in loading model {}: {}".format(model_name, curr_time))
+        metrics.model_load_seconds.observe(curr_time, self.metrics_label)
 
         return 30          #AVAILABLE
 
     def run_detection(self, input_data):
-        start_time = datetime.datetime.now()
-
+        start_time = time.perf_counter()
         processed_data = {}
         for key in input_data:
             input_shape = input_data[key][1]
             img = input_data[key][0]
             img = img.reshape(input_shape)
-            processed_data[int(key)] = img
+            #numeric keys are input indices, anything else an input name
+            processed_data[int(key) if str(key).isdigit() else key] = img
 
-        curr_time = datetime.datetime.now()
-        if (self.infer_request == '') :
+        if self.infer_pool is None:
             log.error("Error !!! infer request is null")
             sys.exit(1)
-        res = self.infer_request.infer(inputs=processed_data)
-        end_time = datetime.datetime.now()
-        predict_time = (end_time - curr_time).total_seconds() * 1000
-        #returns dictionary with keyword as nodename and values :tupple of data and their shape
-        response = {}
-        for output_key in range(self.outputs_len):
-            out = self.infer_request.get_output_tensor(output_key).data
-            response[str(output_key)] = (out, list(out.shape))
-        exit_time = datetime.datetime.now()
-        input_time = (curr_time - start_time).total_seconds() * 1000
-        output_time = (exit_time - end_time).total_seconds() * 1000
-        log.debug("INPUT_Prep:{} Inference_TIME:{} OUTPUT_Prep:{}".format(input_time,
-                                                                      predict_time, output_time))
+        metrics.observeStage(self.metrics_label, 'input_prep', start_time)
+        start_time = time.perf_counter()
+        with self.infer_pool.request() as infer_request:
+            metrics.observeStage(self.metrics_label, 'queue_wait', start_time)
+            start_time = time.perf_counter()
+            infer_request.infer(inputs=processed_data, **INFER_KWARGS)
+            metrics.observeStage(self.metrics_label, 'inference', start_time)
+            start_time = time.perf_counter()
+            #returns dictionary with keyword as nodename and values :tupple of data and their shape
+            #output tensors belong to the pooled request, copy them before it is reused
+            response = {}
+            for output_key in range(self.outputs_len):
+                out = infer_request.get_output_tensor(output_key).data.copy()
+                response[self.output_keys[output_key]] = (out, list(out.shape))
+            metrics.observeStage(self.metrics_label, 'output_prep', start_time)
         return response
 
+    def releaseModel(self):
+        if self.shared_model is not None:
+            registry.release(self.shared_model)
+            self.shared_model = None
+
+    def parallelism(self):
+        return self.infer_pool.size if self.infer_pool is not None else 1
+
+    def modelFootprint(self):
+        if self.shared_model is None:
+            return None
+        return self.shared_model.key, self.shared_model.size
+
+    def unload(self):
+        self.model_loader.loaded_flag = False
+        self.infer_pool = None
+        self.releaseModel()
+
+    def close(self):
+        self.infer_pool = None
+        self.releaseModel()
+
     def prepareDir(self):
         self.model_loader.prepareDir()
 
@@ -107,5 +158,20 @@ class OvtkInterface(BaseInterface):
     def saveBin(self, chunk):
         self.model_loader.saveBin(chunk)
 
+    def commitXML(self):
+        return self.model_loader.commitXML()
+
+    def commitBin(self):
+        return self.model_loader.commitBin()
+
+    def abortUploads(self):
+        self.model_loader.abortUploads()
+
+    def setModelStore(self, model_store):
+        self.model_loader.setModelStore(model_store)
+
+    def useStoredModel(self, xml_sha256, bin_sha256):
+        return self.model_loader.useStoredModel(xml_sha256, bin_sha256)
+
     def isModelLoaded(self, timeout_in_ms):
         return self.model_loader.isModelLoaded(self, timeout_in_ms)
@@ -21,9 +21,11 @@ import logging as log
 import shutil
 import datetime
 import threading
+from adaptors.base_loader import BaseModelLoader
 
-class ModelLoader:
+class ModelLoader(BaseModelLoader):
     def __init__(self, model_name):
+        super().__init__()
         self.loaded_flag = False
         self.DIR_PATH = ''
         self.XML_PATH = ''
@@ -40,39 +42,34 @@ class ModelLoader:
 
     def cleanUp(self):
         self.loaded_flag = False
+        self.abortUploads()
         #cleaning if any previous model is loaded
         if os.path.isfile(self.XML_PATH):
             os.remove(self.XML_PATH)
         if os.path.isfile(self.BIN_PATH):
             os.remove(self.BIN_PATH)
 
-    def saveXML(self, chunk):
-        with open(self.XML_PATH, 'ab') as out_file:
-            log.debug("xml chunk size {}".format(len(chunk.data)))
-            out_file.write(chunk.data)
-        log.info("saveXML for model {} ".format(self.model_name))
-
-        return True
-
-    def saveBin(self, chunk):
-        with open(self.BIN_PATH, 'ab') as out_file:
-            log.debug("bin chunk size {}".format(len(chunk.data)))
-            out_file.write(chunk.data)
-        log.info("saveBin for model {} ".format(self.model_name))
-
-        return True
+    def modelPaths(self):
+        return self.XML_PATH, self.BIN_PATH
 
     def isModelLoaded(self, interface_obj, timeout_in_ms):
         #To check if model is already loaded
         if(self.loaded_flag):
             return True
-        t = threading.Thread(None, interface_obj.load_model, "LoadingModel", (self.XML_PATH, self.model_name))
+        #load_model returns AVAILABLE, nothing is returned if it raised
+        result = []
+        t = threading.Thread(None, lambda: result.append(interface_obj.load_model(self.XML_PATH, self.model_name)),
+                             "LoadingModel")
         t.start()
         t.join(timeout=(timeout_in_ms/1000))
         if t.is_alive():
             log.warning("Model load timed out")
             self.loaded_flag = False
+        elif not result:
+            log.error("Model load failed")
+            self.loaded_flag = False
         else:
             log.info("Model Loaded successfully")
             self.loaded_flag = True
+            self.finishUploads()
         return self.loaded_flag
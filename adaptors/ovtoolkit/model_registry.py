@@ -0,0 +1,129 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import datetime
+import hashlib
+import logging as log
+import os
+import threading
+import openvino.runtime as ov
+
+HASH_BLOCK_SIZE = 8*1024*1024
+
+_core = None
+_core_lock = threading.Lock()
+
+def getCore():
+    #one openvino Core per process, it owns the device plugins and is thread safe
+    global _core
+    with _core_lock:
+        if _core is None:
+            _core = ov.Core()
+        return _core
+
+def fileDigest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as in_file:
+        for block in iter(lambda: in_file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SharedModel:
+    def __init__(self, key):
+        self.key = key
+        self.compiled_model = None
+        self.refs = 0
+        #size of the model files, an estimate of the memory held by the compiled model
+        self.size = 0
+        #set once compilation finished, successfully or not
+        self.ready = threading.Event()
+        self.error = None
+
+
+class ModelRegistry:
+    '''
+    Process wide registry of compiled models keyed by model content, device and
+    compile config. Tokens loading the same model share one compiled model and
+    create their own infer requests from it. Entries are reference counted and
+    released when the last token closes.
+    '''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.models = {}
+
+    def acquire(self, model_xml, model_bin, content_key, device, config, preprocess=None):
+        '''
+        :param content_key: identifies the model files, e.g. their sha256 digests
+        :param config: compile properties
+        :param preprocess: optional PreprocessSpec built into the model before compiling
+        :return: SharedModel holding the compiled model, release it with release()
+        '''
+        key = (content_key, device, tuple(sorted(config.items())),
+               preprocess.key() if preprocess is not None else None)
+        with self.lock:
+            entry = self.models.get(key)
+            owner = entry is None
+            if owner:
+                entry = SharedModel(key)
+                self.models[key] = entry
+            entry.refs += 1
+        if owner:
+            self._compile(entry, model_xml, model_bin, device, config, preprocess)
+        else:
+            log.info("Sharing compiled model with {} other token(s)".format(entry.refs - 1))
+            entry.ready.wait()
+        if entry.error is not None:
+            self.release(entry)
+            raise entry.error
+        return entry
+
+    def _compile(self, entry, model_xml, model_bin, device, config, preprocess):
+        start_time = datetime.datetime.now()
+        core = getCore()
+        try:
+            entry.size = os.path.getsize(model_xml) + os.path.getsize(model_bin)
+            net = core.read_model(model=model_xml, weights=model_bin)
+            if preprocess is not None:
+                net = preprocess.apply(net)
+            try:
+                entry.compiled_model = core.compile_model(net, device, config)
+            except Exception as inst:
+                log.warning(type(inst))    # the exception instance
+                log.warning(inst)
+                log.warning("using Fallback device CPU ")
+                entry.compiled_model = core.compile_model(net, "CPU")
+        except Exception as inst:
+            entry.error = inst
+        entry.ready.set()
+        curr_time = (datetime.datetime.now() - start_time).total_seconds()
+        log.info("Time spent in compiling model: {}".format(curr_time))
+
+    def release(self, entry):
+        with self.lock:
+            entry.refs -= 1
+            if entry.refs == 0 and self.models.get(entry.key) is entry:
+                del self.models[entry.key]
+                log.info("Released compiled model")
+
+    def __len__(self):
+        with self.lock:
+            return len(self.models)
+
+
+registry = ModelRegistry()
@@ -0,0 +1,58 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import openvino.runtime as ov
+from openvino.preprocess import PrePostProcessor, ColorFormat, ResizeAlgorithm
+
+
+class PreprocessSpec:
+    '''
+    Image preprocessing compiled into the model with PrePostProcessor.
+    The model input then accepts a decoded uint8 BGR image of any size in NHWC
+    layout, openvino converts it to float, optionally to RGB, resizes it to the
+    model input size, applies (x - mean) / scale and transposes it to the model layout.
+    '''
+    def __init__(self, input_name, to_rgb=False, mean=0.0, scale=1.0, model_layout='NCHW'):
+        self.input_name = input_name
+        self.to_rgb = to_rgb
+        self.mean = mean
+        self.scale = scale
+        self.model_layout = model_layout
+
+    def key(self):
+        #part of the compiled model registry key
+        return (self.input_name, self.to_rgb, self.mean, self.scale, self.model_layout)
+
+    def apply(self, model):
+        ppp = PrePostProcessor(model)
+        model_input = ppp.input(self.input_name)
+        model_input.tensor().set_element_type(ov.Type.u8) \
+                            .set_layout(ov.Layout('NHWC')) \
+                            .set_spatial_dynamic_shape() \
+                            .set_color_format(ColorFormat.BGR)
+        steps = model_input.preprocess()
+        steps.convert_element_type(ov.Type.f32)
+        if self.to_rgb:
+            steps.convert_color(ColorFormat.RGB)
+        steps.resize(ResizeAlgorithm.RESIZE_LINEAR)
+        if self.mean != 0.0:
+            steps.mean(self.mean)
+        if self.scale != 1.0:
+            steps.scale(self.scale)
+        model_input.model().set_layout(ov.Layout(self.model_layout))
+        return ppp.build()
@@ -0,0 +1,79 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import asyncio
+import time
+import numpy as np
+from adaptors.base_adaptor import BaseInterface
+import common.metrics as metrics
+
+
+class StubInterface(BaseInterface):
+    '''
+    In process adaptor without an inference backend, used to benchmark the
+    services offline. Inference waits latency_ms and returns fixed outputs,
+    repeated along the batch dimension of the input. Without outputs the
+    inputs are returned, as needed by rawTensor where any model may be loaded.
+    '''
+    def __init__(self, model_name, outputs=None, latency_ms=0):
+        '''
+        :param outputs: dict of output name -> numpy array with a batch dimension of 1
+        :param latency_ms: simulated inference time
+        '''
+        self.model_name = model_name
+        #model label of the metrics, createInterfaceObj sets a bounded one for per session model names
+        self.metrics_label = self.model_name
+        self.outputs = outputs
+        self.latency_ms = latency_ms
+        self.quant_model = False
+
+    def isModelLoaded(self, timeout_in_ms):
+        return True
+
+    def respond(self, input_data):
+        if self.outputs is None:
+            return {key: (np.asarray(data).reshape(shape), list(shape)) for key, (data, shape) in input_data.items()}
+        batch = int(next(iter(input_data.values()))[1][0])
+        response = {}
+        for key, out in self.outputs.items():
+            if batch > 1:
+                out = np.repeat(out, batch, axis=0)
+            response[key] = (out, list(out.shape))
+        return response
+
+    def run_detection(self, input_data):
+        with metrics.timeStage(self.metrics_label, 'inference'):
+            if self.latency_ms > 0:
+                time.sleep(self.latency_ms / 1000.0)
+            return self.respond(input_data)
+
+    async def async_run_detection(self, input_data):
+        #awaits like a remote backend, the event loop keeps serving meanwhile
+        start_time = time.perf_counter()
+        if self.latency_ms > 0:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+        result = self.respond(input_data)
+        metrics.observeStage(self.metrics_label, 'inference', start_time)
+        return result
+
+    def prepareDir(self):
+        #models are not stored, uploads only matter to the other adaptors
+        pass
+
+    def cleanUp(self):
+        pass
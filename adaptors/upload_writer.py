@@ -0,0 +1,77 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import datetime
+import hashlib
+import logging as log
+import os
+
+UPLOAD_BUFFER_SIZE = 8*1024*1024
+PARTIAL_SUFFIX = ".part"
+
+
+class UploadWriter:
+    '''
+    Writes one uploaded file chunk by chunk through a single buffered handle.
+    A committed file can be reopened to append the chunks of a further stream.
+    Data goes to a temporary file next to the target, which is renamed into
+    place by commit so readers never see a partially written model.
+    '''
+    def __init__(self, path):
+        '''
+        :param path: final path of the file
+        '''
+        self.path = path
+        self.tmp_path = path + PARTIAL_SUFFIX
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.start_time = datetime.datetime.now()
+        self.out_file = open(self.tmp_path, 'wb', buffering=UPLOAD_BUFFER_SIZE)
+
+    def reopen(self):
+        '''
+        Continue a committed file, the next commit covers the data written before and after.
+        '''
+        os.replace(self.path, self.tmp_path)
+        self.start_time = datetime.datetime.now()
+        self.out_file = open(self.tmp_path, 'ab', buffering=UPLOAD_BUFFER_SIZE)
+
+    def write(self, data):
+        self.out_file.write(data)
+        self.digest.update(data)
+        self.size += len(data)
+
+    def commit(self):
+        '''
+        Flush the data and move the file to its final path.
+        :return: hex sha256 digest of the file
+        '''
+        self.out_file.close()
+        os.replace(self.tmp_path, self.path)
+        duration = (datetime.datetime.now() - self.start_time).total_seconds()
+        hexdigest = self.digest.hexdigest()
+        log.info("Uploaded {} {} bytes in {:.3f} s ({:.1f} MB/s) sha256 {}".format(
+            os.path.basename(self.path), self.size, duration,
+            self.size / max(duration, 1e-6) / (1024*1024), hexdigest))
+        return hexdigest
+
+    def abort(self):
+        self.out_file.close()
+        if os.path.isfile(self.tmp_path):
+            os.remove(self.tmp_path)
+        log.warning("Upload of {} aborted after {} bytes".format(self.path, self.size))
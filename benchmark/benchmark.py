@@ -0,0 +1,516 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import argparse
+import asyncio
+import collections
+import importlib
+import json
+import logging as log
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent import futures
+import cv2
+import grpc
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+from adaptors.batching import BatchingInterface
+from adaptors.stub.interface import StubInterface
+import common.metrics as metrics
+import common.detection_service as detection_service
+
+SERVICES = {
+    'objectDetection': {'module': 'objectDetection', 'pb2': 'object_detection_pb2',
+                        'rpcs': ['getPredictions', 'getPredictionsBatch'], 'input_size': (300, 300)},
+    'faceMaskDetection': {'module': 'faceMaskDetection', 'pb2': 'facemask_detection_pb2',
+                          'rpcs': ['getPredictions', 'getPredictionsBatch'], 'input_size': (260, 260)},
+    'rawTensor': {'module': 'rawTensor', 'pb2': 'nnhal_raw_tensor_pb2', 'rpcs': ['getInferResult']},
+}
+TENSOR_DTYPES = {'f16': np.float16, 'f32': np.float32, 'f64': np.float64, 'i8': np.int8, 'i16': np.int16,
+                 'i32': np.int32, 'i64': np.int64, 'u8': np.uint8, 'u16': np.uint16, 'u32': np.uint32,
+                 'u64': np.uint64}
+CHANNEL_OPTIONS = [
+    ('grpc.max_send_message_length', 1024*1024*1024),
+    ('grpc.max_receive_message_length', 1024*1024*1024),
+]
+SERVER_WORKERS = 10
+#the image services find most priors below the score threshold, a few are detections
+DETECTIONS = 20
+
+
+def loadService(name):
+    #services import their generated protos and utils relative to their own directory
+    sys.path.insert(0, os.path.join(REPO_DIR, 'services', name))
+    try:
+        return (importlib.import_module(SERVICES[name]['module']),
+                importlib.import_module(SERVICES[name]['pb2']),
+                importlib.import_module(SERVICES[name]['pb2'] + '_grpc'))
+    except ImportError as inst:
+        print("Error: Unable to import {} ({}), generate its protos as described in the README".format(name, inst))
+        sys.exit(1)
+
+def parseShape(text):
+    return [int(dim) for dim in text.lower().split('x')]
+
+def imageOutputs(service, detection, rng):
+    #raw model outputs with DETECTIONS confident priors, so post-processing does representative work
+    if service == 'objectDetection':
+        classes = rng.normal(-6.0, 1.0, (1, 1917, 91)).astype(np.float32)
+        hot = rng.choice(1917, DETECTIONS, replace=False)
+        classes[0, hot, rng.integers(1, 91, DETECTIONS)] = 3.0
+        locations = rng.normal(0.0, 0.5, (1, 1917, 4)).astype(np.float32)
+        return {"Transpose_537": classes, "Transpose_535": locations}
+    num_anchors = detection.anchor_decoder.num_anchors
+    scores = rng.uniform(0.0, 0.3, (1, num_anchors, 2)).astype(np.float32)
+    hot = rng.choice(num_anchors, DETECTIONS, replace=False)
+    scores[0, hot, rng.integers(0, 2, DETECTIONS)] = 0.9
+    boxes = rng.normal(0.0, 0.5, (1, num_anchors, 4)).astype(np.float32)
+    return {"loc_branch_concat_1/concat": boxes, "cls_branch_concat_1/concat": scores}
+
+def syntheticImage(width, height, rng):
+    #smooth content plus sensor noise, compresses like a camera frame rather than like white noise
+    small = rng.integers(0, 256, (max(1, height // 16), max(1, width // 16), 3), dtype=np.uint8)
+    img = cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+    noise = rng.integers(-8, 9, img.shape, dtype=np.int16)
+    img = np.clip(img.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    ok, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return encoded.tobytes()
+
+def buildRequests(args, pb2, rng):
+    '''
+    :return: tuple of (list of request messages, payload description)
+    '''
+    if args['service'] == 'rawTensor':
+        dtype = TENSOR_DTYPES[args['tensor_dtype']]
+        shapes = [parseShape(shape) for shape in args['tensor_shapes'].split(',')]
+        data_type = pb2.DataTensor.DATA_TYPE.Value(args['tensor_dtype'])
+        requests = []
+        for _ in range(args['distinct_payloads']):
+            tensors = []
+            for index, shape in enumerate(shapes):
+                data = (rng.standard_normal(shape) * 100).astype(dtype)
+                tensors.append(pb2.DataTensor(data=data.tobytes(), node_name="input_{}".format(index),
+                                              tensor_shape=shape, data_type=data_type))
+            requests.append(pb2.RequestDataTensors(data_tensors=tensors, token=pb2.Token(data=args['token'])))
+        return requests, {'tensor_shapes': shapes, 'tensor_dtype': args['tensor_dtype']}
+
+    if args['image_file'] != "":
+        with open(args['image_file'], 'rb') as image_file:
+            images = [image_file.read()]
+        payload = {'image_file': os.path.basename(args['image_file'])}
+    else:
+        sizes = [parseShape(size) for size in args['image_sizes'].split(',')]
+        #sizes are cycled, so each of them gets the same share of requests
+        images = [syntheticImage(sizes[i % len(sizes)][0], sizes[i % len(sizes)][1], rng)
+                  for i in range(args['distinct_payloads'])]
+        payload = {'image_sizes': ["{}x{}".format(width, height) for width, height in sizes]}
+    payload['mean_image_bytes'] = int(np.mean([len(image) for image in images]))
+    if args['rpc'] == 'getPredictionsBatch':
+        payload['batch_size'] = args['batch_size']
+        requests = [pb2.RequestBytesBatch(requests=[pb2.RequestBytes(data=images[(i + j) % len(images)])
+                                                    for j in range(args['batch_size'])])
+                    for i in range(len(images))]
+    else:
+        requests = [pb2.RequestBytes(data=image) for image in images]
+    return requests, payload
+
+
+class InProcessService:
+    '''
+    Runs the servicer of a service on a local port, inference is served by a
+    StubInterface instead of ovms or openvino.
+    '''
+    def __init__(self, args, module, pb2, pb2_grpc, rng):
+        self.args = args
+        self.aio = (args['server_mode'] == 'aio')
+        if args['service'] == 'rawTensor':
+            servicer = module.AsyncDetection if self.aio else module.Detection
+            self.detection = servicer('stub', 'CPU', "", "", 0, 'false', serving_model_name='remote_model')
+            self.addServicer = module.addDetectionServicer
+            self.options = CHANNEL_OPTIONS
+        else:
+            width, height = SERVICES[args['service']]['input_size']
+            interface = StubInterface(args['service'], latency_ms=args['stub_latency_ms'])
+            if args['max_batch_size'] > 1:
+                interface = BatchingInterface(interface, args['max_batch_size'], args['max_batch_delay_ms'])
+            reuse_buffers = (not self.aio and args['max_batch_size'] == 1)
+            servicer = module.AsyncDetection if self.aio else module.Detection
+            self.detection = servicer(interface, "", 0, height, width, False, 'NCHW', reuse_buffers,
+                                      args['max_batch_size'])
+            stub_interface = interface.interface if args['max_batch_size'] > 1 else interface
+            stub_interface.outputs = imageOutputs(args['service'], self.detection, rng)
+            self.addServicer = pb2_grpc.add_DetectionServicer_to_server
+            self.options = detection_service.SERVER_OPTIONS
+
+    def start(self):
+        '''
+        :return: target address of the service
+        '''
+        if not self.aio:
+            self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=SERVER_WORKERS), options=self.options)
+            self.addServicer(self.detection, self.server)
+            port = self.server.add_insecure_port('localhost:0')
+            self.server.start()
+            return "localhost:{}".format(port)
+        #the aio server gets its own event loop, the load generator keeps the main one
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="BenchmarkServer", daemon=True).start()
+
+        async def serve():
+            self.server = grpc.aio.server(
+                migration_thread_pool=futures.ThreadPoolExecutor(max_workers=SERVER_WORKERS), options=self.options)
+            self.addServicer(self.detection, self.server)
+            port = self.server.add_insecure_port('localhost:0')
+            await self.server.start()
+            return port
+
+        return "localhost:{}".format(asyncio.run_coroutine_threadsafe(serve(), self.loop).result())
+
+    def setLatency(self, token):
+        #rawTensor creates its stub in prepare, the simulated latency is set afterwards
+        self.detection.interface[token].latency_ms = self.args['stub_latency_ms']
+
+    def resetStages(self):
+        metrics.stage_seconds.reset()
+
+    def stageMeans(self):
+        return metrics.stage_seconds.means()
+
+    def stop(self):
+        if self.aio:
+            asyncio.run_coroutine_threadsafe(self.server.stop(0), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        else:
+            self.server.stop(0)
+
+
+def serveProcess(args, conn):
+    #child of ServiceProcess, runs the commands of the parent until stop
+    module, pb2, pb2_grpc = loadService(args['service'])
+    rng = np.random.default_rng(args['seed'])
+    #same draws as in main, so the stub outputs match a run without --server_process
+    buildRequests(args, pb2, rng)
+    service = InProcessService(args, module, pb2, pb2_grpc, rng)
+    conn.send(service.start())
+    while True:
+        command, params = conn.recv()
+        conn.send(getattr(service, command)(*params))
+        if command == 'stop':
+            return
+
+
+class ServiceProcess:
+    '''
+    InProcessService run in a child process, so that the load generator does
+    not share the GIL with the servicer. Same methods as InProcessService.
+    '''
+    def __init__(self, args):
+        context = multiprocessing.get_context('spawn')
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=serveProcess, args=(args, child_conn), name="BenchmarkServer",
+                                       daemon=True)
+
+    def start(self):
+        self.process.start()
+        return self.conn.recv()
+
+    def call(self, command, *params):
+        self.conn.send((command, params))
+        return self.conn.recv()
+
+    def setLatency(self, token):
+        self.call('setLatency', token)
+
+    def resetStages(self):
+        self.call('resetStages')
+
+    def stageMeans(self):
+        return self.call('stageMeans')
+
+    def stop(self):
+        self.call('stop')
+        self.process.join()
+
+
+async def issue(call, request, timeout_s):
+    try:
+        await call(request, timeout=timeout_s)
+        return 'OK'
+    except grpc.aio.AioRpcError as inst:
+        return inst.code().name
+
+async def closedLoop(call, requests, args, stop_time):
+    #each worker sends its next request as soon as the previous one returned
+    records = []
+
+    async def worker(index):
+        while time.perf_counter() < stop_time:
+            start_time = time.perf_counter()
+            status = await issue(call, requests[index % len(requests)], args['timeout_s'])
+            records.append((start_time, time.perf_counter(), status))
+            index += args['concurrency']
+
+    await asyncio.gather(*[worker(index) for index in range(args['concurrency'])])
+    return records, 0
+
+async def openLoop(call, requests, args, start_time, warmup_end, stop_time, rng):
+    #requests are sent at their scheduled time whether or not earlier ones returned, latency is
+    #counted from the schedule so a stalled client or server is not hidden (coordinated omission)
+    records = []
+    tasks = set()
+    dropped = 0
+
+    async def send(scheduled, request):
+        status = await issue(call, request, args['timeout_s'])
+        records.append((scheduled, time.perf_counter(), status))
+
+    index = 0
+    scheduled = start_time
+    while scheduled < stop_time:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(tasks) >= args['max_inflight']:
+            if scheduled >= warmup_end:
+                dropped += 1
+        else:
+            task = asyncio.create_task(send(scheduled, requests[index % len(requests)]))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        index += 1
+        if args['arrival'] == 'poisson':
+            scheduled += rng.exponential(1.0 / args['rate'])
+        else:
+            scheduled = start_time + index / args['rate']
+    if tasks:
+        await asyncio.wait(tasks)
+    return records, dropped
+
+def summarize(records, dropped, warmup_end, stop_time):
+    measured = [record for record in records if record[0] >= warmup_end]
+    latencies = np.array([end - start for start, end, status in measured if status == 'OK']) * 1000
+    errors = collections.Counter(status for _, _, status in measured if status != 'OK')
+    window = stop_time - warmup_end
+    summary = {
+        'requests': len(measured),
+        'ok': len(latencies),
+        'errors': dict(errors),
+        'error_rate': round(sum(errors.values()) / len(measured), 6) if measured else 0.0,
+        'dropped': dropped,
+        'throughput_rps': round(len(latencies) / window, 3),
+    }
+    if len(latencies):
+        summary['latency_ms'] = {'mean': round(float(latencies.mean()), 3),
+                                 'p50': round(float(np.percentile(latencies, 50)), 3),
+                                 'p95': round(float(np.percentile(latencies, 95)), 3),
+                                 'p99': round(float(np.percentile(latencies, 99)), 3),
+                                 'max': round(float(latencies.max()), 3)}
+    return summary
+
+async def runLoad(target, pb2, pb2_grpc, requests, args, service, rng):
+    async with grpc.aio.insecure_channel(target, options=CHANNEL_OPTIONS) as channel:
+        stub = pb2_grpc.DetectionStub(channel)
+        if args['service'] == 'rawTensor':
+            token = pb2.RequestString(token=pb2.Token(data=args['token']))
+            if service is not None:
+                await stub.prepare(token)
+                service.setLatency(args['token'])
+            status = await stub.loadModel(token)
+            assert status.status, "Model of token {} is not loaded".format(args['token'])
+        call = getattr(stub, args['rpc'])
+        start_time = time.perf_counter()
+        warmup_end = start_time + args['warmup_s']
+        stop_time = warmup_end + args['duration_s']
+        if service is not None:
+            #stage timings start with the measured window
+            loop = asyncio.get_running_loop()
+            loop.call_at(loop.time() + args['warmup_s'], service.resetStages)
+        if args['load'] == 'closed':
+            records, dropped = await closedLoop(call, requests, args, stop_time)
+        else:
+            records, dropped = await openLoop(call, requests, args, start_time, warmup_end, stop_time, rng)
+    return summarize(records, dropped, warmup_end, stop_time)
+
+def gitCommit():
+    try:
+        #results of a tree with local changes are marked -dirty
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=REPO_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def validate(args):
+    assert args['service'] in SERVICES, "Invalid service provided: " + args['service']
+    if args['rpc'] == "":
+        args['rpc'] = SERVICES[args['service']]['rpcs'][0]
+    assert args['rpc'] in SERVICES[args['service']]['rpcs'], "Invalid rpc provided for {}: {}".format(
+        args['service'], args['rpc'])
+    assert args['load'] in ["closed", "open"], "Invalid load provided: " + args['load']
+    assert args['arrival'] in ["uniform", "poisson"], "Invalid arrival provided: " + args['arrival']
+    assert args['server_mode'] in ["sync", "aio"], "Invalid server_mode provided: " + args['server_mode']
+    assert args['server_process'] in ["true", "false"], "Invalid server_process provided: " \
+        + args['server_process']
+    assert (1 <= args['concurrency'] <= 4096), "Invalid concurrency provided: " + str(args['concurrency'])
+    assert (0 < args['rate']), "Invalid rate provided: " + str(args['rate'])
+    assert (1 <= args['max_inflight']), "Invalid max_inflight provided: " + str(args['max_inflight'])
+    assert (0 < args['duration_s']), "Invalid duration_s provided: " + str(args['duration_s'])
+    assert (0 <= args['warmup_s']), "Invalid warmup_s provided: " + str(args['warmup_s'])
+    assert (1 <= args['distinct_payloads']), "Invalid distinct_payloads provided: " \
+        + str(args['distinct_payloads'])
+    assert (1 <= args['batch_size'] <= 256), "Invalid batch_size provided: " + str(args['batch_size'])
+    assert (1 <= args['max_batch_size'] <= 256), "Invalid max_batch_size provided: " \
+        + str(args['max_batch_size'])
+    assert (0 <= args['stub_latency_ms']), "Invalid stub_latency_ms provided: " + str(args['stub_latency_ms'])
+    assert args['tensor_dtype'] in TENSOR_DTYPES, "Invalid tensor_dtype provided: " + args['tensor_dtype']
+    for shape in args['tensor_shapes'].split(','):
+        assert all(dim > 0 for dim in parseShape(shape)), "Invalid tensor_shapes provided: " \
+            + args['tensor_shapes']
+    for size in args['image_sizes'].split(','):
+        assert len(parseShape(size)) == 2, "Invalid image_sizes provided: " + args['image_sizes']
+    if args['image_file'] != "":
+        assert os.path.exists(args['image_file']), "Invalid path provided to image_file: " + args['image_file']
+
+def main(args):
+    rng = np.random.default_rng(args['seed'])
+    module, pb2, pb2_grpc = loadService(args['service'])
+    requests, payload = buildRequests(args, pb2, rng)
+    service = None
+    if args['target'] == "":
+        if args['server_process'] == 'true':
+            service = ServiceProcess(args)
+        else:
+            service = InProcessService(args, module, pb2, pb2_grpc, rng)
+        target = service.start()
+    else:
+        target = args['target']
+    try:
+        summary = asyncio.run(runLoad(target, pb2, pb2_grpc, requests, args, service, rng))
+        stage_means = service.stageMeans() if service is not None else {}
+    finally:
+        if service is not None:
+            service.stop()
+
+    result = {
+        'service': args['service'],
+        'rpc': args['rpc'],
+        'target': 'in-process' if service is not None else target,
+        'load': args['load'],
+        'payload': payload,
+        'duration_s': args['duration_s'],
+        'warmup_s': args['warmup_s'],
+    }
+    if args['load'] == 'closed':
+        result['concurrency'] = args['concurrency']
+    else:
+        result.update({'rate': args['rate'], 'arrival': args['arrival'], 'max_inflight': args['max_inflight']})
+    if service is not None:
+        result.update({'server_mode': args['server_mode'], 'server_process': args['server_process'] == 'true',
+                       'stub_latency_ms': args['stub_latency_ms']})
+        if args['service'] != 'rawTensor':
+            result['max_batch_size'] = args['max_batch_size']
+    result.update(summary)
+    if service is not None:
+        #mean time per model and server side stage, e.g. decode, preprocess, inference and postprocess
+        result['stage_ms'] = {}
+        for (model, stage), seconds in stage_means.items():
+            result['stage_ms'].setdefault(model, {})[stage] = round(seconds * 1000, 3)
+    result.update({'commit': gitCommit(), 'python': platform.python_version(), 'grpc': grpc.__version__,
+                   'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z')})
+
+    line = json.dumps(result)
+    print(line)
+    if args['output'] != "":
+        with open(args['output'], 'a') as out_file:
+            out_file.write(line + "\n")
+
+
+if __name__ == '__main__':
+    log.basicConfig(level=log.WARNING)
+    parser = argparse.ArgumentParser(description='Throughput and latency benchmark of the services gRPC APIs,\
+                                     by default against the service running in process on a stub adaptor.')
+    parser.add_argument('--service', required=True,
+                        help='Specify service to benchmark: \'objectDetection\', \'faceMaskDetection\' or\
+                         \'rawTensor\'. Its protos have to be generated')
+    parser.add_argument('--rpc', required=False, default="",
+                        help='Specify rpc to call: \'getPredictions\' or \'getPredictionsBatch\' for the image\
+                         services, \'getInferResult\' for rawTensor. default: the first one')
+    parser.add_argument('--target', required=False, default="",
+                        help='Specify address of a running service instead of serving it in process, e.g.\
+                         localhost:50051 or unix:/path/to/socket. default="" (in process)')
+    parser.add_argument('--load', required=False, default='closed',
+                        help='Specify \'closed\' to keep concurrency requests in flight or \'open\' to send\
+                         requests at a fixed rate regardless of replies. default: closed')
+    parser.add_argument('--concurrency', required=False, default=8, type=int,
+                        help='Requests in flight of the closed loop. default: 8')
+    parser.add_argument('--rate', required=False, default=100.0, type=float,
+                        help='Requests per second of the open loop. default: 100')
+    parser.add_argument('--arrival', required=False, default='uniform',
+                        help='Specify open loop arrivals: \'uniform\' intervals or \'poisson\'. default: uniform')
+    parser.add_argument('--max_inflight', required=False, default=1024, type=int,
+                        help='Open loop requests in flight at most, arrivals beyond are counted as dropped.\
+                         default: 1024')
+    parser.add_argument('--duration_s', required=False, default=10.0, type=float,
+                        help='Seconds measured after the warmup. default: 10')
+    parser.add_argument('--warmup_s', required=False, default=2.0, type=float,
+                        help='Seconds of load before measuring. default: 2')
+    parser.add_argument('--timeout_s', required=False, default=30.0, type=float,
+                        help='Deadline of each request, expired ones count as DEADLINE_EXCEEDED errors.\
+                         default: 30')
+    parser.add_argument('--image_sizes', required=False, default='640x480',
+                        help='Comma separated WIDTHxHEIGHT of the synthetic JPEG images, used in turn.\
+                         default: 640x480')
+    parser.add_argument('--image_file', required=False, default="",
+                        help='Specify image file to send instead of synthetic images. default=""')
+    parser.add_argument('--batch_size', required=False, default=4, type=int,
+                        help='Images per getPredictionsBatch request. default: 4')
+    parser.add_argument('--tensor_shapes', required=False, default='1x3x224x224',
+                        help='Comma separated shapes like 1x3x224x224, one rawTensor input tensor each.\
+                         default: 1x3x224x224')
+    parser.add_argument('--tensor_dtype', required=False, default='f32',
+                        help='Specify data type of the rawTensor inputs: f16, f32, f64, i8, i16, i32, i64, u8,\
+                         u16, u32 or u64. default: f32')
+    parser.add_argument('--token', required=False, default=1, type=int,
+                        help='Specify rawTensor model token, with --target the model has to be loaded. default: 1')
+    parser.add_argument('--distinct_payloads', required=False, default=8, type=int,
+                        help='Different requests sent in turn. default: 8')
+    parser.add_argument('--seed', required=False, default=0, type=int,
+                        help='Seed of the payloads, stub outputs and poisson arrivals. default: 0')
+    parser.add_argument('--server_mode', required=False, default='sync',
+                        help='Specify grpc server mode of the in process service: \'sync\' or \'aio\'.\
+                         default: sync')
+    parser.add_argument('--server_process', required=False, default='false',
+                        help='Specify \'true\' to run the in process service in a child process, so client CPU\
+                         time is not counted as server latency. default: false')
+    parser.add_argument('--stub_latency_ms', required=False, default=0.0, type=float,
+                        help='Simulated inference time of the stub adaptor. default: 0')
+    parser.add_argument('--max_batch_size', required=False, default=1, type=int,
+                        help='Batch concurrent requests of the in process image services. default: 1')
+    parser.add_argument('--max_batch_delay_ms', required=False, default=5, type=int,
+                        help='Maximum time a request waits for a batch to fill. default: 5')
+    parser.add_argument('--output', required=False, default="",
+                        help='Specify file to append the json result line to, it is always printed. default=""')
+    args = vars(parser.parse_args(sys.argv[1:]))
+    validate(args)
+    main(args)
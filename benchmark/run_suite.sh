@@ -0,0 +1,40 @@
+#!/bin/bash
+# Runs the standard benchmark matrix of all services against their in process
+# stub adaptor and appends one json line per run to the results file.
+# usage: benchmark/run_suite.sh [results file] [seconds per run]
+RESULTS_FILE=${1:-benchmark_results.jsonl}
+DURATION_S=${2:-10}
+REPO_DIR=$(cd "$(dirname "$0")/.." && pwd)
+BENCHMARK="python3 $REPO_DIR/benchmark/benchmark.py --duration_s $DURATION_S --output $RESULTS_FILE"
+
+function generate_protos {
+    for SERVICE in objectDetection faceMaskDetection rawTensor; do
+        SERVICE_DIR=$REPO_DIR/services/$SERVICE
+        if [ -z "$(ls $SERVICE_DIR/*_pb2.py 2>/dev/null)" ]; then
+            python3 -m grpc_tools.protoc -I $SERVICE_DIR --python_out=$SERVICE_DIR --grpc_python_out=$SERVICE_DIR \
+                $SERVICE_DIR/*.proto || exit -1
+        fi
+    done
+}
+
+function run {
+    echo "benchmark $@"
+    $BENCHMARK "$@" > /dev/null || exit -1
+}
+
+export PYTHONPATH=$REPO_DIR
+generate_protos
+for MODE in sync aio; do
+    for SERVICE in objectDetection faceMaskDetection; do
+        run --service $SERVICE --server_mode $MODE --concurrency 1
+        run --service $SERVICE --server_mode $MODE --concurrency 16 --stub_latency_ms 10
+        run --service $SERVICE --server_mode $MODE --load open --rate 50 --arrival poisson --stub_latency_ms 10
+        run --service $SERVICE --server_mode $MODE --rpc getPredictionsBatch --batch_size 8 --concurrency 2 \
+            --image_sizes 1920x1080,640x480
+    done
+    run --service rawTensor --server_mode $MODE --concurrency 1
+    run --service rawTensor --server_mode $MODE --concurrency 16 --stub_latency_ms 10
+    run --service rawTensor --server_mode $MODE --load open --rate 200 --arrival poisson --stub_latency_ms 10
+    run --service rawTensor --server_mode $MODE --concurrency 4 --tensor_shapes 1x3x640x640 --tensor_dtype f16
+done
+echo "Results appended to $RESULTS_FILE"
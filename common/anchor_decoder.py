@@ -0,0 +1,70 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import threading
+import numpy as np
+
+
+class AnchorDecoder:
+    '''
+    Box decoder for SSD style models with a fixed set of anchors.
+    Anchor centers and sizes are computed once, decoding runs in float32 into
+    buffers owned by the calling thread. The array returned by decode is reused
+    by the next decode on the same thread.
+    '''
+    def __init__(self, anchors, variances=(0.1, 0.1, 0.2, 0.2)):
+        '''
+        :param anchors: numpy array [num_anchors, 4] as [xmin, ymin, xmax, ymax]
+        :param variances: list of 4 floats applied to the raw outputs
+        '''
+        anchors = np.asarray(anchors, dtype=np.float32).reshape(-1, 4)
+        self.num_anchors = anchors.shape[0]
+        self.centers = (anchors[:, :2] + anchors[:, 2:]) / 2
+        self.sizes = anchors[:, 2:] - anchors[:, :2]
+        self.center_variances = np.asarray(variances[:2], dtype=np.float32)
+        self.size_variances = np.asarray(variances[2:], dtype=np.float32)
+        self.buffers = threading.local()
+
+    def _getBuffers(self):
+        if not hasattr(self.buffers, 'bbox'):
+            self.buffers.bbox = np.empty((self.num_anchors, 4), dtype=np.float32)
+            self.buffers.center = np.empty((self.num_anchors, 2), dtype=np.float32)
+            self.buffers.half_size = np.empty((self.num_anchors, 2), dtype=np.float32)
+        return self.buffers.bbox, self.buffers.center, self.buffers.half_size
+
+    def decode(self, raw_outputs):
+        '''
+        :param raw_outputs: numpy array with num_anchors * 4 values of a single image
+        :return: numpy array [num_anchors, 4] as [xmin, ymin, xmax, ymax], a buffer of the
+                 calling thread that the next decode on this thread overwrites, copy it to keep it
+        '''
+        raw_outputs = raw_outputs.reshape(self.num_anchors, 4)
+        bbox, center, half_size = self._getBuffers()
+
+        np.multiply(raw_outputs[:, :2], self.center_variances, out=center)
+        center *= self.sizes
+        center += self.centers
+
+        np.multiply(raw_outputs[:, 2:], self.size_variances, out=half_size)
+        np.exp(half_size, out=half_size)
+        half_size *= self.sizes
+        half_size *= 0.5
+
+        np.subtract(center, half_size, out=bbox[:, :2])
+        np.add(center, half_size, out=bbox[:, 2:])
+        return bbox
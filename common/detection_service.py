@@ -0,0 +1,270 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import asyncio
+import logging as log
+import os
+import sys
+from concurrent import futures
+import grpc
+import numpy as np
+import adaptors.create_interface as create_interface
+from adaptors.batching import splitOutputs
+from adaptors.ovtoolkit.preprocess import PreprocessSpec
+import common.workers as workers
+import common.metrics as metrics
+import common.tracing as tracing
+from common.frame_pipeline import FramePipeline, FrameDropped
+from common.result_cache import ResultCache, contentDigest
+from common.image_preprocess import ImagePreprocessor
+
+#threads decoding and post-processing the images of a getPredictionsBatch call
+BATCH_WORKERS = 4
+#getPredictionsBatch requests carry several encoded images
+SERVER_OPTIONS = [
+    ('grpc.so_reuseport', 1),
+    ('grpc.max_send_message_length', 1024*1024*1024),
+    ('grpc.max_receive_message_length', 1024*1024*1024),
+]
+
+
+class BaseDetection:
+    '''
+    Detection servicer shared by the image services, which answer getPredictions,
+    getPredictionsBatch and streamPredictions with the same rpc messages.
+    A service derives from this class and its generated DetectionServicer, sets
+    the class attributes below and implements postprocess.
+    '''
+    #name of the service in metrics and traces
+    service_name = None
+    #generated modules of the service proto
+    pb2 = None
+    pb2_grpc = None
+    input_node = None
+    #ImagePreprocessor options of the model input
+    image_options = {}
+    #PreprocessSpec options when preprocessing is compiled into the model
+    model_preprocess_options = {}
+
+    def __init__(self, interface, unix_socket, remote_port, img_height, img_width, model_preprocess=False,
+                 input_layout='NCHW', reuse_buffers=False, max_batch_size=1,
+                 stream_queue_size=2, stream_drop_policy='none', result_cache=None):
+        super().__init__()
+        self.remote_port = remote_port
+        self.interface = interface
+        #label of the stage metrics
+        self.model_name = interface.model_name
+        self.unix_socket = unix_socket
+        self.img_height = img_height
+        self.img_width = img_width
+        #resize, color conversion and scaling are part of the compiled model
+        self.model_preprocess = model_preprocess
+        self.preprocessor = ImagePreprocessor(img_width, img_height, input_layout, reuse_output=reuse_buffers,
+                                              **self.image_options)
+        #images inferred together by getPredictionsBatch, 1 unless the model has a dynamic batch
+        self.max_batch_size = max_batch_size
+        self.batch_executor = futures.ThreadPoolExecutor(max_workers=BATCH_WORKERS)
+        #streamPredictions stages, each frame gets its own input array as the previous one may still be inferred
+        self.frame_pipeline = FramePipeline([
+            lambda frame, _: self.preprocess(frame.request, np.empty(self.preprocessor.shape, dtype=np.float32)),
+            lambda frame, input: self.interface.run_detection(input),
+            lambda frame, result: self.postprocess(frame.request, result)],
+            stream_queue_size, stream_drop_policy)
+        #optional ResultCache for getPredictions
+        self.result_cache = result_cache
+
+    def waitModel(self):
+        if not self.interface.isModelLoaded(2000):#Wait upto 2 seconds for model load
+            log.error("Model Load Failure")
+            sys.exit(1)
+
+    def preprocess(self, request, out=None):
+        self.waitModel()
+        return self.convertImage(request, out)
+
+    def convertImage(self, request, out=None):
+        with metrics.timeStage(self.model_name, 'decode'):
+            img = self.preprocessor.decode(request.data)
+        if self.model_preprocess:
+            #the model takes the decoded uint8 image as it is
+            return {self.input_node: (img, [1] + list(img.shape))}
+        #creating dictionary as required by adapters
+        with metrics.timeStage(self.model_name, 'preprocess'):
+            return {self.input_node: self.preprocessor.convert(img, out)}
+
+    def postprocess(self, request, result):
+        '''
+        :param result: dict of output name -> model output of one image
+        :return: PredictionsList of the image
+        '''
+        log.error("Subclass Implementation for api:postprocess(request, result) Missing")
+        sys.exit(1)
+
+    def modelVersion(self):
+        #content digests of the ovtk model, the ovms model is fixed by name and the cache ttl
+        footprint = self.interface.modelFootprint()
+        return footprint[0] if footprint is not None else None
+
+    def cacheKey(self, request):
+        #services add the request fields their predictions depend on
+        return (self.modelVersion(), contentDigest(request.data))
+
+    def getPredictions(self, request, context):
+        with metrics.trackRequest('getPredictions', context):
+            if self.result_cache is None:
+                return self.predict(request)
+            return self.result_cache.get(self.cacheKey(request), lambda: self.predict(request))
+
+    def predict(self, request):
+        return self.postprocess(request, self.interface.run_detection(self.preprocess(request)))
+
+    def predictBatch(self, requests):
+        self.waitModel()
+        #executor threads record their stages into the rpc's trace
+        bind = tracing.bindContext
+        if self.model_preprocess:
+            #images keep their own size, each one is inferred on its own
+            inputs = list(self.batch_executor.map(bind(self.convertImage), requests))
+        else:
+            #images are decoded in parallel straight into one batch array
+            shape = self.preprocessor.shape
+            batch = np.empty([len(requests)] + shape[1:], dtype=np.float32)
+            list(self.batch_executor.map(bind(lambda i: self.convertImage(requests[i], batch[i:i + 1])),
+                                         range(len(requests))))
+            inputs = [{self.input_node: (part, [len(part)] + shape[1:])}
+                      for part in np.split(batch, range(self.max_batch_size, len(requests), self.max_batch_size))]
+        results = []
+        for input, result in zip(inputs, self.batch_executor.map(bind(self.interface.run_detection), inputs)):
+            results.extend(splitOutputs(result, [1] * next(iter(input.values()))[1][0]))
+        return list(self.batch_executor.map(bind(self.postprocess), requests, results))
+
+    def getPredictionsBatch(self, request, context):
+        with metrics.trackRequest('getPredictionsBatch', context):
+            results = self.predictBatch(request.requests) if request.requests else []
+            return self.pb2.PredictionsBatch(results=results)
+
+    def streamPredictions(self, request_iterator, context):
+        with metrics.trackRequest('streamPredictions'):
+            yield from self.streamFrames(request_iterator)
+
+    def streamFrames(self, request_iterator):
+        for frame, predictions, error in self.frame_pipeline.run(request_iterator):
+            if error is None:
+                yield self.pb2.StreamPredictions(frame_id=frame.frame_id, predictions=predictions)
+            elif isinstance(error, FrameDropped):
+                yield self.pb2.StreamPredictions(frame_id=frame.frame_id, dropped=True)
+            else:
+                log.warning("Frame {} failed: {}".format(frame.frame_id, error))
+                metrics.stream_failed_frames.inc()
+                yield self.pb2.StreamPredictions(frame_id=frame.frame_id, error=str(error))
+
+
+class AsyncDetectionMixin:
+    '''
+    grpc.aio variant of a BaseDetection servicer, listed ahead of it in the bases:
+    image decode and post-processing run on the loop's executor while inference
+    is awaited on the adaptor.
+    '''
+    async def getPredictions(self, request, context):
+        with metrics.trackRequest('getPredictions', context):
+            if self.result_cache is None:
+                return await self.asyncPredict(request)
+            return await self.result_cache.asyncGet(self.cacheKey(request), lambda: self.asyncPredict(request))
+
+    async def asyncPredict(self, request):
+        #to_thread runs on the loop's executor and keeps the rpc's trace context
+        input = await asyncio.to_thread(self.preprocess, request)
+        result = await self.interface.async_run_detection(input)
+        return await asyncio.to_thread(self.postprocess, request, result)
+
+    async def getPredictionsBatch(self, request, context):
+        #the whole batch is handled on the loop's executor, stages run on the batch executor
+        with metrics.trackRequest('getPredictionsBatch', context):
+            results = await asyncio.to_thread(self.predictBatch, request.requests) if request.requests else []
+            return self.pb2.PredictionsBatch(results=results)
+
+
+def addPort(server, detection):
+    if(detection.unix_socket != ""):
+        server.add_insecure_port("unix:" + detection.unix_socket)
+        os.chmod(detection.unix_socket, 0o666)
+    else:
+        server.add_insecure_port('[::]:{}'.format(detection.remote_port))
+
+def serve(detection):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=workers.SERVER_WORKERS), options=SERVER_OPTIONS)
+    detection.pb2_grpc.add_DetectionServicer_to_server(detection, server)
+    addPort(server, detection)
+    server.start()
+    workers.stopOnSignal(server)
+    workers.notifyReady()
+    server.wait_for_termination()
+    detection.interface.close()
+
+async def serveAsync(detection):
+    #to_thread runs on the loop's executor, it bounds the concurrent inferences like the sync server
+    asyncio.get_running_loop().set_default_executor(futures.ThreadPoolExecutor(max_workers=workers.SERVER_WORKERS))
+    server = grpc.aio.server(migration_thread_pool=futures.ThreadPoolExecutor(max_workers=workers.SERVER_WORKERS),
+                             options=SERVER_OPTIONS)
+    detection.pb2_grpc.add_DetectionServicer_to_server(detection, server)
+    addPort(server, detection)
+    await server.start()
+    workers.stopOnSignalAsync(server, asyncio.get_running_loop())
+    workers.notifyReady()
+    await server.wait_for_termination()
+    await detection.interface.async_close()
+
+def startService(args, worker_id, detection_class, async_detection_class):
+    '''
+    Create the adaptor of an image service and serve it until terminated.
+    :param detection_class: BaseDetection servicer of the service
+    :param async_detection_class: its grpc.aio variant
+    '''
+    service_name = detection_class.service_name
+    model_preprocess = (args['model_preprocess'] == 'true')
+    #the input buffer may be reused when inference runs on the thread that preprocessed it
+    reuse_buffers = (args['server_mode'] == 'sync' and args['max_batch_size'] == 1)
+    preprocess = None
+    if model_preprocess:
+        preprocess = PreprocessSpec(detection_class.input_node, **detection_class.model_preprocess_options)
+    interface = create_interface.createInterfaceObj(args['interface'], args['device'], args['serving_address'],
+                                                    args['serving_port'], args['serving_model_name'],
+                                                    args['serving_mounted_modelDir'],
+                                                    args['serving_channels'], args['performance_hint'],
+                                                    args['max_batch_size'], args['max_batch_delay_ms'],
+                                                    preprocess, named_outputs=True,
+                                                    server_concurrency=workers.SERVER_WORKERS)
+    unix_socket = workers.workerSocket(args['unix_socket'], worker_id)
+    result_cache = None
+    if(args['result_cache_size'] > 0):
+        result_cache = ResultCache(args['result_cache_size'], args['result_cache_ttl_s'])
+        metrics.registry.addCollector('result_cache', result_cache.stats)
+    metrics.registry.setService(service_name)
+    tracing.configure(service_name, workers.workerPath(args['trace_file'], worker_id))
+    metrics.startServer(args['metrics_port'], worker_id)
+    workers.loadModel(interface)
+    if(args['server_mode'] == 'aio'):
+        asyncio.run(serveAsync(async_detection_class(interface, unix_socket, args['remote_port'],
+                                                     args['height'], args['width'], model_preprocess,
+                                                     args['input_layout'], False, args['max_batch_size'],
+                                                     args['stream_queue_size'], args['stream_drop_policy'],
+                                                     result_cache)))
+    else:
+        serve(detection_class(interface, unix_socket, args['remote_port'], args['height'], args['width'],
+                              model_preprocess, args['input_layout'], reuse_buffers, args['max_batch_size'],
+                              args['stream_queue_size'], args['stream_drop_policy'], result_cache))
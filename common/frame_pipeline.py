@@ -0,0 +1,156 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import datetime
+import logging as log
+import queue
+import threading
+import common.metrics as metrics
+
+DROP_POLICIES = ["none", "oldest", "newest"]
+#how often a blocked stage checks whether the consumer is gone
+BLOCK_CHECK_S = 0.1
+
+_END = object()
+
+
+class FrameDropped(Exception):
+    pass
+
+
+class FramePipeline:
+    '''
+    Runs the stages of a frame stream, e.g. decode, inference and post-processing,
+    each on its own thread with a bounded queue in front of it, so the next frame
+    is decoded while the previous one is inferred. Processed frames leave the
+    pipeline in arrival order.
+    When the pipeline falls behind and the first queue is full, an incoming frame
+    waits for room ('none'), replaces the oldest waiting frame ('oldest') or is
+    dropped itself ('newest'). Drop notices are returned as soon as they happen,
+    ahead of frames still in the pipeline.
+    '''
+    def __init__(self, stages, queue_size=2, drop_policy='none'):
+        '''
+        :param stages: list of functions(frame, value) returning the value for the next stage,
+                       the first stage is called with value None
+        :param queue_size: frames waiting in front of each stage
+        :param drop_policy: 'none', 'oldest' or 'newest'
+        '''
+        assert drop_policy in DROP_POLICIES, "Invalid drop_policy: " + drop_policy
+        self.stages = stages
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+
+    def run(self, frames):
+        '''
+        :param frames: iterator of frames, read on a separate thread
+        :return: generator of (frame, result, error) tuples, error is None on success,
+                 FrameDropped for dropped frames or the exception raised by a stage
+        '''
+        queues = [queue.Queue(self.queue_size) for _ in self.stages]
+        output = queue.Queue(self.queue_size)
+        stopped = threading.Event()
+        counts = {'frames': 0, 'dropped': 0}
+
+        #both give up once the consumer is gone, so no stage thread outlives the stream
+        def put(target, item):
+            while not stopped.is_set():
+                try:
+                    target.put(item, timeout=BLOCK_CHECK_S)
+                    return
+                except queue.Full:
+                    pass
+
+        def get(source):
+            while not stopped.is_set():
+                try:
+                    return source.get(timeout=BLOCK_CHECK_S)
+                except queue.Empty:
+                    pass
+            return _END
+
+        def submit(frame):
+            if self.drop_policy == 'none':
+                put(queues[0], (frame, None, None))
+                return
+            while True:
+                try:
+                    queues[0].put_nowait((frame, None, None))
+                    return
+                except queue.Full:
+                    pass
+                if self.drop_policy == 'newest':
+                    dropped = frame
+                else:
+                    try:
+                        dropped = queues[0].get_nowait()[0]
+                    except queue.Empty:
+                        #the first stage took a frame meanwhile
+                        continue
+                counts['dropped'] += 1
+                metrics.stream_dropped_frames.inc()
+                put(output, (dropped, None, FrameDropped()))
+                if dropped is frame:
+                    return
+
+        def read():
+            try:
+                for frame in frames:
+                    if stopped.is_set():
+                        break
+                    counts['frames'] += 1
+                    metrics.stream_frames.inc()
+                    submit(frame)
+            except Exception as inst:
+                log.warning("Frame stream closed: {}".format(inst))
+            finally:
+                put(queues[0], _END)
+
+        def stage_loop(index):
+            stage = self.stages[index]
+            target = queues[index + 1] if index + 1 < len(queues) else output
+            while True:
+                item = get(queues[index])
+                if item is _END:
+                    put(target, _END)
+                    return
+                frame, value, error = item
+                if error is None:
+                    try:
+                        value = stage(frame, value)
+                    except Exception as inst:
+                        value, error = None, inst
+                put(target, (frame, value, error))
+
+        start_time = datetime.datetime.now()
+        threading.Thread(target=read, name="FrameReader", daemon=True).start()
+        for index in range(len(self.stages)):
+            threading.Thread(target=stage_loop, args=(index,), name="FrameStage-{}".format(index),
+                             daemon=True).start()
+        try:
+            while True:
+                item = output.get()
+                if item is _END:
+                    break
+                yield item
+        finally:
+            stopped.set()
+            duration = (datetime.datetime.now() - start_time).total_seconds()
+            log.info("Frame stream: {} frames, {} dropped, {:.1f} fps".format(
+                counts['frames'], counts['dropped'],
+                (counts['frames'] - counts['dropped']) / duration if duration > 0 else 0.0))
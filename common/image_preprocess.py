@@ -0,0 +1,147 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import struct
+import threading
+import cv2
+import numpy as np
+
+REDUCED_DECODE_FLAGS = [(8, cv2.IMREAD_REDUCED_COLOR_8),
+                        (4, cv2.IMREAD_REDUCED_COLOR_4),
+                        (2, cv2.IMREAD_REDUCED_COLOR_2)]
+#start of frame markers carrying the image size, DHT/JPG/DAC share the range
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+def jpegSize(data):
+    '''
+    Read the image size from the JPEG frame header without decoding.
+    :param data: encoded image bytes
+    :return: tuple of (width, height), None if data is not a JPEG
+    '''
+    if data[:2] != b'\xff\xd8':
+        return None
+    pos = 2
+    while pos + 9 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            #fill byte
+            pos += 1
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[pos + 5:pos + 9])
+            return width, height
+        pos += 2 + struct.unpack(">H", data[pos + 2:pos + 4])[0]
+    return None
+
+
+class ImagePreprocessor:
+    '''
+    Decodes an encoded image and converts it to a float32 model input.
+    JPEGs much larger than the target are decoded at 1/2, 1/4 or 1/8 resolution,
+    the resized image lives in a per thread buffer and the float conversion,
+    channel order and layout change are done in a single pass.
+    The pixel transform is x * 1/scale - mean/scale, or with minmax_range a per
+    image min/max normalization like cv2.NORM_MINMAX.
+    '''
+    def __init__(self, width, height, layout='NCHW', to_rgb=False, mean=0.0, scale=1.0,
+                 minmax_range=None, reuse_output=False):
+        '''
+        :param layout: 'NCHW' or 'NHWC'
+        :param minmax_range: (low, high) for per image min/max normalization, overrides mean and scale
+        :param reuse_output: return a per thread output buffer that is overwritten by the next
+                             call on the same thread, only when inference runs on the calling thread
+        '''
+        assert layout in ['NCHW', 'NHWC'], "Invalid layout: " + layout
+        self.width = width
+        self.height = height
+        self.layout = layout
+        self.to_rgb = to_rgb
+        self.mean = mean
+        self.scale = scale
+        self.minmax_range = minmax_range
+        self.reuse_output = reuse_output
+        if layout == 'NCHW':
+            self.shape = [1, 3, height, width]
+        else:
+            self.shape = [1, height, width, 3]
+        self.buffers = threading.local()
+
+    def decode(self, data):
+        '''
+        :param data: encoded image bytes
+        :return: uint8 BGR image in HWC, at least as large as the target when downscaled
+        '''
+        flags = cv2.IMREAD_COLOR
+        size = jpegSize(data)
+        if size is not None:
+            for factor, reduced_flags in REDUCED_DECODE_FLAGS:
+                if size[0] // factor >= self.width and size[1] // factor >= self.height:
+                    flags = reduced_flags
+                    break
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+        if img is None:
+            raise ValueError("Unable to decode image of {} bytes".format(len(data)))
+        return img
+
+    def _buffer(self, name, shape, dtype):
+        buf = getattr(self.buffers, name, None)
+        if buf is None:
+            buf = np.empty(shape, dtype=dtype)
+            setattr(self.buffers, name, buf)
+        return buf
+
+    def resize(self, img):
+        if img.shape[1] == self.width and img.shape[0] == self.height:
+            return img
+        resized = self._buffer('resized', (self.height, self.width, 3), np.uint8)
+        return cv2.resize(img, (self.width, self.height), dst=resized)
+
+    def __call__(self, data, out=None):
+        '''
+        :param data: encoded image bytes
+        :param out: optional float32 array of the output shape to write into, e.g. a slice of a batch
+        :return: tuple of (float32 array, shape) as expected by the adaptors
+        '''
+        return self.convert(self.decode(data), out)
+
+    def convert(self, img, out=None):
+        '''
+        :param img: decoded image as returned by decode
+        '''
+        img = self.resize(img)
+        if self.minmax_range is not None:
+            low, high = int(img.min()), int(img.max())
+            alpha = (self.minmax_range[1] - self.minmax_range[0]) / (high - low) if high > low else 0.0
+            beta = self.minmax_range[0] - low * alpha
+        else:
+            alpha = 1.0 / self.scale
+            beta = -self.mean / self.scale
+
+        src = img[:, :, ::-1] if self.to_rgb else img
+        if self.layout == 'NCHW':
+            src = src.transpose(2, 0, 1)
+        if out is None and self.reuse_output:
+            out = self._buffer('output', self.shape, np.float32)
+        elif out is None:
+            out = np.empty(self.shape, dtype=np.float32)
+        np.multiply(src, np.float32(alpha), out=out[0], dtype=np.float32)
+        if beta != 0.0:
+            np.add(out, np.float32(beta), out=out)
+        return out, self.shape
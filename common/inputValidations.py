@@ -27,13 +27,63 @@ def validate(args):
         ipaddress.ip_address(args['serving_address'])
     assert (1 <= int(args['serving_port']) <= 65535 ), "Invalid serving_port provided: " \
         + args['serving_port']
-    assert args['interface'] in ["ovms", "ovtk"], "Invalid interface provided: " \
+    assert (1 <= int(args['serving_channels']) <= 64), "Invalid serving_channels provided: " \
+        + str(args['serving_channels'])
+    assert args['interface'] in ["ovms", "kserve", "ovtk"], "Invalid interface provided: " \
         + args['interface']
     #serving_model_name not validated
     assert args['device'] in ["CPU", "AUTO", "GPU", "GPU.0", "GPU.1"], "Invalid device provided: " \
         + args['device']
+    assert args['performance_hint'] in ["LATENCY", "THROUGHPUT"], \
+        "Invalid performance_hint provided: " + args['performance_hint']
+    assert args['server_mode'] in ["sync", "aio"], "Invalid server_mode provided: " \
+        + args['server_mode']
     assert (1 <= int(args['remote_port']) <= 65535 ), "Invalid remote_port provided: " \
         + args['remote_port']
+    if('max_batch_size' in args):
+        assert (1 <= int(args['max_batch_size']) <= 256), "Invalid max_batch_size provided: " \
+            + str(args['max_batch_size'])
+        assert (0 <= int(args['max_batch_delay_ms']) <= 1000), "Invalid max_batch_delay_ms provided: " \
+            + str(args['max_batch_delay_ms'])
+    if('input_layout' in args):
+        assert args['input_layout'] in ["NCHW", "NHWC"], "Invalid input_layout provided: " \
+            + args['input_layout']
+    if('model_preprocess' in args):
+        assert args['model_preprocess'] in ["true", "false"], "Invalid model_preprocess provided: " \
+            + args['model_preprocess']
+        assert args['model_preprocess'] == "false" or args['interface'] == "ovtk", \
+            "model_preprocess requires the ovtk interface"
+    if('stream_drop_policy' in args):
+        assert args['stream_drop_policy'] in ["none", "oldest", "newest"], \
+            "Invalid stream_drop_policy provided: " + args['stream_drop_policy']
+        assert (1 <= int(args['stream_queue_size']) <= 64), "Invalid stream_queue_size provided: " \
+            + str(args['stream_queue_size'])
+    if('result_cache_size' in args):
+        assert (0 <= int(args['result_cache_size'])), "Invalid result_cache_size provided: " \
+            + str(args['result_cache_size'])
+        assert (0 <= int(args['result_cache_ttl_s'])), "Invalid result_cache_ttl_s provided: " \
+            + str(args['result_cache_ttl_s'])
+    if('metrics_port' in args):
+        assert (0 <= int(args['metrics_port']) <= 65535), "Invalid metrics_port provided: " \
+            + str(args['metrics_port'])
+    if(args.get('trace_file', "") != ""):
+        assert os.path.exists(os.path.dirname(os.path.abspath(args['trace_file']))), \
+            "Invalid path provided to trace_file: " + args['trace_file']
+    if('workers' in args):
+        assert (1 <= int(args['workers']) <= 64), "Invalid workers provided: " \
+            + str(args['workers'])
+    if(args.get('model_store_dir', "") != ""):
+        assert os.path.exists(os.path.dirname(os.path.abspath(args['model_store_dir']))), \
+            "Invalid path provided to model_store_dir: " + args['model_store_dir']
+        assert (1 <= int(args['model_store_size_mb'])), "Invalid model_store_size_mb provided: " \
+            + str(args['model_store_size_mb'])
+    if('max_loaded_models' in args):
+        assert (0 <= int(args['max_loaded_models'])), "Invalid max_loaded_models provided: " \
+            + str(args['max_loaded_models'])
+        assert (0 <= int(args['max_loaded_memory_mb'])), "Invalid max_loaded_memory_mb provided: " \
+            + str(args['max_loaded_memory_mb'])
+        assert (0 <= int(args['model_idle_timeout_s'])), "Invalid model_idle_timeout_s provided: " \
+            + str(args['model_idle_timeout_s'])
     if(args['unix_socket'] != ""):
         assert os.path.exists(os.path.dirname(os.path.abspath(args['unix_socket']))), \
             "Invalid path provided to unix_socket: " + args['unix_socket']
@@ -0,0 +1,257 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import bisect
+import logging as log
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import common.tracing as tracing
+
+PREFIX = "ai_dispatcher_"
+#seconds, from sub millisecond preprocessing steps up to model loads
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names, values, const_labels=(), extra=()):
+    pairs = list(const_labels) + list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(name, _escape(value)) for name, value in pairs) + "}"
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        #label values -> value
+        self.values = {}
+
+    def header(self):
+        return ["# HELP {} {}".format(self.name, self.help), "# TYPE {} {}".format(self.name, self.kind)]
+
+    def reset(self):
+        #drop all samples, e.g. those of a benchmark warmup
+        with self.lock:
+            self.values = {}
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self, const_labels):
+        with self.lock:
+            values = list(self.values.items())
+        return self.header() + ["{}{} {}".format(self.name, _labels(self.labelnames, labels, const_labels), value)
+                                for labels, value in values]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, *labels):
+        self.inc(*labels, amount=-1)
+
+    def set(self, value, *labels):
+        with self.lock:
+            self.values[labels] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        #bucket counts are kept per bucket and summed up when rendered
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def means(self):
+        '''
+        :return: dict of label values -> mean observed value
+        '''
+        with self.lock:
+            return {labels: total / sum(counts) for labels, (counts, total) in self.values.items()}
+
+    def render(self, const_labels):
+        with self.lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self.values.items()]
+        lines = self.header()
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append("{}_bucket{} {}".format(
+                    self.name, _labels(self.labelnames, labels, const_labels, (('le', bound),)), cumulative))
+            lines.append("{}_sum{} {}".format(self.name, _labels(self.labelnames, labels, const_labels), total))
+            lines.append("{}_count{} {}".format(self.name, _labels(self.labelnames, labels, const_labels),
+                                                cumulative))
+        return lines
+
+
+class MetricsRegistry:
+    '''
+    Process wide metrics rendered in the Prometheus text format.
+    Besides the registered metrics, collectors report the stats() dicts of
+    components like the result cache as gauges.
+    '''
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+        self.const_labels = ()
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def setService(self, service):
+        #added to every sample of this process
+        self.const_labels = (('service', service),)
+
+    def addCollector(self, name, stats):
+        '''
+        :param stats: function returning a dict of numeric values, each reported as gauge name_key
+        '''
+        self.collectors.append((name, stats))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render(self.const_labels))
+        for name, stats in self.collectors:
+            for key, value in sorted(stats().items()):
+                metric_name = "{}{}_{}".format(PREFIX, name, key)
+                lines.append("# TYPE {} gauge".format(metric_name))
+                lines.append("{}{} {}".format(metric_name, _labels((), (), self.const_labels), value))
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+requests = registry.counter('requests_total', 'Finished rpcs by outcome', ['rpc', 'status'])
+request_seconds = registry.histogram('request_seconds', 'Rpc latency in seconds', ['rpc'])
+inflight = registry.gauge('inflight_requests', 'Rpcs being served', ['rpc'])
+stage_seconds = registry.histogram('stage_seconds', 'Latency of request processing stages in seconds',
+                                   ['model', 'stage'])
+model_load_seconds = registry.histogram('model_load_seconds', 'Time until a model was loaded in seconds',
+                                        ['model'])
+stream_frames = registry.counter('stream_frames_total', 'Frames received on frame streams')
+stream_dropped_frames = registry.counter('stream_dropped_frames_total',
+                                         'Frames dropped because a frame stream fell behind')
+stream_failed_frames = registry.counter('stream_failed_frames_total', 'Frames of frame streams that failed')
+
+def observeStage(model, stage, start_time, trace=None):
+    '''
+    Record the stage in the histogram and in the trace of the current rpc, if any.
+    :param start_time: time.perf_counter() value taken when the stage started
+    :param trace: RequestTrace to record into when running outside the rpc's context
+    '''
+    end_time = time.perf_counter()
+    stage_seconds.observe(end_time - start_time, str(model), stage)
+    trace = trace or tracing.current()
+    if trace is not None:
+        trace.record(stage, str(model), start_time, end_time)
+
+@contextmanager
+def timeStage(model, stage):
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        observeStage(model, stage, start_time)
+
+@contextmanager
+def trackRequest(rpc, context=None):
+    '''
+    :param context: grpc servicer context, enables the stage timing trailer and trace spans
+    '''
+    start_time = time.perf_counter()
+    inflight.inc(rpc)
+    started = tracing.begin(rpc, context) if context is not None else None
+    status = 'error'
+    try:
+        yield
+        status = 'ok'
+    finally:
+        inflight.dec(rpc)
+        requests.inc(rpc, status)
+        request_seconds.observe(time.perf_counter() - start_time, rpc)
+        if started is not None:
+            tracing.end(started, context, status)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        #scrapes are not worth a log line each
+        pass
+
+
+def startServer(port, worker_id=None):
+    '''
+    Serve /metrics over http on a background thread, workers use port + worker_id.
+    :param port: 0 disables the endpoint
+    '''
+    if port == 0:
+        return None
+    if worker_id is not None:
+        port += worker_id
+    server = ThreadingHTTPServer(('', port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="Metrics", daemon=True).start()
+    log.info("Serving metrics on port {}".format(port))
+    return server
@@ -0,0 +1,138 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import numpy as np
+
+#Candidates are suppressed in blocks of this size, below it the full IoU matrix
+#is computed up front
+MATRIX_IOU_LIMIT = 256
+EPS = 1e-9
+
+def box_area(boxes, side_padding=0.0):
+    return (boxes[:, 2] - boxes[:, 0] + side_padding) * (boxes[:, 3] - boxes[:, 1] + side_padding)
+
+def cross_iou(boxes_a, areas_a, boxes_b, areas_b):
+    '''
+    :param boxes_a: numpy array [num_a, 4] as [xmin, ymin, xmax, ymax]
+    :param areas_a: numpy array [num_a]
+    :param boxes_b: numpy array [num_b, 4]
+    :param areas_b: numpy array [num_b]
+    :return: numpy array [num_a, num_b]
+    '''
+    w = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    w -= np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    np.maximum(w, 0, out=w)
+    h = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    h -= np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    np.maximum(h, 0, out=h)
+    inter = np.multiply(w, h, out=w)
+    union = np.add(areas_a[:, None], areas_b[None, :], out=h)
+    union -= inter
+    np.maximum(union, EPS, out=union)
+    return np.divide(inter, union, out=inter)
+
+def _greedy(boxes, iou_thresh, top_k, side_padding=0.0, block=MATRIX_IOU_LIMIT):
+    '''
+    Exact greedy nms over boxes sorted by confidence. Boxes are processed in
+    blocks: greedy selection inside a block uses its IoU matrix, then the boxes
+    kept in the block suppress all later boxes in one vectorized step.
+    '''
+    areas = box_area(boxes, side_padding)
+    alive = np.ones(len(boxes), dtype=bool)
+    keep = []
+    for start in range(0, len(boxes), block):
+        stop = min(start + block, len(boxes))
+        idxs = start + np.nonzero(alive[start:stop])[0]
+        if idxs.size == 0:
+            continue
+        iou = cross_iou(boxes[idxs], areas[idxs], boxes[idxs], areas[idxs]) > iou_thresh
+        suppressed = np.zeros(len(idxs), dtype=bool)
+        block_keep = []
+        for j in range(len(idxs)):
+            if suppressed[j]:
+                continue
+            block_keep.append(idxs[j])
+            if len(keep) + len(block_keep) == top_k:
+                return np.array(keep + block_keep, dtype=np.int64)
+            suppressed |= iou[j]
+        keep.extend(block_keep)
+        rest = stop + np.nonzero(alive[stop:])[0]
+        if rest.size > 0:
+            overlap = cross_iou(boxes[block_keep], areas[block_keep], boxes[rest], areas[rest])
+            alive[rest[(overlap > iou_thresh).any(axis=0)]] = False
+    return np.array(keep, dtype=np.int64)
+
+def nms(bboxes, confidences, iou_thresh=0.5, conf_thresh=None, keep_top_k=-1, side_padding=0.0):
+    '''
+    Greedy non max suppression on a single class.
+    :param bboxes: numpy array [num_bboxes, 4] as [xmin, ymin, xmax, ymax]
+    :param confidences: numpy array [num_bboxes]
+    :param iou_thresh: boxes overlapping a kept box by more than this are removed
+    :param conf_thresh: boxes with confidence not above this are ignored, None keeps all
+    :param keep_top_k: stop once this many boxes are kept, -1 keeps all
+    :param side_padding: added to box width and height for the areas of the IoU union
+    :return: numpy array of kept indices into bboxes, highest confidence first
+    '''
+    if len(bboxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+    candidates = np.arange(len(bboxes))
+    if conf_thresh is not None:
+        candidates = np.nonzero(confidences > conf_thresh)[0]
+    order = candidates[np.argsort(-confidences[candidates], kind='stable')]
+    boxes = np.asarray(bboxes[order], dtype=np.result_type(bboxes.dtype, np.float32))
+    keep = _greedy(boxes, iou_thresh, keep_top_k, side_padding)
+    return order[keep]
+
+def multiclass_nms(bboxes, confidences, class_ids, iou_thresh=0.5, conf_thresh=None, keep_top_k=-1):
+    '''
+    Class aware non max suppression in a single pass. Boxes of each class are
+    shifted by a class dependent offset so boxes of different classes never overlap.
+    :param class_ids: numpy array of int [num_bboxes]
+    :return: numpy array of kept indices into bboxes, highest confidence first
+    '''
+    if len(bboxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+    bboxes = np.asarray(bboxes, dtype=np.float64)
+    offset = bboxes.max() - bboxes.min() + 1
+    shifted = bboxes + (np.asarray(class_ids, dtype=np.float64) * offset)[:, None]
+    return nms(shifted, confidences, iou_thresh, conf_thresh, keep_top_k)
+
+def batched_nms(bboxes, confidences, class_ids=None, iou_thresh=0.5, conf_thresh=None, keep_top_k=-1):
+    '''
+    Non max suppression over a batch of images in a single pass.
+    :param bboxes: numpy array [batch, num_bboxes, 4]
+    :param confidences: numpy array [batch, num_bboxes]
+    :param class_ids: optional numpy array of int [batch, num_bboxes] for class aware nms
+    :param keep_top_k: per image limit, -1 keeps all
+    :return: list with one numpy array of kept indices per image, highest confidence first
+    '''
+    batch, num_bboxes = confidences.shape[:2]
+    groups = np.repeat(np.arange(batch), num_bboxes)
+    if class_ids is not None:
+        class_ids = np.asarray(class_ids).reshape(-1)
+        groups = groups * (class_ids.max() + 1) + class_ids
+    keep = multiclass_nms(bboxes.reshape(-1, 4), confidences.reshape(-1), groups,
+                          iou_thresh, conf_thresh)
+    image_ids = keep // num_bboxes
+    result = []
+    for b in range(batch):
+        image_keep = keep[image_ids == b] - b * num_bboxes
+        if keep_top_k != -1:
+            image_keep = image_keep[:keep_top_k]
+        result.append(image_keep)
+    return result
@@ -0,0 +1,125 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import asyncio
+import collections
+import hashlib
+import threading
+import time
+from concurrent import futures
+
+def contentDigest(data):
+    #identifies repeated frames, not a security boundary
+    return hashlib.sha1(data, usedforsecurity=False).digest()
+
+
+class ResultCache:
+    '''
+    LRU cache of prediction results keyed by request content, bounded by entry
+    count and age. Concurrent requests for a key that is being computed wait for
+    that computation instead of starting their own (single flight). Failed
+    computations are not cached.
+    '''
+    def __init__(self, max_entries, ttl_s=0):
+        '''
+        :param max_entries: cached results kept at once
+        :param ttl_s: results older than this are computed again, 0 to keep them until evicted
+        '''
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.lock = threading.Lock()
+        #key -> (result, time stored)
+        self.entries = collections.OrderedDict()
+        self.inflight = {}
+        self.counters = {'hits': 0, 'misses': 0, 'shared': 0, 'evictions': 0, 'expired': 0}
+
+    def _claim(self, key):
+        #returns (True, cached result, None) on a hit, otherwise (False, None, future to wait for)
+        #or (False, None, None) when the caller computes, a cached result may itself be None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if self.ttl_s <= 0 or time.monotonic() - entry[1] <= self.ttl_s:
+                    self.entries.move_to_end(key)
+                    self.counters['hits'] += 1
+                    return True, entry[0], None
+                del self.entries[key]
+                self.counters['expired'] += 1
+            future = self.inflight.get(key)
+            if future is not None:
+                self.counters['shared'] += 1
+                return False, None, future
+            self.inflight[key] = futures.Future()
+            self.counters['misses'] += 1
+            return False, None, None
+
+    def _finish(self, key, result=None, error=None):
+        with self.lock:
+            future = self.inflight.pop(key)
+            if error is None:
+                self.entries[key] = (result, time.monotonic())
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                    self.counters['evictions'] += 1
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def get(self, key, compute):
+        '''
+        :param compute: function returning the result when it is not cached
+        '''
+        hit, result, future = self._claim(key)
+        if hit:
+            return result
+        if future is not None:
+            return future.result()
+        try:
+            result = compute()
+        except BaseException as inst:
+            #waiters must not hang on an abandoned computation
+            self._finish(key, error=inst)
+            raise
+        self._finish(key, result)
+        return result
+
+    async def asyncGet(self, key, compute):
+        '''
+        :param compute: coroutine function returning the result when it is not cached
+        '''
+        hit, result, future = self._claim(key)
+        if hit:
+            return result
+        if future is not None:
+            #a cancelled waiter must not cancel the shared computation
+            return await asyncio.shield(asyncio.wrap_future(future))
+        try:
+            result = await compute()
+        except BaseException as inst:
+            self._finish(key, error=inst)
+            raise
+        self._finish(key, result)
+        return result
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self.entries)
+        return stats
@@ -0,0 +1,151 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import contextvars
+import json
+import logging as log
+import os
+import re
+import threading
+import time
+
+#request metadata asking for the timing trailer, the reply carries it under the same key
+TIMING_KEY = 'stage-timing'
+#W3C trace context of the caller, spans join its trace when present
+TRACEPARENT_KEY = 'traceparent'
+TRACEPARENT_RE = re.compile(r'^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+_current = contextvars.ContextVar('request_trace', default=None)
+_exporter = None
+_service = ""
+
+
+class SpanFileExporter:
+    '''
+    Appends finished spans as json lines to a file, one write per request.
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.out_file = open(path, 'a', buffering=1024*1024)
+
+    def export(self, spans):
+        lines = "".join(json.dumps(span, separators=(',', ':')) + "\n" for span in spans)
+        with self.lock:
+            self.out_file.write(lines)
+            self.out_file.flush()
+
+
+class RequestTrace:
+    '''
+    Stage timings of one rpc. Stages are recorded by metrics.observeStage on
+    any thread running in the rpc's context, e.g. executor threads started
+    with asyncio.to_thread.
+    '''
+    def __init__(self, rpc, timing_requested, traceparent=None):
+        self.rpc = rpc
+        self.timing_requested = timing_requested
+        self.start_time = time.perf_counter()
+        self.start_wall = time.time()
+        self.lock = threading.Lock()
+        #(stage, model, start perf_counter, end perf_counter)
+        self.stages = []
+        match = TRACEPARENT_RE.match(traceparent or "")
+        self.trace_id = match.group(1) if match else os.urandom(16).hex()
+        self.parent_id = match.group(2) if match else None
+        self.span_id = os.urandom(8).hex()
+
+    def record(self, stage, model, start_time, end_time):
+        with self.lock:
+            self.stages.append((stage, model, start_time, end_time))
+
+    def timingTrailer(self, end_time):
+        #milliseconds per stage, repeated stages are summed and may exceed total when run in parallel
+        totals = {}
+        with self.lock:
+            for stage, _, start_time, stage_end in self.stages:
+                totals[stage] = totals.get(stage, 0.0) + (stage_end - start_time)
+        totals['total'] = end_time - self.start_time
+        return ",".join("{}={:.2f}".format(stage, seconds * 1000) for stage, seconds in totals.items())
+
+    def _wallNanos(self, perf_time):
+        return int((self.start_wall + perf_time - self.start_time) * 1e9)
+
+    def spans(self, end_time, status):
+        spans = [{'trace_id': self.trace_id, 'span_id': self.span_id, 'parent_span_id': self.parent_id,
+                  'name': self.rpc, 'start_time_unix_nano': self._wallNanos(self.start_time),
+                  'end_time_unix_nano': self._wallNanos(end_time),
+                  'attributes': {'service': _service, 'status': status}}]
+        with self.lock:
+            for stage, model, start_time, stage_end in self.stages:
+                spans.append({'trace_id': self.trace_id, 'span_id': os.urandom(8).hex(),
+                              'parent_span_id': self.span_id, 'name': stage,
+                              'start_time_unix_nano': self._wallNanos(start_time),
+                              'end_time_unix_nano': self._wallNanos(stage_end),
+                              'attributes': {'service': _service, 'model': model}})
+        return spans
+
+
+def configure(service, trace_file=""):
+    '''
+    :param trace_file: append spans of every rpc to this file, "" to only trace on client request
+    '''
+    global _exporter, _service
+    _service = service
+    if trace_file != "":
+        _exporter = SpanFileExporter(trace_file)
+        log.info("Writing trace spans to {}".format(trace_file))
+
+def current():
+    return _current.get()
+
+def bindContext(function):
+    '''
+    Wrap function to run in a copy of the caller's context, for executors that do not pass it on.
+    '''
+    context = contextvars.copy_context()
+    #a context can only be entered by one thread at a time
+    return lambda *args: context.copy().run(function, *args)
+
+def begin(rpc, context):
+    '''
+    Start tracing the rpc if the client asked for timings or spans are exported.
+    :return: (trace, context variable token) or None
+    '''
+    timing_requested = False
+    traceparent = None
+    for key, value in context.invocation_metadata() or ():
+        if key == TIMING_KEY:
+            timing_requested = True
+        elif key == TRACEPARENT_KEY:
+            traceparent = value
+    if not timing_requested and _exporter is None:
+        return None
+    trace = RequestTrace(rpc, timing_requested, traceparent)
+    return trace, _current.set(trace)
+
+def end(started, context, status):
+    trace, token = started
+    _current.reset(token)
+    end_time = time.perf_counter()
+    if trace.timing_requested:
+        #keep trailers the rpc set itself
+        trailers = tuple(context.trailing_metadata() or ())
+        context.set_trailing_metadata(trailers + ((TIMING_KEY, trace.timingTrailer(end_time)),))
+    if _exporter is not None:
+        _exporter.export(trace.spans(end_time, status))
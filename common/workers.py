@@ -0,0 +1,197 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import itertools
+import logging as log
+import multiprocessing
+import os
+import signal
+import sys
+from concurrent import futures
+import grpc
+
+WORKER_MODEL_LOAD_TIMEOUT_MS = 60000
+SHUTDOWN_GRACE_S = 5
+#threads of the services' grpc servers, in aio mode of the loop's executor as well
+SERVER_WORKERS = 10
+PROXY_OPTIONS = [
+    ('grpc.max_send_message_length', 1024*1024*1024),
+    ('grpc.max_receive_message_length', 1024*1024*1024),
+]
+
+#set in worker processes only
+_model_lock = None
+_ready = None
+
+
+def workerPath(path, worker_id):
+    #per worker variant of a file path, unchanged outside of worker mode
+    if(path == "" or worker_id is None):
+        return path
+    return "{}.{}".format(path, worker_id)
+
+def workerSocket(unix_socket, worker_id):
+    #workers behind the front process listen on their own unix socket
+    return workerPath(unix_socket, worker_id)
+
+def loadModel(interface):
+    #workers load their model one at a time before accepting requests
+    if _model_lock is None:
+        return
+    with _model_lock:
+        if not interface.isModelLoaded(WORKER_MODEL_LOAD_TIMEOUT_MS):
+            log.error("Worker {} model load failure".format(os.getpid()))
+            sys.exit(1)
+
+def notifyReady():
+    if _ready is not None:
+        _ready.release()
+
+def stopOnSignal(server):
+    #SIGTERM/SIGINT finish in-flight requests before the server stops
+    def handler(signum, frame):
+        server.stop(SHUTDOWN_GRACE_S)
+    signal.signal(signal.SIGTERM, handler)
+    signal.signal(signal.SIGINT, handler)
+
+def stopOnSignalAsync(server, loop):
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, lambda: loop.create_task(server.stop(SHUTDOWN_GRACE_S)))
+
+def _workerMain(target, args, worker_id, model_lock, ready):
+    global _model_lock, _ready
+    _model_lock = model_lock
+    _ready = ready
+    target(args, worker_id)
+
+
+class ForwardingHandler(grpc.GenericRpcHandler):
+    '''
+    Forwards every method of a service as raw bytes to the worker sockets,
+    round-robin per call. Method cardinality comes from the service descriptor.
+    '''
+    def __init__(self, service_descriptor, targets):
+        self.methods = {}
+        for method in service_descriptor.methods:
+            path = "/{}/{}".format(service_descriptor.full_name, method.name)
+            self.methods[path] = (method.client_streaming, method.server_streaming)
+        self.channels = [grpc.insecure_channel(target, options=PROXY_OPTIONS) for target in targets]
+        self.counter = itertools.count()
+
+    def _channel(self):
+        return self.channels[next(self.counter) % len(self.channels)]
+
+    @staticmethod
+    def _metadata(context):
+        return [(md.key, md.value) for md in context.invocation_metadata()
+                if not md.key.startswith('grpc-') and md.key != 'user-agent']
+
+    @staticmethod
+    def _relay(responses, context):
+        try:
+            for response in responses:
+                yield response
+        except grpc.RpcError as err:
+            context.abort(err.code(), err.details())
+
+    def service(self, handler_call_details):
+        path = handler_call_details.method
+        if path not in self.methods:
+            return None
+        client_streaming, server_streaming = self.methods[path]
+
+        def unary_response(multicallable):
+            def forward(request, context):
+                try:
+                    response, call = multicallable(path).with_call(
+                        request, timeout=context.time_remaining(), metadata=self._metadata(context))
+                except grpc.RpcError as err:
+                    context.abort(err.code(), err.details())
+                context.set_trailing_metadata(call.trailing_metadata())
+                return response
+            return forward
+
+        def stream_response(multicallable):
+            def forward(request, context):
+                responses = multicallable(path)(request, timeout=context.time_remaining(),
+                                                metadata=self._metadata(context))
+                return self._relay(responses, context)
+            return forward
+
+        channel = self._channel()
+        if not client_streaming and not server_streaming:
+            return grpc.unary_unary_rpc_method_handler(unary_response(channel.unary_unary))
+        if client_streaming and not server_streaming:
+            return grpc.stream_unary_rpc_method_handler(unary_response(channel.stream_unary))
+        if not client_streaming:
+            return grpc.unary_stream_rpc_method_handler(stream_response(channel.unary_stream))
+        return grpc.stream_stream_rpc_method_handler(stream_response(channel.stream_stream))
+
+
+def runWorkers(num_workers, target, args, unix_socket, service_descriptor):
+    '''
+    Run target(args, worker_id) in num_workers processes. Workers share the tcp
+    port through SO_REUSEPORT, with a unix socket a front process forwards calls
+    to the per worker sockets. Returns once all workers have exited.
+    :param service_descriptor: protobuf ServiceDescriptor of the served service
+    '''
+    #spawn so that no grpc or inference engine state is inherited by the workers
+    ctx = multiprocessing.get_context('spawn')
+    model_lock = ctx.Lock()
+    ready = ctx.Semaphore(0)
+    processes = [ctx.Process(target=_workerMain, name="Worker-{}".format(i),
+                             args=(target, args, i, model_lock, ready))
+                 for i in range(num_workers)]
+    for process in processes:
+        process.start()
+
+    def shutdown(*unused):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    started = 0
+    while started < num_workers:
+        if ready.acquire(timeout=1):
+            started += 1
+        elif any(not process.is_alive() for process in processes):
+            log.error("Worker exited during startup, stopping all workers")
+            shutdown()
+            break
+    else:
+        print("All {} workers ready".format(num_workers))
+
+    proxy = None
+    if(unix_socket != "" and started == num_workers):
+        proxy = grpc.server(futures.ThreadPoolExecutor(max_workers=10 * num_workers), options=PROXY_OPTIONS)
+        targets = ["unix:" + workerSocket(unix_socket, i) for i in range(num_workers)]
+        proxy.add_generic_rpc_handlers((ForwardingHandler(service_descriptor, targets),))
+        proxy.add_insecure_port("unix:" + unix_socket)
+        os.chmod(unix_socket, 0o666)
+        proxy.start()
+
+    #any worker exiting takes the others down, the service is restarted as a whole
+    while any(process.is_alive() for process in processes):
+        for process in processes:
+            process.join(timeout=1)
+            if process.exitcode is not None:
+                shutdown()
+    if proxy is not None:
+        proxy.stop(SHUTDOWN_GRACE_S)
@@ -16,74 +16,55 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 
-import os
-from concurrent import futures
 import argparse
 import logging
 import sys
-import grpc
-import datetime
+import time
 import numpy as np
-import cv2
-import math
 import facemask_detection_pb2
 import facemask_detection_pb2_grpc
-import adaptors.create_interface as create_interface
 import common.inputValidations as inputValidations
+import common.workers as workers
+import common.metrics as metrics
+import common.detection_service as detection_service
+from common.anchor_decoder import AnchorDecoder
+from common.nms import nms
 from utils.anchor_generator import generate_anchors
-from utils.anchor_decode import decode_bbox
-from utils.nms import single_class_non_max_suppression
 
-class Detection(facemask_detection_pb2_grpc.DetectionServicer):
-    def __init__(self, interface, unix_socket, remote_port, img_height, img_width):
-        super().__init__()
-        self.remote_port = remote_port
-        self.interface = interface
-        self.unix_socket = unix_socket
-        self.img_height = img_height
-        self.img_width = img_width
 
-    def getPredictions(self, request, context):
-        #class name -id mapping
-        # id2class = {0: 'Mask', 1: 'NoMask'}
+class Detection(detection_service.BaseDetection, facemask_detection_pb2_grpc.DetectionServicer):
+    service_name = 'faceMaskDetection'
+    pb2 = facemask_detection_pb2
+    pb2_grpc = facemask_detection_pb2_grpc
+    input_node = "data_1"
+    #BGR scaled to [0, 1]
+    image_options = dict(scale=255.0)
+    model_preprocess_options = dict(scale=255.0)
 
-        start_time = datetime.datetime.now()
-        if not interface.isModelLoaded(2000):#Wait upto 2 seconds for model load
-            print("Model Load Failure")
-            sys.exit(1)
-        input_shape = [1, 3, self.img_width, self.img_height]
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         # anchor configuration
         feature_map_sizes = [[33, 33], [17, 17], [9, 9], [5, 5], [3, 3]]
         anchor_sizes = [[0.04, 0.056], [0.08, 0.11], [0.16, 0.22], [0.32, 0.45], [0.64, 0.72]]
         anchor_ratios = [[1, 0.62, 0.42]] * 5
-        # generate anchors
+        # generate anchors once, they only depend on the configuration above
         anchors = generate_anchors(feature_map_sizes, anchor_sizes, anchor_ratios)
-        anchors_exp = np.expand_dims(anchors, axis=0)
-        data = np.fromstring(request.data, dtype=np.uint8)
-        img = cv2.imdecode(data, cv2.IMREAD_COLOR)  # BGR color format, shape HWC
-        node_name = "data_1"
-        img = cv2.resize(img, (self.img_width, self.img_height))
-        image = img / 255.0
-
-        #creating dictionary as required by adapters
-        input = {node_name: (image, input_shape)}
-        result = interface.run_detection(input)
-        end_time = datetime.datetime.now()
-        serving_duration = (end_time - start_time).total_seconds() * 1000
+        self.anchor_decoder = AnchorDecoder(anchors)
 
+    def postprocess(self, request, result):
+        start_time = time.perf_counter()
+        #class name -id mapping
+        # id2class = {0: 'Mask', 1: 'NoMask'}
         y_bboxes_output = result["loc_branch_concat_1/concat"][0]
         y_cls_output = result["cls_branch_concat_1/concat"][0]
-        y_bboxes = decode_bbox(anchors_exp, y_bboxes_output)[0]
+        y_bboxes = self.anchor_decoder.decode(y_bboxes_output[0])
         y_cls = y_cls_output[0]
         # To speed up, do single class NMS, not multiple classes NMS.
         bbox_max_scores = np.max(y_cls, axis=1)
         bbox_max_score_classes = np.argmax(y_cls, axis=1)
         # keep_idx is the alive bounding box after nms.
-        keep_idxs = single_class_non_max_suppression(y_bboxes,
-                                                 bbox_max_scores,
-                                                 conf_thresh=0.5,
-                                                 iou_thresh=0.4,
-                                                 )
+        # side_padding keeps the IoU of the original face mask nms for the normalized boxes
+        keep_idxs = nms(y_bboxes, bbox_max_scores, iou_thresh=0.4, conf_thresh=0.5, side_padding=1e-3)
         result_coords = []
         for idx in keep_idxs:
             conf = float(bbox_max_scores[idx])
@@ -95,24 +76,16 @@ class Detection(facemask_detection_pb2_grpc.DetectionServicer):
             xmax = min(int(bbox[2] * 600), 600)
             ymax = min(int(bbox[3] * 400), 400)
             result_coords.append(facemask_detection_pb2.Prediction(x_min=xmin, y_min=ymin, x_max=xmax, y_max=ymax, confidence=conf, class_id=class_id))
-
-        end_time = datetime.datetime.now()
-        duration = (end_time - start_time).total_seconds() * 1000
-        print("time in ms run_detection: {} getInferResult: {}".format(serving_duration,
-                                                                       duration))
+        metrics.observeStage(self.model_name, 'postprocess', start_time)
         return facemask_detection_pb2.PredictionsList(predictions=result_coords)
 
 
-def serve(detection):
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    facemask_detection_pb2_grpc.add_DetectionServicer_to_server(detection, server)
-    if(detection.unix_socket != ""):
-        server.add_insecure_port("unix:" + detection.unix_socket)
-        os.chmod(detection.unix_socket, 0o666)
-    else:
-        server.add_insecure_port('[::]:{}'.format(detection.remote_port))
-    server.start()
-    server.wait_for_termination()
+class AsyncDetection(detection_service.AsyncDetectionMixin, Detection):
+    pass
+
+
+def startService(args, worker_id=None):
+    detection_service.startService(args, worker_id, Detection, AsyncDetection)
 
 if __name__ == '__main__':
     logging.basicConfig()
@@ -129,11 +102,13 @@ if __name__ == '__main__':
                         help='Specify full path to mounted Directory for model loading.')
     parser.add_argument('--serving_port', required=False, default=9000,
                         help='Specify port to inference service. default: 9000')
+    parser.add_argument('--serving_channels', required=False, default=4, type=int,
+                        help='Specify number of grpc channels kept open to inference service. default: 4')
     parser.add_argument('--serving_model_name', required=False, default='face_mask_detection',
                         help='Specify model name set for inference service.')
     parser.add_argument('--interface', required=False, default='ovms',
-                        help='Specify serving interface: currently supported interface \'ovms\'\
-                         and \'ovtk\' for dynamically selecting the interface')
+                        help='Specify serving interface: currently supported interface \'ovms\',\
+                         \'kserve\' and \'ovtk\' for dynamically selecting the interface')
     parser.add_argument('--width', required=False, help='How the input image width should be'
                                                     ' resized in pixels', default=1200, type=int)
     parser.add_argument('--height', required=False, help='How the input image width should be'
@@ -141,15 +116,48 @@ if __name__ == '__main__':
     parser.add_argument('--device', required=False, default='AUTO',
                         help='Specify device you want do inference with: currently supported devices \'CPU\'\
                          \'GPU\' and \'GPU.{device # of GPU}\' in case of multiple GPUs for dynamically selecting device')
+    parser.add_argument('--performance_hint', required=False, default='LATENCY',
+                        help='Specify openvino performance hint for ovtk interface: \'LATENCY\' or \'THROUGHPUT\'.\
+                         THROUGHPUT uses all cpu streams with one infer request per stream')
+    parser.add_argument('--max_batch_size', required=False, default=1, type=int,
+                        help='Batch concurrent requests into one inference of up to this many images.\
+                         Model must accept a dynamic batch size. default: 1 (no batching)')
+    parser.add_argument('--max_batch_delay_ms', required=False, default=5, type=int,
+                        help='Maximum time a request waits for a batch to fill. default: 5')
+    parser.add_argument('--server_mode', required=False, default='sync',
+                        help='Specify grpc server mode: \'sync\' thread pool server or \'aio\' asyncio server\
+                         that awaits inference and offloads cpu bound steps to an executor. default: sync')
+    parser.add_argument('--input_layout', required=False, default='NCHW',
+                        help='Specify layout of the model input: \'NCHW\' or \'NHWC\'. default: NCHW')
+    parser.add_argument('--model_preprocess', required=False, default='false',
+                        help='Specify \'true\' to compile resize, color conversion and scaling into the model,\
+                         images are submitted as decoded uint8. Requires the \'ovtk\' interface. default: false')
+    parser.add_argument('--stream_queue_size', required=False, default=2, type=int,
+                        help='Frames waiting in front of each streamPredictions stage. default: 2')
+    parser.add_argument('--stream_drop_policy', required=False, default='none',
+                        help='Specify what streamPredictions does with incoming frames when the pipeline falls behind:\
+                         \'none\' waits, \'oldest\' drops the oldest waiting frame, \'newest\' drops the\
+                         incoming frame. default: none')
+    parser.add_argument('--result_cache_size', required=False, default=0, type=int,
+                        help='Cache the predictions of this many distinct getPredictions requests, identical\
+                         requests in flight share one inference. default: 0 (no cache)')
+    parser.add_argument('--result_cache_ttl_s', required=False, default=60, type=int,
+                        help='Seconds a cached prediction is served, 0 keeps it until evicted. default: 60')
+    parser.add_argument('--metrics_port', required=False, default=0, type=int,
+                        help='Specify port of the http /metrics endpoint in Prometheus text format, workers use\
+                         metrics_port + worker index. default: 0 (disabled)')
+    parser.add_argument('--trace_file', required=False, default="",
+                        help='Specify file to append json trace spans of every rpc to, workers append their index\
+                         to the name. Clients may always request a stage timing trailer with the \'stage-timing\'\
+                         metadata key. default="" (no spans)')
+    parser.add_argument('--workers', required=False, default=1, type=int,
+                        help='Specify number of server processes sharing the listening port or unix socket,\
+                         each with its own adaptor. default: 1')
     args = vars(parser.parse_args(sys.argv[1:]))
     inputValidations.validate(args)
-    serving_address = args['serving_address']
-    serving_port = args['serving_port']
-    dir_path = args['serving_mounted_modelDir']
-    serving_model_name = args['serving_model_name']
-    adapter = args['interface']
-    device = args['device']
-    interface = create_interface.createInterfaceObj(adapter, device, serving_address, serving_port,
-                                                    serving_model_name, dir_path)
     print("Starting Service")
-    serve(Detection(interface, args['unix_socket'], args['remote_port'], args['height'], args['width']))
+    if(args['workers'] > 1):
+        workers.runWorkers(args['workers'], startService, args, args['unix_socket'],
+                           facemask_detection_pb2.DESCRIPTOR.services_by_name['Detection'])
+    else:
+        startService(args)
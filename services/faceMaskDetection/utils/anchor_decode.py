@@ -1,44 +0,0 @@
-#
-# Copyright (C) 2020-2023 Intel Corporation
-#
-# Licensed under the Apache License, Version 2.0 (the "License");
-# you may not use this file except in compliance with the License.
-# You may obtain a copy of the License at
-#
-#     http://www.apache.org/licenses/LICENSE-2.0
-#
-# Unless required by applicable law or agreed to in writing, software
-# distributed under the License is distributed on an "AS IS" BASIS,
-# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
-# See the License for the specific language governing permissions and
-# limitations under the License.
-#
-# SPDX-License-Identifier: Apache-2.0
-#
-
-import numpy as np
-
-def decode_bbox(anchors, raw_outputs, variances=[0.1, 0.1, 0.2, 0.2]):
-    '''
-    Decode the actual bbox according to the anchors.
-    the anchor value order is:[xmin,ymin, xmax, ymax]
-    :param anchors: numpy array with shape [batch, num_anchors, 4]
-    :param raw_outputs: numpy array with the same shape with anchors
-    :param variances: list of float, default=[0.1, 0.1, 0.2, 0.2]
-    :return:
-    '''
-    anchor_centers_x = (anchors[:, :, 0:1] + anchors[:, :, 2:3]) / 2
-    anchor_centers_y = (anchors[:, :, 1:2] + anchors[:, :, 3:]) / 2
-    anchors_w = anchors[:, :, 2:3] - anchors[:, :, 0:1]
-    anchors_h = anchors[:, :, 3:] - anchors[:, :, 1:2]
-    raw_outputs_rescale = raw_outputs * np.array(variances)
-    predict_center_x = raw_outputs_rescale[:, :, 0:1] * anchors_w + anchor_centers_x
-    predict_center_y = raw_outputs_rescale[:, :, 1:2] * anchors_h + anchor_centers_y
-    predict_w = np.exp(raw_outputs_rescale[:, :, 2:3]) * anchors_w
-    predict_h = np.exp(raw_outputs_rescale[:, :, 3:]) * anchors_h
-    predict_xmin = predict_center_x - predict_w / 2
-    predict_ymin = predict_center_y - predict_h / 2
-    predict_xmax = predict_center_x + predict_w / 2
-    predict_ymax = predict_center_y + predict_h / 2
-    predict_bbox = np.concatenate([predict_xmin, predict_ymin, predict_xmax, predict_ymax], axis=-1)
-    return predict_bbox
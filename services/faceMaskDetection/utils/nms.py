@@ -1,76 +0,0 @@
-#
-# Copyright (C) 2020-2023 Intel Corporation
-#
-# Licensed under the Apache License, Version 2.0 (the "License");
-# you may not use this file except in compliance with the License.
-# You may obtain a copy of the License at
-#
-#     http://www.apache.org/licenses/LICENSE-2.0
-#
-# Unless required by applicable law or agreed to in writing, software
-# distributed under the License is distributed on an "AS IS" BASIS,
-# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
-# See the License for the specific language governing permissions and
-# limitations under the License.
-#
-# SPDX-License-Identifier: Apache-2.0
-#
-
-import numpy as np
-
-def single_class_non_max_suppression(bboxes, confidences, conf_thresh=0.2, iou_thresh=0.5, keep_top_k=-1):
-    '''
-    do nms on single class.
-    Hint: for the specific class, given the bbox and its confidence,
-    1) sort the bbox according to the confidence from top to down, we call this a set
-    2) select the bbox with the highest confidence, remove it from set, and do IOU calculate with the rest bbox
-    3) remove the bbox whose IOU is higher than the iou_thresh from the set,
-    4) loop step 2 and 3, util the set is empty.
-    :param bboxes: numpy array of 2D, [num_bboxes, 4]
-    :param confidences: numpy array of 1D. [num_bboxes]
-    :param conf_thresh:
-    :param iou_thresh:
-    :param keep_top_k:
-    :return:
-    '''
-    if len(bboxes) == 0: return []
-
-    conf_keep_idx = np.where(confidences > conf_thresh)[0]
-
-    bboxes = bboxes[conf_keep_idx]
-    confidences = confidences[conf_keep_idx]
-
-    pick = []
-    xmin = bboxes[:, 0]
-    ymin = bboxes[:, 1]
-    xmax = bboxes[:, 2]
-    ymax = bboxes[:, 3]
-
-    area = (xmax - xmin + 1e-3) * (ymax - ymin + 1e-3)
-    idxs = np.argsort(confidences)
-
-    while len(idxs) > 0:
-        last = len(idxs) - 1
-        i = idxs[last]
-        pick.append(i)
-
-        # keep top k
-        if keep_top_k != -1:
-            if len(pick) >= keep_top_k:
-                break
-
-        overlap_xmin = np.maximum(xmin[i], xmin[idxs[:last]])
-        overlap_ymin = np.maximum(ymin[i], ymin[idxs[:last]])
-        overlap_xmax = np.minimum(xmax[i], xmax[idxs[:last]])
-        overlap_ymax = np.minimum(ymax[i], ymax[idxs[:last]])
-        overlap_w = np.maximum(0, overlap_xmax - overlap_xmin)
-        overlap_h = np.maximum(0, overlap_ymax - overlap_ymin)
-        overlap_area = overlap_w * overlap_h
-        overlap_ratio = overlap_area / (area[idxs[:last]] + area[i] - overlap_area)
-
-        need_to_be_deleted_idx = np.concatenate(([last], np.where(overlap_ratio > iou_thresh)[0]))
-        idxs = np.delete(idxs, need_to_be_deleted_idx)
-
-    # if the number of final bboxes is less than keep_top_k, we need to pad it.
-    # TODO
-    return conf_keep_idx[pick]
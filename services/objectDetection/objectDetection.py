@@ -16,87 +16,61 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 
-import os
-from concurrent import futures
 import argparse
 import logging
 import sys
-import grpc
-import datetime
-import numpy as np
-import cv2
-import math
+import time
 import object_detection_pb2
 import object_detection_pb2_grpc
-import adaptors.create_interface as create_interface
 import common.inputValidations as inputValidations
+import common.workers as workers
+import common.metrics as metrics
+import common.detection_service as detection_service
+from utils.ssd_decode import decode_predictions
 
+DEFAULT_SCORE_THRESHOLD = 0.5
 
-class Detection(object_detection_pb2_grpc.DetectionServicer):
-    def __init__(self, interface, unix_socket, remote_port, img_height, img_width):
-        super().__init__()
-        self.remote_port = remote_port
-        self.interface = interface
-        self.unix_socket = unix_socket
-        self.img_height = img_height
-        self.img_width = img_width
 
-    def getPredictions(self, request, context):
-        start_time = datetime.datetime.now()
-        if not self.interface.isModelLoaded(2000):#Wait upto 2 seconds for model load
-            print("Model Load Failure")
-            sys.exit(1)
-
-        input_shape = [1, 3, self.img_width, self.img_height]
-        data = np.fromstring(request.data, dtype=np.uint8)
-        img = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
-        node_name = "Parameter_0"
-        img = cv2.resize(img, (self.img_width, self.img_height))
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        img = cv2.normalize(img.astype('float'), None, -1.0, 1.0, cv2.NORM_MINMAX)
-
-        #creating dictionary as required by adapters
-        input = {node_name: (img, input_shape)}
-        result = self.interface.run_detection(input)
-        end_time = datetime.datetime.now()
-        serving_duration = (end_time - start_time).total_seconds() * 1000
+class Detection(detection_service.BaseDetection, object_detection_pb2_grpc.DetectionServicer):
+    service_name = 'objectDetection'
+    pb2 = object_detection_pb2
+    pb2_grpc = object_detection_pb2_grpc
+    input_node = "Parameter_0"
+    #RGB scaled to [-1, 1] by the image min/max
+    image_options = dict(to_rgb=True, minmax_range=(-1.0, 1.0))
+    model_preprocess_options = dict(to_rgb=True, mean=127.5, scale=127.5)
 
+    def postprocess(self, request, result):
+        start_time = time.perf_counter()
         #Modified according to new output format of the adapter
         output_classes = result["Transpose_537"][0]
         output_locations = result["Transpose_535"][0]
-        detections = []
-        for i in range(0, 1917):  # returns 1917 detections for each class
-            classes = output_classes[0,0,i,1:]
-            coordinates=output_locations[0,0,i,:]
-            top_class_index = np.argmax(classes)+1
-            EXP_SCORE = 0.5
-            det_score = (1.0/(1.0+math.exp(-classes[top_class_index-1])))
-            if (det_score > EXP_SCORE):
-                detections.append(object_detection_pb2.Prediction(index0=coordinates[0],
-                                                                  index1=coordinates[1],
-                                                                  index2=coordinates[2],
-                                                                  index3=coordinates[3],
-                                                                  confidence=det_score,
-                                                                  classIndex=top_class_index,
-                                                                  predictIndex=i))
-
-        end_time = datetime.datetime.now()
-        duration = (end_time - start_time).total_seconds() * 1000
-        print("time in ms run_detection: {} getInferResult: {}".format(serving_duration,
-                                                                            duration))
+        score_threshold = request.score_threshold or DEFAULT_SCORE_THRESHOLD
+        # returns 1917 detections for each class, filtered in a single pass
+        indices, boxes, scores, classes = decode_predictions(output_classes, output_locations,
+                                                             score_threshold,
+                                                             dict(request.class_thresholds),
+                                                             request.top_k)
+        detections = [object_detection_pb2.Prediction(index0=box[0], index1=box[1],
+                                                      index2=box[2], index3=box[3],
+                                                      confidence=score, classIndex=class_index,
+                                                      predictIndex=i)
+                      for i, box, score, class_index in zip(indices.tolist(), boxes.tolist(),
+                                                            scores.tolist(), classes.tolist())]
+        metrics.observeStage(self.model_name, 'postprocess', start_time)
         return object_detection_pb2.PredictionsList(predictions=detections)
 
+    def cacheKey(self, request):
+        return super().cacheKey(request) + (request.score_threshold,
+                                            tuple(sorted(request.class_thresholds.items())), request.top_k)
 
-def serve(detection):
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    object_detection_pb2_grpc.add_DetectionServicer_to_server(detection, server)
-    if(detection.unix_socket != ""):
-        server.add_insecure_port("unix:" + detection.unix_socket)
-        os.chmod(detection.unix_socket, 0o666)
-    else:
-        server.add_insecure_port('[::]:{}'.format(detection.remote_port))
-    server.start()
-    server.wait_for_termination()
+
+class AsyncDetection(detection_service.AsyncDetectionMixin, Detection):
+    pass
+
+
+def startService(args, worker_id=None):
+    detection_service.startService(args, worker_id, Detection, AsyncDetection)
 
 if __name__ == '__main__':
     logging.basicConfig()
@@ -111,11 +85,13 @@ if __name__ == '__main__':
                         help='Specify full path to mounted Directory for model loading.')
     parser.add_argument('--serving_port', required=False, default=9000,
                         help='Specify port to inference service. default: 9000')
+    parser.add_argument('--serving_channels', required=False, default=4, type=int,
+                        help='Specify number of grpc channels kept open to inference service. default: 4')
     parser.add_argument('--serving_model_name', required=False, default='model_od',
                         help='Specify model name set for inference service.')
     parser.add_argument('--interface', required=False, default='ovms',
-                        help='Specify serving interface: currently supported interface \'ovms\'\
-                         and \'ovtk\' for dynamically selecting the interface')
+                        help='Specify serving interface: currently supported interface \'ovms\',\
+                         \'kserve\' and \'ovtk\' for dynamically selecting the interface')
     parser.add_argument('--width', required=False,
                         help='How the input image width should be resized in pixels',
                         default=300, type=int)
@@ -125,15 +101,48 @@ if __name__ == '__main__':
     parser.add_argument('--device', required=False, default='AUTO',
                         help='Specify device you want do inference with: currently supported devices \'CPU\'\
                          \'GPU\' and \'GPU.{device # of GPU}\' in case of multiple GPUs for dynamically selecting device')
+    parser.add_argument('--performance_hint', required=False, default='LATENCY',
+                        help='Specify openvino performance hint for ovtk interface: \'LATENCY\' or \'THROUGHPUT\'.\
+                         THROUGHPUT uses all cpu streams with one infer request per stream')
+    parser.add_argument('--max_batch_size', required=False, default=1, type=int,
+                        help='Batch concurrent requests into one inference of up to this many images.\
+                         Model must accept a dynamic batch size. default: 1 (no batching)')
+    parser.add_argument('--max_batch_delay_ms', required=False, default=5, type=int,
+                        help='Maximum time a request waits for a batch to fill. default: 5')
+    parser.add_argument('--server_mode', required=False, default='sync',
+                        help='Specify grpc server mode: \'sync\' thread pool server or \'aio\' asyncio server\
+                         that awaits inference and offloads cpu bound steps to an executor. default: sync')
+    parser.add_argument('--input_layout', required=False, default='NCHW',
+                        help='Specify layout of the model input: \'NCHW\' or \'NHWC\'. default: NCHW')
+    parser.add_argument('--model_preprocess', required=False, default='false',
+                        help='Specify \'true\' to compile resize, color conversion and scaling into the model,\
+                         images are submitted as decoded uint8. Requires the \'ovtk\' interface. default: false')
+    parser.add_argument('--stream_queue_size', required=False, default=2, type=int,
+                        help='Frames waiting in front of each streamPredictions stage. default: 2')
+    parser.add_argument('--stream_drop_policy', required=False, default='none',
+                        help='Specify what streamPredictions does with incoming frames when the pipeline falls behind:\
+                         \'none\' waits, \'oldest\' drops the oldest waiting frame, \'newest\' drops the\
+                         incoming frame. default: none')
+    parser.add_argument('--result_cache_size', required=False, default=0, type=int,
+                        help='Cache the predictions of this many distinct getPredictions requests, identical\
+                         requests in flight share one inference. default: 0 (no cache)')
+    parser.add_argument('--result_cache_ttl_s', required=False, default=60, type=int,
+                        help='Seconds a cached prediction is served, 0 keeps it until evicted. default: 60')
+    parser.add_argument('--metrics_port', required=False, default=0, type=int,
+                        help='Specify port of the http /metrics endpoint in Prometheus text format, workers use\
+                         metrics_port + worker index. default: 0 (disabled)')
+    parser.add_argument('--trace_file', required=False, default="",
+                        help='Specify file to append json trace spans of every rpc to, workers append their index\
+                         to the name. Clients may always request a stage timing trailer with the \'stage-timing\'\
+                         metadata key. default="" (no spans)')
+    parser.add_argument('--workers', required=False, default=1, type=int,
+                        help='Specify number of server processes sharing the listening port or unix socket,\
+                         each with its own adaptor. default: 1')
     args = vars(parser.parse_args(sys.argv[1:]))
     inputValidations.validate(args)
-    serving_address = args['serving_address']
-    serving_port = args['serving_port']
-    dir_path = args['serving_mounted_modelDir']
-    serving_model_name=args['serving_model_name']
-    adapter = args['interface']
-    device = args['device']
-    interface = create_interface.createInterfaceObj(adapter, device, serving_address, serving_port,
-                                                    serving_model_name, dir_path)
     print("Starting Service")
-    serve(Detection(interface, args['unix_socket'], args['remote_port'], args['height'], args['width']))
+    if(args['workers'] > 1):
+        workers.runWorkers(args['workers'], startService, args, args['unix_socket'],
+                           object_detection_pb2.DESCRIPTOR.services_by_name['Detection'])
+    else:
+        startService(args)
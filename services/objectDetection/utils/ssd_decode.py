@@ -0,0 +1,58 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import numpy as np
+
+def score_to_logit(score):
+    #sigmoid(x) > score  <=>  x > logit(score), so thresholds can be applied before exp
+    score = np.clip(np.asarray(score, dtype=np.float32), 1e-7, 1 - 1e-7)
+    return np.log(score / (1 - score))
+
+def decode_predictions(output_classes, output_locations, score_threshold=0.5,
+                       class_thresholds=None, top_k=0):
+    '''
+    Decode raw SSD outputs of a single image in one pass over all priors.
+    :param output_classes: numpy array [..., num_priors, num_classes], class 0 is background
+    :param output_locations: numpy array [..., num_priors, 4]
+    :param score_threshold: minimum sigmoid score of the top class
+    :param class_thresholds: dict of class index -> threshold overriding score_threshold
+    :param top_k: keep only the k highest scoring priors, 0 keeps all
+    :return: tuple of (prior indices, boxes, scores, class indices), ordered by prior index
+    '''
+    logits = output_classes.reshape(-1, output_classes.shape[-1])[:, 1:]
+    boxes = output_locations.reshape(-1, output_locations.shape[-1])
+
+    top_class = np.argmax(logits, axis=1)
+    top_logit = np.take_along_axis(logits, top_class[:, None], axis=1)[:, 0]
+    class_ids = top_class + 1
+
+    if class_thresholds:
+        thresholds = np.full(logits.shape[1] + 1, score_threshold, dtype=np.float32)
+        for class_id, threshold in class_thresholds.items():
+            if 0 < class_id < len(thresholds):
+                thresholds[class_id] = threshold
+        keep = np.nonzero(top_logit > score_to_logit(thresholds)[class_ids])[0]
+    else:
+        keep = np.nonzero(top_logit > score_to_logit(score_threshold))[0]
+
+    if top_k > 0 and len(keep) > top_k:
+        best = np.argpartition(-top_logit[keep], top_k - 1)[:top_k]
+        keep = np.sort(keep[best])
+
+    scores = 1.0 / (1.0 + np.exp(-top_logit[keep].astype(np.float32)))
+    return keep, boxes[keep], scores, class_ids[keep]
@@ -0,0 +1,221 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import collections
+import logging as log
+import threading
+import time
+from contextlib import contextmanager
+
+#upper bound for the idle check period
+IDLE_CHECK_S = 10
+
+
+class TokenEntry:
+    def __init__(self, interface):
+        self.interface = interface
+        self.lock = threading.Lock()
+        self.inflight = 0
+        self.last_used = time.monotonic()
+        self.loaded = False
+        #unloaded by the budget or idle timeout, reloaded on next use
+        self.evicted = False
+
+
+class LoadedModels:
+    '''
+    Adaptor interfaces of the rawTensor tokens, least recently used first.
+    Loaded models are kept within a count and memory budget: idle tokens are
+    unloaded when the budget is exceeded or after idle_timeout_s, their model
+    files stay on disk and the model is reloaded when the token is used again.
+    Models shared between tokens are counted once against the memory budget.
+    '''
+    def __init__(self, max_models=0, max_memory_mb=0, idle_timeout_s=0, reload_timeout_ms=25000):
+        '''
+        :param max_models: loaded models allowed at once, 0 for no limit
+        :param max_memory_mb: size of loaded model files allowed at once, 0 for no limit
+        :param idle_timeout_s: unload models not used for this long, 0 to keep them
+        '''
+        self.max_models = max_models
+        self.max_memory = max_memory_mb * 1024 * 1024
+        self.idle_timeout_s = idle_timeout_s
+        self.reload_timeout_ms = reload_timeout_ms
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict()
+        self.counters = {'evictions': 0, 'idle_unloads': 0, 'reloads': 0, 'reload_failures': 0}
+        if idle_timeout_s > 0:
+            threading.Thread(target=self._idleLoop, name="IdleModels", daemon=True).start()
+
+    def __getitem__(self, token):
+        return self.entries[token].interface
+
+    def __contains__(self, token):
+        return token in self.entries
+
+    def __setitem__(self, token, interface):
+        with self.lock:
+            previous = self.entries.pop(token, None)
+            self.entries[token] = TokenEntry(interface)
+        if previous is not None and previous.interface is not interface:
+            previous.interface.close()
+
+    def remove(self, token):
+        with self.lock:
+            entry = self.entries.pop(token, None)
+        return entry.interface if entry is not None else None
+
+    def clear(self):
+        #drop all tokens at shutdown, returns their interfaces to be closed
+        with self.lock:
+            entries = list(self.entries.values())
+            self.entries.clear()
+        return [entry.interface for entry in entries]
+
+    def evicted(self, token):
+        with self.lock:
+            entry = self.entries.get(token)
+            return entry is not None and entry.evicted
+
+    def markLoaded(self, token):
+        #called once loadModel succeeded for the token
+        with self.lock:
+            entry = self.entries[token]
+            if entry.interface.modelFootprint() is None:
+                #the adaptor keeps no model in process, nothing to budget
+                return
+            entry.loaded = True
+            entry.evicted = False
+            entry.last_used = time.monotonic()
+            self.entries.move_to_end(token)
+        self._enforceBudget(token)
+
+    def _memory(self, entries):
+        #shared models are counted once
+        sizes = {}
+        for entry in entries:
+            key, size = entry.interface.modelFootprint() or (None, 0)
+            sizes[key if key is not None else id(entry)] = size
+        return sum(sizes.values())
+
+    def _overBudget(self, loaded):
+        if self.max_models > 0 and len(loaded) > self.max_models:
+            return True
+        return self.max_memory > 0 and self._memory(loaded) > self.max_memory
+
+    def _enforceBudget(self, keep_token):
+        while True:
+            with self.lock:
+                loaded = [entry for entry in self.entries.values() if entry.loaded]
+                if not self._overBudget(loaded):
+                    return
+                victims = [(token, entry) for token, entry in self.entries.items()
+                           if entry.loaded and entry.inflight == 0 and token != keep_token]
+            for token, entry in victims:
+                if self._unload(token, entry):
+                    self._count('evictions')
+                    log.info("Evicted model of token {}, stats {}".format(token, self.stats()))
+                    break
+            else:
+                log.warning("Loaded models exceed the budget, all of them are in use")
+                return
+
+    def _count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def _unload(self, token, entry):
+        #entry.lock makes a concurrent acquire wait for the unload before reloading
+        with entry.lock:
+            with self.lock:
+                if not entry.loaded or entry.inflight > 0:
+                    return False
+                entry.loaded = False
+                entry.evicted = True
+            entry.interface.unload()
+        return True
+
+    def _idleLoop(self):
+        while True:
+            time.sleep(min(self.idle_timeout_s / 2, IDLE_CHECK_S))
+            now = time.monotonic()
+            with self.lock:
+                idle = [(token, entry) for token, entry in self.entries.items()
+                        if entry.loaded and entry.inflight == 0
+                        and now - entry.last_used > self.idle_timeout_s]
+            for token, entry in idle:
+                if self._unload(token, entry):
+                    self._count('idle_unloads')
+                    log.info("Unloaded idle model of token {}".format(token))
+
+    def acquire(self, token):
+        '''
+        Mark the token in use, reloading its model if it was unloaded.
+        Every acquire has to be paired with release.
+        :return: interface of the token
+        '''
+        with self.lock:
+            entry = self.entries[token]
+            entry.inflight += 1
+            entry.last_used = time.monotonic()
+            self.entries.move_to_end(token)
+            evicted = entry.evicted
+        if evicted:
+            try:
+                self._reload(token, entry)
+            except Exception:
+                self.release(token, entry.interface)
+                raise
+        return entry.interface
+
+    def _reload(self, token, entry):
+        with entry.lock:
+            if not entry.evicted:
+                return
+            log.info("Reloading model of token {}".format(token))
+            if not entry.interface.isModelLoaded(self.reload_timeout_ms):
+                self._count('reload_failures')
+                raise RuntimeError("Reloading model of token {} failed".format(token))
+            with self.lock:
+                entry.loaded = True
+                entry.evicted = False
+                self.counters['reloads'] += 1
+        self._enforceBudget(token)
+
+    def release(self, token, interface):
+        with self.lock:
+            entry = self.entries.get(token)
+            #the token may have been prepared again while the request ran
+            if entry is not None and entry.interface is interface:
+                entry.inflight -= 1
+                entry.last_used = time.monotonic()
+
+    @contextmanager
+    def use(self, token):
+        interface = self.acquire(token)
+        try:
+            yield interface
+        finally:
+            self.release(token, interface)
+
+    def stats(self):
+        with self.lock:
+            loaded = [entry for entry in self.entries.values() if entry.loaded]
+            stats = dict(self.counters)
+            stats.update({'tokens': len(self.entries), 'loaded': len(loaded),
+                          'memory_bytes': self._memory(loaded)})
+        return stats
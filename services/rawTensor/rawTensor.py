@@ -17,29 +17,48 @@
 #
 
 import os
+import asyncio
 import argparse
 import logging as log
 import sys
 import grpc
-import datetime
 import numpy as np
+import queue
+import threading
 from concurrent import futures
 import nnhal_raw_tensor_pb2
 import nnhal_raw_tensor_pb2_grpc
 import adaptors.create_interface as create_interface
 import common.inputValidations as inputValidations
+import common.metrics as metrics
+import common.tracing as tracing
+import common.workers as workers
+from adaptors.model_store import ModelStore
+from raw_reply import RawReplyDataTensors, RawStreamInferReply
+from loaded_models import LoadedModels
+
+#requests of one stream that may be inferred concurrently
+STREAM_MAX_INFLIGHT = 8
 
 
 class Detection(nnhal_raw_tensor_pb2_grpc.DetectionServicer):
-    def __init__(self, adapter, device, dir_path, unix_socket, remote_port, vsock):
+    def __init__(self, adapter, device, dir_path, unix_socket, remote_port, vsock, serving_channels=4,
+                 performance_hint='LATENCY', model_store=None, loaded_models=None, serving_model_name='remote_model'):
         super().__init__()
+        self.model_store = model_store
+        self.serving_channels = serving_channels
+        self.performance_hint = performance_hint
         self.adapter = adapter
         self.device = device
         self.dir_path = dir_path
         self.unix_socket = unix_socket
         self.remote_port = remote_port
         self.vsock = vsock
-        self.interface = {}
+        #token -> adaptor interface, bounds the models loaded at once
+        self.interface = loaded_models if loaded_models is not None else LoadedModels()
+        self.stream_executor = futures.ThreadPoolExecutor(max_workers=10)
+        #models are named by the session token, metrics label them by the serving model name
+        self.serving_model_name = serving_model_name
         self.shared_model_file = False
         if(serving_model_name == 'shared'):
             self.shared_model_file = True
@@ -47,26 +66,50 @@ class Detection(nnhal_raw_tensor_pb2_grpc.DetectionServicer):
     def prepare(self, requestStr, context):
         log.info("Preparing model")
         self.interface[requestStr.token.data] = create_interface.createInterfaceObj(self.adapter, self.device, "", "",
-                                                             requestStr.token.data, self.dir_path)
+                                                             requestStr.token.data, self.dir_path,
+                                                             self.serving_channels, self.performance_hint,
+                                                             server_concurrency=workers.SERVER_WORKERS,
+                                                             metrics_label=self.serving_model_name)
         if not self.shared_model_file:
             self.interface[requestStr.token.data].prepareDir()
+        if self.model_store is not None:
+            self.interface[requestStr.token.data].setModelStore(self.model_store)
         return nnhal_raw_tensor_pb2.ReplyStatus(status=True)
 
     def release(self, requestStr, context):
+        interface = self.interface.remove(requestStr.token.data)
+        if interface is None:
+            return nnhal_raw_tensor_pb2.ReplyStatus(status=False)
         if not self.shared_model_file:
-            self.interface[requestStr.token.data].cleanUp()
-        self.interface[requestStr.token.data] = None
+            interface.cleanUp()
+        interface.close()
         return nnhal_raw_tensor_pb2.ReplyStatus(status=True)
 
-    def sendXml(self, requestChunks, context):
-        for chunk in requestChunks:
-            self.interface[chunk.token.data].saveXML(chunk)
+    def receiveUpload(self, requestChunks, save, commit):
+        #committed once the last chunk of the stream arrived, a further stream appends to it
+        token = None
+        try:
+            for chunk in requestChunks:
+                token = chunk.token.data
+                getattr(self.interface[token], save)(chunk)
+        except Exception:
+            if token is not None:
+                self.interface[token].abortUploads()
+            raise
+        if token is None:
+            return nnhal_raw_tensor_pb2.ReplyStatus(status=False)
+        getattr(self.interface[token], commit)()
         return nnhal_raw_tensor_pb2.ReplyStatus(status=True)
 
+    def sendXml(self, requestChunks, context):
+        return self.receiveUpload(requestChunks, 'saveXML', 'commitXML')
+
     def sendBin(self, requestChunks, context):
-        for chunk in requestChunks:
-            self.interface[chunk.token.data].saveBin(chunk)
-        return nnhal_raw_tensor_pb2.ReplyStatus(status=True)
+        return self.receiveUpload(requestChunks, 'saveBin', 'commitBin')
+
+    def useStoredModel(self, request, context):
+        status = self.interface[request.token.data].useStoredModel(request.xml_sha256, request.bin_sha256)
+        return nnhal_raw_tensor_pb2.ReplyStatus(status=status)
 
     def loadModel(self, request, context):
         #Wait upto 25 seconds for model load
@@ -74,6 +117,7 @@ class Detection(nnhal_raw_tensor_pb2_grpc.DetectionServicer):
         if not self.interface[request.token.data].isModelLoaded(25000):
             log.error("Model Load Failure")
             return nnhal_raw_tensor_pb2.ReplyStatus(status=False)
+        self.interface.markLoaded(request.token.data)
         return nnhal_raw_tensor_pb2.ReplyStatus(status=True)
 
     def getMappedDatatype(self, type):
@@ -97,11 +141,8 @@ class Detection(nnhal_raw_tensor_pb2_grpc.DetectionServicer):
         }
         return types.get(type, 'f4')
 
-    def getInferResult(self, request, context):
-        start_time = datetime.datetime.now()
-        reply_data_tensor = nnhal_raw_tensor_pb2.ReplyDataTensors()
-        run_start_time = datetime.datetime.now()
-        #decoding the grpc request and sending to adapter
+    def decodeRequest(self, request):
+        #decoding the grpc request for the adapter, inputs are views on the request bytes
         input = {}
         for datatensor in request.data_tensors:
             node_name = datatensor.node_name
@@ -110,29 +151,139 @@ class Detection(nnhal_raw_tensor_pb2_grpc.DetectionServicer):
             data_type = datatensor.data_type
             data = np.frombuffer(img_data, np.dtype(self.getMappedDatatype(data_type)))
             input[node_name] = (data, input_shape)
+        return input
 
-        result = self.interface[request.token.data].run_detection(input)
-        end_time = datetime.datetime.now()
-        serving_duration = (end_time - run_start_time).total_seconds() * 1000
+    def encodeReply(self, result, metrics_label):
+        reply_data_tensor = RawReplyDataTensors(metrics_label)
         #Modifed according to the new interface output format
+        #outputs are referenced, not copied, until the reply is serialized
         for key in result.keys():
-            output_data_tensor = reply_data_tensor.data_tensors.add()
-            output_data_tensor.data = result[key][0].tobytes()
-            output_data_tensor.node_name = key
-            shape = result[key][1]
-            output_data_tensor.tensor_shape.extend(shape)
-        end_time = datetime.datetime.now()
-        duration = (end_time - start_time).total_seconds() * 1000
-        log.debug("time in ms run_detection: {} getInferResult: {}".format(serving_duration,
-                                                                            duration))
+            reply_data_tensor.add(key, result[key][0], result[key][1])
         return reply_data_tensor
 
+    def infer(self, request):
+        token = request.token.data
+        with self.interface.use(token) as interface:
+            with metrics.timeStage(interface.metrics_label, 'decode'):
+                input = self.decodeRequest(request)
+            result = interface.run_detection(input)
+        return self.encodeReply(result, interface.metrics_label)
+
+    def getInferResult(self, request, context):
+        with metrics.trackRequest('getInferResult', context):
+            reply_data_tensor = self.infer(request)
+            #bytes the service copies for the reply, on top of any copy inside the adaptor
+            context.set_trailing_metadata((('bytes-copied', str(reply_data_tensor.bytes_copied)),))
+            return reply_data_tensor
+
+    def streamInferResult(self, request_iterator, context):
+        with metrics.trackRequest('streamInferResult'):
+            yield from self.streamReplies(request_iterator)
+
+    def streamReplies(self, request_iterator):
+        #requests are read on a separate thread and run on the stream executor,
+        #replies are sent in completion order as soon as they are ready
+        replies = queue.Queue()
+        inflight = threading.BoundedSemaphore(STREAM_MAX_INFLIGHT)
+
+        def run(stream_request):
+            try:
+                reply = RawStreamInferReply(stream_request.sequence_id,
+                                            self.infer(stream_request.request))
+            except Exception as inst:
+                log.error("Stream inference {} failed: {}".format(stream_request.sequence_id, inst))
+                reply = nnhal_raw_tensor_pb2.StreamInferReply(sequence_id=stream_request.sequence_id,
+                                                              status=False, error=str(inst))
+            replies.put(reply)
+            inflight.release()
+
+        def read():
+            try:
+                for stream_request in request_iterator:
+                    inflight.acquire()
+                    self.stream_executor.submit(run, stream_request)
+            except Exception as inst:
+                log.warning("Inference stream closed: {}".format(inst))
+            finally:
+                #wait for requests still in flight before ending the stream
+                for _ in range(STREAM_MAX_INFLIGHT):
+                    inflight.acquire()
+                replies.put(None)
+
+        threading.Thread(target=read, name="StreamReader", daemon=True).start()
+        while True:
+            reply = replies.get()
+            if reply is None:
+                return
+            yield reply
+
+class AsyncDetection(Detection):
+    #grpc.aio servicer: inference is awaited on the adaptor, model upload and
+    #management rpcs keep their blocking implementation on the migration thread pool
+    async def getInferResult(self, request, context):
+        with metrics.trackRequest('getInferResult', context):
+            token = request.token.data
+            if self.interface.evicted(token):
+                #reloading blocks, keep it off the event loop
+                interface = await asyncio.to_thread(self.interface.acquire, token)
+            else:
+                interface = self.interface.acquire(token)
+            try:
+                with metrics.timeStage(interface.metrics_label, 'decode'):
+                    input = self.decodeRequest(request)
+                result = await interface.async_run_detection(input)
+            finally:
+                self.interface.release(token, interface)
+            reply_data_tensor = self.encodeReply(result, interface.metrics_label)
+            context.set_trailing_metadata((('bytes-copied', str(reply_data_tensor.bytes_copied)),))
+            return reply_data_tensor
+
+def addDetectionServicer(detection, server):
+    #Same handlers as the generated add_DetectionServicer_to_server, except that
+    #inference replies serialize themselves so RawReplyDataTensors can be returned
+    rpc_method_handlers = {
+        'getInferResult': grpc.unary_unary_rpc_method_handler(
+            detection.getInferResult,
+            request_deserializer=nnhal_raw_tensor_pb2.RequestDataTensors.FromString,
+            response_serializer=lambda reply: reply.SerializeToString()),
+        'streamInferResult': grpc.stream_stream_rpc_method_handler(
+            detection.streamInferResult,
+            request_deserializer=nnhal_raw_tensor_pb2.StreamInferRequest.FromString,
+            response_serializer=lambda reply: reply.SerializeToString()),
+        'sendXml': grpc.stream_unary_rpc_method_handler(
+            detection.sendXml,
+            request_deserializer=nnhal_raw_tensor_pb2.RequestDataChunks.FromString,
+            response_serializer=nnhal_raw_tensor_pb2.ReplyStatus.SerializeToString),
+        'sendBin': grpc.stream_unary_rpc_method_handler(
+            detection.sendBin,
+            request_deserializer=nnhal_raw_tensor_pb2.RequestDataChunks.FromString,
+            response_serializer=nnhal_raw_tensor_pb2.ReplyStatus.SerializeToString),
+        'useStoredModel': grpc.unary_unary_rpc_method_handler(
+            detection.useStoredModel,
+            request_deserializer=nnhal_raw_tensor_pb2.RequestModelHash.FromString,
+            response_serializer=nnhal_raw_tensor_pb2.ReplyStatus.SerializeToString),
+        'loadModel': grpc.unary_unary_rpc_method_handler(
+            detection.loadModel,
+            request_deserializer=nnhal_raw_tensor_pb2.RequestString.FromString,
+            response_serializer=nnhal_raw_tensor_pb2.ReplyStatus.SerializeToString),
+        'prepare': grpc.unary_unary_rpc_method_handler(
+            detection.prepare,
+            request_deserializer=nnhal_raw_tensor_pb2.RequestString.FromString,
+            response_serializer=nnhal_raw_tensor_pb2.ReplyStatus.SerializeToString),
+        'release': grpc.unary_unary_rpc_method_handler(
+            detection.release,
+            request_deserializer=nnhal_raw_tensor_pb2.RequestString.FromString,
+            response_serializer=nnhal_raw_tensor_pb2.ReplyStatus.SerializeToString),
+    }
+    server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(
+        'objectDetection.Detection', rpc_method_handlers),))
+
 def serve(detection):
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10), options = [
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=workers.SERVER_WORKERS), options = [
         ('grpc.max_send_message_length', 1024*1024*1024),
         ('grpc.max_receive_message_length', 1024*1024*1024)
         ])
-    nnhal_raw_tensor_pb2_grpc.add_DetectionServicer_to_server(detection, server)
+    addDetectionServicer(detection, server)
     if(detection.unix_socket != ""):
         server.add_insecure_port("unix:" + detection.unix_socket)
         os.chmod(detection.unix_socket, 0o666)
@@ -143,6 +294,30 @@ def serve(detection):
         server.add_insecure_port('[::]:{}'.format(detection.remote_port))
     server.start()
     server.wait_for_termination()
+    for interface in detection.interface.clear():
+        interface.close()
+
+async def serveAsync(detection):
+    #to_thread runs on the loop's executor, it bounds the concurrent inferences like the sync server
+    asyncio.get_running_loop().set_default_executor(futures.ThreadPoolExecutor(max_workers=workers.SERVER_WORKERS))
+    server = grpc.aio.server(migration_thread_pool=futures.ThreadPoolExecutor(max_workers=workers.SERVER_WORKERS),
+                             options = [
+        ('grpc.max_send_message_length', 1024*1024*1024),
+        ('grpc.max_receive_message_length', 1024*1024*1024)
+        ])
+    addDetectionServicer(detection, server)
+    if(detection.unix_socket != ""):
+        server.add_insecure_port("unix:" + detection.unix_socket)
+        os.chmod(detection.unix_socket, 0o666)
+        detection.shared_model_file = True
+    elif(detection.vsock == "true"):
+        server.add_insecure_port("vsock:-1:{}".format(detection.remote_port))
+    else :
+        server.add_insecure_port('[::]:{}'.format(detection.remote_port))
+    await server.start()
+    await server.wait_for_termination()
+    for interface in detection.interface.clear():
+        await interface.async_close()
 
 if __name__ == '__main__':
     log.basicConfig(format='%(asctime)s %(message)s')
@@ -160,14 +335,42 @@ if __name__ == '__main__':
                         help='Specify full path to mounted Directory for model loading.')
     parser.add_argument('--serving_port', required=False, default=9000,
                         help='Specify port to inference service. default: 9000')
+    parser.add_argument('--serving_channels', required=False, default=4, type=int,
+                        help='Specify number of grpc channels kept open to inference service. default: 4')
     parser.add_argument('--serving_model_name', required=False, default='remote_model',
                         help='Specify model name set for inference service.')
     parser.add_argument('--interface', required=False, default='ovms',
-                        help='Specify serving interface: currently supported interface \'ovms\'\
-                         and \'ovtk\' for dynamically selecting the interface')
+                        help='Specify serving interface: currently supported interface \'ovms\',\
+                         \'kserve\' and \'ovtk\' for dynamically selecting the interface')
     parser.add_argument('--device', required=False, default='AUTO',
                         help='Specify device you want do inference with: currently supported devices \'CPU\'\
                          \'GPU\' and \'GPU.{device # of GPU}\' in case of multiple GPUs for dynamically selecting device')
+    parser.add_argument('--performance_hint', required=False, default='LATENCY',
+                        help='Specify openvino performance hint for ovtk interface: \'LATENCY\' or \'THROUGHPUT\'.\
+                         THROUGHPUT uses all cpu streams with one infer request per stream')
+    parser.add_argument('--server_mode', required=False, default='sync',
+                        help='Specify grpc server mode: \'sync\' thread pool server or \'aio\' asyncio server\
+                         that awaits inference and offloads cpu bound steps to an executor. default: sync')
+    parser.add_argument('--model_store_dir', required=False, default="",
+                        help='Specify directory of the content addressed model store, uploaded models are kept\
+                         there and clients may skip uploading them again. default="" (disabled)')
+    parser.add_argument('--model_store_size_mb', required=False, default=4096, type=int,
+                        help='Specify size limit of the model store, least recently used models are evicted.\
+                         default: 4096')
+    parser.add_argument('--max_loaded_models', required=False, default=0, type=int,
+                        help='Specify number of models kept loaded at once, least recently used idle models are\
+                         unloaded and reloaded on their next request. default: 0 (no limit)')
+    parser.add_argument('--max_loaded_memory_mb', required=False, default=0, type=int,
+                        help='Specify size of model files kept loaded at once, models shared by several tokens\
+                         count once. default: 0 (no limit)')
+    parser.add_argument('--model_idle_timeout_s', required=False, default=0, type=int,
+                        help='Specify seconds after which an unused model is unloaded. default: 0 (never)')
+    parser.add_argument('--metrics_port', required=False, default=0, type=int,
+                        help='Specify port of the http /metrics endpoint in Prometheus text format.\
+                         default: 0 (disabled)')
+    parser.add_argument('--trace_file', required=False, default="",
+                        help='Specify file to append json trace spans of every rpc to. Clients may always request\
+                         a stage timing trailer with the \'stage-timing\' metadata key. default="" (no spans)')
     args = vars(parser.parse_args(sys.argv[1:]))
     inputValidations.validate(args)
     dir_path = args['serving_mounted_modelDir']
@@ -176,5 +379,24 @@ if __name__ == '__main__':
     adapter = args['interface']
     serving_model_name = args['serving_model_name']
     device = args['device']
+    model_store = None
+    if(args['model_store_dir'] != ""):
+        model_store = ModelStore(args['model_store_dir'], args['model_store_size_mb'] * 1024 * 1024)
+    loaded_models = LoadedModels(args['max_loaded_models'], args['max_loaded_memory_mb'],
+                                 args['model_idle_timeout_s'])
+    metrics.registry.setService('rawTensor')
+    tracing.configure('rawTensor', args['trace_file'])
+    metrics.registry.addCollector('loaded_models', loaded_models.stats)
+    if model_store is not None:
+        metrics.registry.addCollector('model_store', model_store.stats)
+    metrics.startServer(args['metrics_port'])
     log.info("Starting Service")
-    serve(Detection(adapter, device, dir_path, args['unix_socket'], args['remote_port'], args['vsock']))
+    if(args['server_mode'] == 'aio'):
+        asyncio.run(serveAsync(AsyncDetection(adapter, device, dir_path, args['unix_socket'],
+                                              args['remote_port'], args['vsock'],
+                                              args['serving_channels'], args['performance_hint'],
+                                              model_store, loaded_models, serving_model_name)))
+    else:
+        serve(Detection(adapter, device, dir_path, args['unix_socket'], args['remote_port'], args['vsock'],
+                        args['serving_channels'], args['performance_hint'], model_store, loaded_models,
+                        serving_model_name))
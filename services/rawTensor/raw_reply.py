@@ -0,0 +1,114 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import numpy as np
+import common.metrics as metrics
+
+#wire tags of ReplyDataTensors / DataTensor in nnhal_raw_tensor.proto
+TAG_DATA_TENSORS = b'\x0a'
+TAG_DATA = b'\x0a'
+TAG_NODE_NAME = b'\x12'
+TAG_TENSOR_SHAPE = b'\x1a'
+#wire tags of StreamInferReply
+TAG_SEQUENCE_ID = b'\x08'
+TAG_REPLY = b'\x12'
+TAG_STATUS = b'\x18'
+
+def encode_varint(value):
+    #int32 fields are sign extended to 64 bits on the wire
+    value &= 0xFFFFFFFFFFFFFFFF
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def encode_field(tag, payload_len):
+    return tag + encode_varint(payload_len)
+
+
+class RawReplyDataTensors:
+    '''
+    Drop-in for nnhal_raw_tensor_pb2.ReplyDataTensors on the getInferResult path.
+    Output arrays are kept as they are and written to the wire format in
+    SerializeToString, so building the reply copies tensor data once, straight
+    from the adaptor output into the serialized reply. Copies made by the
+    adaptor itself come on top, the ovtk adaptor copies its outputs out of the
+    pooled infer request before returning them.
+    '''
+    def __init__(self, model_name=''):
+        #label of the serialization stage metric
+        self.model_name = model_name
+        self.tensors = []
+        #bytes copied while building the reply, including the final serialization,
+        #copies inside the adaptor are not seen here
+        self.bytes_copied = 0
+
+    def add(self, node_name, data, shape):
+        if not data.flags['C_CONTIGUOUS']:
+            data = np.ascontiguousarray(data)
+            self.bytes_copied += data.nbytes
+        self.tensors.append((node_name, data.reshape(-1).view(np.uint8), shape))
+        self.bytes_copied += data.nbytes
+
+    def serializedParts(self):
+        '''
+        :return: tuple of (list of bytes and uint8 arrays forming the wire format, total length)
+        '''
+        parts = []
+        total_len = 0
+        for node_name, data, shape in self.tensors:
+            fields = []
+            if data.nbytes:
+                fields += [encode_field(TAG_DATA, data.nbytes), data]
+            name = node_name.encode('utf-8')
+            if name:
+                fields += [encode_field(TAG_NODE_NAME, len(name)), name]
+            packed_shape = b''.join(encode_varint(int(dim)) for dim in shape)
+            if packed_shape:
+                fields += [encode_field(TAG_TENSOR_SHAPE, len(packed_shape)), packed_shape]
+            tensor_len = sum(len(field) if isinstance(field, bytes) else field.nbytes
+                             for field in fields)
+            header = encode_field(TAG_DATA_TENSORS, tensor_len)
+            parts.append(header)
+            parts.extend(fields)
+            total_len += len(header) + tensor_len
+        return parts, total_len
+
+    def SerializeToString(self):
+        with metrics.timeStage(self.model_name, 'serialization'):
+            return b''.join(self.serializedParts()[0])
+
+
+class RawStreamInferReply:
+    '''
+    Drop-in for a successful nnhal_raw_tensor_pb2.StreamInferReply, the wrapped
+    RawReplyDataTensors is serialized together with the header in a single copy.
+    '''
+    def __init__(self, sequence_id, reply):
+        self.sequence_id = sequence_id
+        self.reply = reply
+
+    def SerializeToString(self):
+        with metrics.timeStage(self.reply.model_name, 'serialization'):
+            parts, reply_len = self.reply.serializedParts()
+            #proto3 leaves out a zero sequence_id, like the generated message
+            header = [TAG_SEQUENCE_ID + encode_varint(self.sequence_id)] if self.sequence_id else []
+            header.append(encode_field(TAG_REPLY, reply_len))
+            return b''.join(header + parts + [TAG_STATUS + b'\x01'])
@@ -0,0 +1,112 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import threading
+from concurrent import futures
+import numpy as np
+import pytest
+import adaptors.create_interface as create_interface
+import common.metrics as metrics
+from adaptors.batching import BatchingInterface
+from adaptors.stub.interface import StubInterface
+
+
+class RecordingStub(StubInterface):
+    #echoes the inputs and records the batch size of every inference
+    def __init__(self, latency_ms=20, parallelism=1, fail=False):
+        super().__init__('model', latency_ms=latency_ms)
+        self.batches = []
+        self.lock = threading.Lock()
+        self.workers = parallelism
+        self.fail = fail
+
+    def parallelism(self):
+        return self.workers
+
+    def run_detection(self, input_data):
+        with self.lock:
+            self.batches.append(int(next(iter(input_data.values()))[1][0]))
+        if self.fail:
+            raise RuntimeError("inference failed")
+        return super().run_detection(input_data)
+
+def request(value, batch=1, size=3):
+    data = np.full((batch, size), value, dtype=np.float32) + np.arange(batch, dtype=np.float32)[:, None]
+    return {'input': (data, [batch, size])}
+
+def runConcurrently(interface, requests):
+    with futures.ThreadPoolExecutor(len(requests)) as executor:
+        return list(executor.map(interface.run_detection, requests))
+
+def test_results_are_scattered_to_their_requests():
+    stub = RecordingStub()
+    interface = BatchingInterface(stub, max_batch_size=8, max_delay_ms=50)
+    requests = [request(10 * i, batch=1 + i % 3) for i in range(8)]
+    results = runConcurrently(interface, requests)
+    for input_data, result in zip(requests, results):
+        data, shape = input_data['input']
+        out, out_shape = result['input']
+        assert out_shape == shape
+        np.testing.assert_array_equal(out, data)
+    #several requests shared an inference
+    assert len(stub.batches) < len(requests)
+    assert sum(stub.batches) == sum(1 + i % 3 for i in range(8))
+
+def test_batches_never_exceed_max_batch_size():
+    stub = RecordingStub()
+    interface = BatchingInterface(stub, max_batch_size=4, max_delay_ms=50)
+    requests = [request(i, batch=3 if i % 2 else 2) for i in range(10)]
+    results = runConcurrently(interface, requests)
+    assert max(stub.batches) <= 4
+    assert sum(stub.batches) == 25
+    for input_data, result in zip(requests, results):
+        np.testing.assert_array_equal(result['input'][0], input_data['input'][0])
+
+def test_different_shapes_are_not_stacked():
+    stub = RecordingStub()
+    interface = BatchingInterface(stub, max_batch_size=8, max_delay_ms=50)
+    requests = [request(i, size=3 + i % 2) for i in range(6)]
+    results = runConcurrently(interface, requests)
+    for input_data, result in zip(requests, results):
+        np.testing.assert_array_equal(result['input'][0], input_data['input'][0])
+
+def test_workers_match_parallelism_before_load():
+    stub = RecordingStub(parallelism=3)
+    interface = BatchingInterface(stub, max_batch_size=4)
+    assert len(interface.workers) == 3
+    #served without isModelLoaded having been called
+    np.testing.assert_array_equal(interface.run_detection(request(1))['input'][0], request(1)['input'][0])
+    stub.workers = 5
+    assert interface.isModelLoaded(1000)
+    assert len(interface.workers) == 5
+
+def test_errors_reach_every_request_of_the_batch():
+    interface = BatchingInterface(RecordingStub(fail=True), max_batch_size=8, max_delay_ms=50)
+    with futures.ThreadPoolExecutor(4) as executor:
+        calls = [executor.submit(interface.run_detection, request(i)) for i in range(4)]
+        for call in calls:
+            with pytest.raises(RuntimeError):
+                call.result()
+
+def test_metrics_are_labelled_by_the_metrics_label():
+    #rawTensor names models by session token, the metrics must not
+    interface = create_interface.createInterfaceObj('stub', 'CPU', "", "", 'session-token', "",
+                                                    max_batch_size=4, metrics_label='remote_model')
+    interface.run_detection(request(1))
+    labels = {model for model, _ in metrics.stage_seconds.values}
+    assert 'remote_model' in labels and 'session-token' not in labels
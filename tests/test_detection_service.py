@@ -0,0 +1,56 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+from types import SimpleNamespace
+import cv2
+import numpy as np
+import pytest
+import common.metrics as metrics
+from adaptors.stub.interface import StubInterface
+from common.detection_service import BaseDetection
+
+
+class EchoDetection(BaseDetection):
+    #returns the preprocessed image the stub inferred
+    input_node = 'input'
+    image_options = dict(scale=255.0)
+
+    def postprocess(self, request, result):
+        return result['input'][0]
+
+def image(value, width=64, height=48):
+    ok, encoded = cv2.imencode('.png', np.full((height, width, 3), value, dtype=np.uint8))
+    return SimpleNamespace(data=encoded.tobytes())
+
+def stageCount(model, stage):
+    counts, _ = metrics.stage_seconds.values.get((model, stage), ([0], 0.0))
+    return sum(counts)
+
+@pytest.mark.parametrize("max_batch_size", [1, 2, 8])
+def test_batch_results_and_stage_timing(max_batch_size):
+    model = 'batch-{}'.format(max_batch_size)
+    detection = EchoDetection(StubInterface(model), "", 0, 16, 16, max_batch_size=max_batch_size)
+    requests = [image(10 * i) for i in range(5)]
+    results = detection.predictBatch(requests)
+    for i, result in enumerate(results):
+        assert result.shape == (1, 3, 16, 16)
+        np.testing.assert_allclose(result, 10 * i / 255.0, rtol=1e-6)
+    #every image of the batch is timed like a single request
+    assert stageCount(model, 'decode') == 5
+    assert stageCount(model, 'preprocess') == 5
+    assert stageCount(model, 'inference') == -(-5 // max_batch_size)
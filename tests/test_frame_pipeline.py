@@ -0,0 +1,54 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import time
+import common.metrics as metrics
+from common.frame_pipeline import FramePipeline, FrameDropped
+
+def count(counter):
+    return counter.values.get((), 0)
+
+def test_frames_stay_in_order_and_are_counted():
+    frames, dropped = count(metrics.stream_frames), count(metrics.stream_dropped_frames)
+    pipeline = FramePipeline([lambda frame, _: frame * 2, lambda frame, value: value + 1])
+    results = list(pipeline.run(iter(range(20))))
+    assert [(frame, value, error) for frame, value, error in results] == [(i, 2 * i + 1, None) for i in range(20)]
+    assert count(metrics.stream_frames) - frames == 20
+    assert count(metrics.stream_dropped_frames) == dropped
+
+def test_stage_errors_are_returned_with_their_frame():
+    def stage(frame, _):
+        if frame == 2:
+            raise ValueError("bad frame")
+        return frame
+
+    results = list(FramePipeline([stage]).run(iter(range(4))))
+    assert [frame for frame, _, _ in results] == [0, 1, 2, 3]
+    assert isinstance(results[2][2], ValueError)
+
+def test_dropped_frames_are_counted():
+    dropped = count(metrics.stream_dropped_frames)
+
+    def slow(frame, _):
+        time.sleep(0.02)
+        return frame
+
+    results = list(FramePipeline([slow], queue_size=1, drop_policy='newest').run(iter(range(30))))
+    notices = [frame for frame, _, error in results if isinstance(error, FrameDropped)]
+    assert notices and len(results) == 30
+    assert count(metrics.stream_dropped_frames) - dropped == len(notices)
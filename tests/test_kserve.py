@@ -0,0 +1,84 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import asyncio
+import numpy as np
+import pytest
+
+pytest.importorskip('adaptors.kserve.grpc_predict_v2_pb2',
+                    reason='generate the KServe v2 protos as described in the README')
+from adaptors.kserve.interface import KServeInterface
+from adaptors.kserve.local_server import LocalInferenceServicer, startServer
+
+
+@pytest.fixture
+def serve(tmp_path):
+    servers = []
+
+    def start(inputs, repository_control=False):
+        servicer = LocalInferenceServicer('model', inputs, repository_control)
+        server, port = startServer(servicer)
+        interface = KServeInterface('localhost', port, 'model', str(tmp_path) + '/', 1)
+        servers.append((server, interface))
+        assert interface.isModelLoaded(5000)
+        return servicer, interface
+
+    yield start
+    for server, interface in servers:
+        interface.close()
+        server.stop(0)
+
+def test_metadata_and_raw_echo(serve):
+    _, interface = serve([('input_0', 'FP32', [-1, 3, 4, 4])])
+    assert interface.inputs == {'input_0': ('FP32', [-1, 3, 4, 4])}
+    data = np.arange(2 * 3 * 4 * 4, dtype=np.float32)
+    result = interface.run_detection({'input_0': (data, [2, 3, 4, 4])})
+    out, shape = result['input_0_out']
+    assert shape == [2, 3, 4, 4]
+    np.testing.assert_array_equal(out.reshape(-1), data)
+
+def test_datatype_conversion_and_single_input_name(serve):
+    _, interface = serve([('images', 'FP16', [1, 8])])
+    data = np.linspace(0, 1, 8)
+    #float64 data under another name is sent as the FP16 input of the model
+    out, shape = interface.run_detection({'Parameter_0': (data, [1, 8])})['images_out']
+    assert out.dtype == np.float16 and shape == [1, 8]
+    np.testing.assert_allclose(out.reshape(-1), data, rtol=1e-3)
+
+def test_shape_rejected_before_sending(serve):
+    _, interface = serve([('input_0', 'FP32', [1, 3, 4, 4])])
+    with pytest.raises(ValueError):
+        interface.run_detection({'input_0': (np.zeros(3 * 5 * 5, np.float32), [1, 3, 5, 5])})
+
+def test_async_inference(serve):
+    _, interface = serve([('input_0', 'INT32', [-1])])
+    data = np.arange(5, dtype=np.int32)
+    out, _ = asyncio.run(interface.async_run_detection({'input_0': (data, [5])}))['input_0_out']
+    np.testing.assert_array_equal(out, data)
+
+def test_repository_control(serve):
+    servicer, interface = serve([('input_0', 'FP32', [-1])], repository_control=True)
+    assert interface.repository_control and servicer.loaded
+    interface.cleanUp()
+    assert not servicer.loaded
+
+def test_without_repository_extension(serve):
+    servicer, interface = serve([('input_0', 'FP32', [-1])])
+    assert not interface.repository_control
+    interface.cleanUp()
+    assert servicer.loaded
@@ -0,0 +1,133 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import time
+import pytest
+from adaptors.stub.interface import StubInterface
+from services.rawTensor.loaded_models import LoadedModels
+
+MB = 1024 * 1024
+
+
+class InProcessStub(StubInterface):
+    #stub holding a model in process, records unloads and reloads in the shared events list
+    def __init__(self, name, events, key=None, size=MB, fail_reload=False):
+        super().__init__(name)
+        self.events = events
+        self.key = key if key is not None else name
+        self.size = size
+        self.fail_reload = fail_reload
+        self.loaded = True
+
+    def modelFootprint(self):
+        return self.key, self.size
+
+    def isModelLoaded(self, timeout_in_ms):
+        self.events.append(('load', self.model_name))
+        self.loaded = not self.fail_reload
+        return self.loaded
+
+    def unload(self):
+        self.events.append(('unload', self.model_name))
+        self.loaded = False
+
+def prepare(models, events, token, **kwargs):
+    interface = InProcessStub(token, events, **kwargs)
+    models[token] = interface
+    models.markLoaded(token)
+    return interface
+
+def unloads(events):
+    return [name for event, name in events if event == 'unload']
+
+def test_count_budget_evicts_least_recently_used():
+    models, events = LoadedModels(max_models=2), []
+    prepare(models, events, 'a')
+    prepare(models, events, 'b')
+    with models.use('a'):
+        pass
+    prepare(models, events, 'c')
+    assert unloads(events) == ['b']
+    assert models.evicted('b') and not models.evicted('a')
+    stats = models.stats()
+    assert stats['loaded'] == 2 and stats['evictions'] == 1
+
+def test_nothing_is_unloaded_while_acquired():
+    models, events = LoadedModels(max_models=1), []
+    prepare(models, events, 'a')
+    interface = models.acquire('a')
+    prepare(models, events, 'b')
+    #over budget, but a is in use and b was just loaded
+    assert unloads(events) == [] and interface.loaded
+    assert models.stats()['loaded'] == 2
+    models.release('a', interface)
+    prepare(models, events, 'c')
+    assert unloads(events) == ['a', 'b']
+    assert models.stats()['loaded'] == 1
+
+def test_memory_budget_counts_shared_models_once():
+    models, events = LoadedModels(max_memory_mb=1), []
+    prepare(models, events, 'a', key='shared', size=MB * 6 // 10)
+    prepare(models, events, 'b', key='shared', size=MB * 6 // 10)
+    assert unloads(events) == []
+    assert models.stats()['memory_bytes'] == MB * 6 // 10
+    prepare(models, events, 'c', size=MB * 6 // 10)
+    #the shared model stays in memory until both of its tokens are unloaded
+    assert unloads(events) == ['a', 'b']
+    assert models.stats()['memory_bytes'] == MB * 6 // 10
+
+def test_idle_models_are_unloaded():
+    models, events = LoadedModels(idle_timeout_s=0.2), []
+    prepare(models, events, 'a')
+    interface = prepare(models, events, 'b')
+    held = models.acquire('b')
+    deadline = time.monotonic() + 5
+    while not unloads(events) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.3)
+    assert unloads(events) == ['a'] and held is interface and interface.loaded
+    assert models.stats()['idle_unloads'] == 1
+    models.release('b', held)
+
+def test_reload_on_acquire():
+    models, events = LoadedModels(max_models=1), []
+    a = prepare(models, events, 'a')
+    prepare(models, events, 'b')
+    assert models.evicted('a') and not a.loaded
+    with models.use('a') as interface:
+        assert interface is a and a.loaded
+    #loading a again pushed b out of the budget
+    assert events[-2:] == [('load', 'a'), ('unload', 'b')]
+    assert not models.evicted('a') and models.evicted('b')
+    assert models.stats()['reloads'] == 1
+
+def test_failed_reload_releases_the_token():
+    models, events = LoadedModels(max_models=1), []
+    prepare(models, events, 'a', fail_reload=True)
+    prepare(models, events, 'b')
+    with pytest.raises(RuntimeError):
+        models.acquire('a')
+    assert models.entries['a'].inflight == 0 and models.evicted('a')
+    assert models.stats()['reload_failures'] == 1
+
+def test_models_served_out_of_process_are_not_budgeted():
+    models = LoadedModels(max_models=1)
+    for token in ('a', 'b', 'c'):
+        models[token] = StubInterface(token)
+        models.markLoaded(token)
+    assert models.stats()['loaded'] == 0 and models.stats()['evictions'] == 0
@@ -0,0 +1,101 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import numpy as np
+import pytest
+from common.nms import nms, multiclass_nms, batched_nms
+
+
+def reference_nms(bboxes, confidences, iou_thresh, conf_thresh=None, keep_top_k=-1, side_padding=0.0):
+    '''
+    One box at a time greedy loop of the former faceMaskDetection utils/nms.py,
+    which padded the box sides by 1e-3.
+    '''
+    candidates = np.arange(len(bboxes))
+    if conf_thresh is not None:
+        candidates = np.nonzero(confidences > conf_thresh)[0]
+    xmin, ymin, xmax, ymax = (bboxes[candidates, i] for i in range(4))
+    area = (xmax - xmin + side_padding) * (ymax - ymin + side_padding)
+    idxs = np.argsort(confidences[candidates])
+    pick = []
+    while len(idxs) > 0:
+        last = len(idxs) - 1
+        i = idxs[last]
+        pick.append(i)
+        if keep_top_k != -1 and len(pick) >= keep_top_k:
+            break
+        overlap_w = np.maximum(0, np.minimum(xmax[i], xmax[idxs[:last]]) - np.maximum(xmin[i], xmin[idxs[:last]]))
+        overlap_h = np.maximum(0, np.minimum(ymax[i], ymax[idxs[:last]]) - np.maximum(ymin[i], ymin[idxs[:last]]))
+        overlap_area = overlap_w * overlap_h
+        overlap_ratio = overlap_area / (area[idxs[:last]] + area[i] - overlap_area)
+        idxs = np.delete(idxs, np.concatenate(([last], np.nonzero(overlap_ratio > iou_thresh)[0])))
+    return candidates[pick]
+
+def reference_multiclass_nms(bboxes, confidences, class_ids, iou_thresh):
+    keep = np.concatenate([np.nonzero(class_ids == c)[0][reference_nms(bboxes[class_ids == c],
+                                                                       confidences[class_ids == c], iou_thresh)]
+                           for c in np.unique(class_ids)])
+    return keep[np.argsort(-confidences[keep])]
+
+def random_boxes(rng, num_boxes, scale=1.0):
+    #clustered boxes so that a good share of them overlap
+    centers = rng.random((num_boxes // 8 + 1, 2))[rng.integers(0, num_boxes // 8 + 1, num_boxes)]
+    centers += rng.normal(0, 0.02, (num_boxes, 2))
+    sizes = rng.uniform(0.02, 0.2, (num_boxes, 2))
+    boxes = np.concatenate([centers - sizes / 2, centers + sizes / 2], axis=1) * scale
+    return boxes.astype(np.float32), rng.random(num_boxes).astype(np.float32)
+
+@pytest.mark.parametrize("num_boxes", [1, 17, 300, 2000])
+@pytest.mark.parametrize("iou_thresh", [0.3, 0.5, 0.7])
+def test_nms_matches_reference(num_boxes, iou_thresh):
+    rng = np.random.default_rng(num_boxes)
+    boxes, scores = random_boxes(rng, num_boxes)
+    np.testing.assert_array_equal(nms(boxes, scores, iou_thresh), reference_nms(boxes, scores, iou_thresh))
+    np.testing.assert_array_equal(nms(boxes, scores, iou_thresh, conf_thresh=0.5),
+                                  reference_nms(boxes, scores, iou_thresh, conf_thresh=0.5))
+    np.testing.assert_array_equal(nms(boxes, scores, iou_thresh, keep_top_k=10),
+                                  reference_nms(boxes, scores, iou_thresh, keep_top_k=10))
+
+@pytest.mark.parametrize("num_boxes", [300, 5972])
+def test_nms_matches_face_mask_reference(num_boxes):
+    rng = np.random.default_rng(num_boxes)
+    boxes, scores = random_boxes(rng, num_boxes)
+    np.testing.assert_array_equal(nms(boxes, scores, 0.4, conf_thresh=0.5, side_padding=1e-3),
+                                  reference_nms(boxes, scores, 0.4, conf_thresh=0.5, side_padding=1e-3))
+
+def test_nms_empty():
+    assert len(nms(np.zeros((0, 4), np.float32), np.zeros(0, np.float32))) == 0
+
+@pytest.mark.parametrize("scale", [1.0, 1000.0])
+def test_multiclass_nms_matches_reference(scale):
+    rng = np.random.default_rng(7)
+    boxes, scores = random_boxes(rng, 1000, scale)
+    class_ids = rng.integers(0, 5, len(boxes))
+    np.testing.assert_array_equal(multiclass_nms(boxes, scores, class_ids, 0.5),
+                                  reference_multiclass_nms(boxes, scores, class_ids, 0.5))
+
+def test_batched_nms_matches_reference():
+    rng = np.random.default_rng(3)
+    boxes, scores = zip(*[random_boxes(rng, 400) for _ in range(3)])
+    boxes, scores = np.stack(boxes), np.stack(scores)
+    class_ids = rng.integers(0, 3, scores.shape)
+    for image, keep in enumerate(batched_nms(boxes, scores, iou_thresh=0.5)):
+        np.testing.assert_array_equal(keep, reference_nms(boxes[image], scores[image], 0.5))
+    for image, keep in enumerate(batched_nms(boxes, scores, class_ids, iou_thresh=0.5, keep_top_k=20)):
+        np.testing.assert_array_equal(keep, reference_multiclass_nms(boxes[image], scores[image],
+                                                                     class_ids[image], 0.5)[:20])
@@ -0,0 +1,102 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import numpy as np
+import pytest
+
+nnhal_raw_tensor_pb2 = pytest.importorskip('services.rawTensor.nnhal_raw_tensor_pb2',
+                                           reason='generate the rawTensor protos as described in the README')
+from services.rawTensor.raw_reply import RawReplyDataTensors, RawStreamInferReply
+
+
+def outputs(rng):
+    return {
+        'f32': rng.normal(size=(1, 3, 4, 4)).astype(np.float32),
+        'f16': rng.normal(size=(2, 5)).astype(np.float16),
+        'f64': rng.normal(size=(7,)),
+        'i8': rng.integers(-128, 127, (3, 3), dtype=np.int8),
+        'u8': rng.integers(0, 255, (1, 300), dtype=np.uint8),
+        'i64': rng.integers(-2**40, 2**40, (2, 2), dtype=np.int64),
+        'bool': rng.random((4,)) > 0.5,
+        'empty': np.zeros((0, 3), np.float32),
+        'scalar': np.array(1.5, np.float32),
+        #transposed, not contiguous
+        'strided': rng.normal(size=(3, 6)).astype(np.float32).T,
+    }
+
+def reference(result):
+    reply = nnhal_raw_tensor_pb2.ReplyDataTensors()
+    for key, (data, shape) in result.items():
+        tensor = reply.data_tensors.add()
+        tensor.data = data.tobytes()
+        tensor.node_name = key
+        tensor.tensor_shape.extend(shape)
+    return reply
+
+def raw(result):
+    reply = RawReplyDataTensors('model')
+    for key, (data, shape) in result.items():
+        reply.add(key, data, shape)
+    return reply
+
+@pytest.mark.parametrize("names", [None, ['f32'], ['empty'], ['scalar'], ['strided', 'u8']])
+def test_reply_matches_generated_message(names):
+    result = {key: (data, list(data.shape)) for key, data in outputs(np.random.default_rng(0)).items()
+              if names is None or key in names}
+    expected = reference(result)
+    serialized = raw(result).SerializeToString()
+    parsed = nnhal_raw_tensor_pb2.ReplyDataTensors.FromString(serialized)
+    assert parsed == expected
+    for tensor, (key, (data, shape)) in zip(parsed.data_tensors, result.items()):
+        assert tensor.node_name == key
+        assert list(tensor.tensor_shape) == shape
+        np.testing.assert_array_equal(np.frombuffer(tensor.data, data.dtype).reshape(shape), data)
+    assert serialized == expected.SerializeToString()
+
+def test_unusual_names_and_shapes():
+    data = np.arange(6, dtype=np.int32)
+    #empty and non ascii names, negative dims are sign extended like any int32
+    result = {'': (data, [6]), 'ausgabe_ü': (data, [2, -1]), 'big': (data, [2**31 - 1])}
+    serialized = raw(result).SerializeToString()
+    assert nnhal_raw_tensor_pb2.ReplyDataTensors.FromString(serialized) == reference(result)
+    assert serialized == reference(result).SerializeToString()
+
+def test_empty_reply():
+    assert RawReplyDataTensors().SerializeToString() == b''
+
+@pytest.mark.parametrize("sequence_id", [0, 1, 300, 2**40])
+def test_stream_reply_matches_generated_message(sequence_id):
+    result = {key: (data, list(data.shape)) for key, data in outputs(np.random.default_rng(1)).items()}
+    serialized = RawStreamInferReply(sequence_id, raw(result)).SerializeToString()
+    expected = nnhal_raw_tensor_pb2.StreamInferReply(sequence_id=sequence_id, reply=reference(result), status=True)
+    assert nnhal_raw_tensor_pb2.StreamInferReply.FromString(serialized) == expected
+    assert serialized == expected.SerializeToString()
+
+def test_stream_reply_without_outputs():
+    serialized = RawStreamInferReply(5, RawReplyDataTensors()).SerializeToString()
+    parsed = nnhal_raw_tensor_pb2.StreamInferReply.FromString(serialized)
+    assert parsed.sequence_id == 5 and parsed.status and len(parsed.reply.data_tensors) == 0
+    assert parsed.HasField('reply')
+
+def test_bytes_copied():
+    data = np.zeros((4, 4), np.float32)
+    reply = RawReplyDataTensors()
+    reply.add('a', data, [4, 4])
+    reply.add('b', data.T, [4, 4])
+    #one copy per output and one more to make the transposed output contiguous
+    assert reply.bytes_copied == 3 * data.nbytes
@@ -0,0 +1,132 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import asyncio
+import threading
+import time
+from concurrent import futures
+import pytest
+from common.result_cache import ResultCache
+
+
+class Counting:
+    #compute function counting its calls, blocks until released when gated
+    def __init__(self, result='result', gated=False):
+        self.result = result
+        self.calls = 0
+        self.started = threading.Event()
+        self.gate = threading.Event()
+        if not gated:
+            self.gate.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.gate.wait(5)
+        return self.result
+
+def test_hit_and_miss():
+    cache, compute = ResultCache(4), Counting()
+    assert cache.get('a', compute) == 'result'
+    assert cache.get('a', compute) == 'result'
+    assert compute.calls == 1
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['entries'] == 1
+
+def test_none_result_is_cached():
+    cache, compute = ResultCache(4), Counting(result=None)
+    assert cache.get('a', compute) is None
+    assert cache.get('a', compute) is None
+    assert compute.calls == 1 and cache.stats()['hits'] == 1
+
+def test_concurrent_requests_share_one_computation():
+    cache, compute = ResultCache(4), Counting(gated=True)
+    with futures.ThreadPoolExecutor(4) as executor:
+        first = executor.submit(cache.get, 'a', compute)
+        assert compute.started.wait(5)
+        waiters = [executor.submit(cache.get, 'a', compute) for _ in range(3)]
+        deadline = time.monotonic() + 5
+        while cache.stats()['shared'] < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        compute.gate.set()
+        assert [f.result() for f in [first] + waiters] == ['result'] * 4
+    assert compute.calls == 1 and cache.stats()['shared'] == 3
+
+def test_failure_reaches_waiters_and_is_not_cached():
+    cache = ResultCache(4)
+    started, gate = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        gate.wait(5)
+        raise RuntimeError("inference failed")
+
+    with futures.ThreadPoolExecutor(2) as executor:
+        first = executor.submit(cache.get, 'a', fail)
+        assert started.wait(5)
+        waiter = executor.submit(cache.get, 'a', fail)
+        deadline = time.monotonic() + 5
+        while cache.stats()['shared'] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        gate.set()
+        for future in (first, waiter):
+            with pytest.raises(RuntimeError):
+                future.result()
+    assert cache.stats()['entries'] == 0
+    assert cache.get('a', lambda: 'recovered') == 'recovered'
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache, compute = ResultCache(4, ttl_s=10), Counting()
+    cache.get('a', compute)
+    now[0] += 10
+    cache.get('a', compute)
+    assert compute.calls == 1
+    now[0] += 0.5
+    cache.get('a', compute)
+    assert compute.calls == 2 and cache.stats()['expired'] == 1
+
+def test_lru_eviction():
+    cache = ResultCache(2)
+    cache.get('a', lambda: 1)
+    cache.get('b', lambda: 2)
+    #a becomes the most recently used, so b is evicted for c
+    cache.get('a', lambda: 0)
+    cache.get('c', lambda: 3)
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.get('b', lambda: 4) == 4
+    assert list(cache.entries) == ['c', 'b'] and cache.stats()['evictions'] == 2
+
+def test_async_single_flight_and_none_result():
+    cache = ResultCache(4)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return None
+
+    async def run():
+        results = await asyncio.gather(*[cache.asyncGet('a', compute) for _ in range(4)])
+        return results + [await cache.asyncGet('a', compute)]
+
+    assert asyncio.run(run()) == [None] * 5
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats['shared'] == 3 and stats['hits'] == 1
@@ -0,0 +1,86 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import math
+import numpy as np
+import pytest
+from services.objectDetection.utils.ssd_decode import decode_predictions
+
+NUM_PRIORS = 1917
+NUM_CLASSES = 91
+
+
+def reference_decode(output_classes, output_locations, score_threshold=0.5, class_thresholds=None, top_k=0):
+    '''
+    Per prior loop of the former objectDetection postprocess, extended by the
+    per class thresholds and top_k of the request.
+    '''
+    detections = []
+    for i in range(output_classes.shape[2]):
+        classes = output_classes[0, 0, i, 1:]
+        coordinates = output_locations[0, 0, i, :]
+        top_class_index = np.argmax(classes) + 1
+        threshold = (class_thresholds or {}).get(top_class_index, score_threshold)
+        det_score = (1.0 / (1.0 + math.exp(-classes[top_class_index - 1])))
+        if (det_score > threshold):
+            detections.append((i, coordinates, det_score, top_class_index))
+    if top_k > 0:
+        detections = sorted(sorted(detections, key=lambda d: -d[2])[:top_k])
+    return detections
+
+def random_outputs(rng):
+    #mostly background with a few confident priors, like a real image
+    logits = rng.normal(-8.0, 1.5, (1, 1, NUM_PRIORS, NUM_CLASSES)).astype(np.float32)
+    hits = rng.integers(0, NUM_PRIORS, 200)
+    logits[0, 0, hits, rng.integers(1, NUM_CLASSES, 200)] += rng.uniform(0, 14, 200).astype(np.float32)
+    locations = rng.normal(0, 1, (1, 1, NUM_PRIORS, 4)).astype(np.float32)
+    return logits, locations
+
+def assert_same(result, expected):
+    indices, boxes, scores, classes = result
+    assert indices.tolist() == [d[0] for d in expected]
+    assert classes.tolist() == [d[3] for d in expected]
+    np.testing.assert_allclose(scores, [d[2] for d in expected], rtol=1e-6)
+    np.testing.assert_array_equal(boxes, np.array([d[1] for d in expected]).reshape(-1, 4))
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("score_threshold", [0.5, 0.3, 0.9])
+def test_matches_reference(seed, score_threshold):
+    logits, locations = random_outputs(np.random.default_rng(seed))
+    assert_same(decode_predictions(logits, locations, score_threshold),
+                reference_decode(logits, locations, score_threshold))
+
+@pytest.mark.parametrize("seed", range(5))
+def test_class_thresholds_match_reference(seed):
+    rng = np.random.default_rng(seed)
+    logits, locations = random_outputs(rng)
+    class_thresholds = {int(c): float(t) for c, t in zip(rng.integers(1, NUM_CLASSES, 20), rng.uniform(0.1, 0.95, 20))}
+    assert_same(decode_predictions(logits, locations, 0.5, class_thresholds),
+                reference_decode(logits, locations, 0.5, class_thresholds))
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("top_k", [1, 10, 100, 5000])
+def test_top_k_matches_reference(seed, top_k):
+    logits, locations = random_outputs(np.random.default_rng(seed))
+    assert_same(decode_predictions(logits, locations, 0.3, top_k=top_k),
+                reference_decode(logits, locations, 0.3, top_k=top_k))
+
+def test_nothing_above_threshold():
+    logits = np.full((1, 1, NUM_PRIORS, NUM_CLASSES), -10.0, dtype=np.float32)
+    indices, boxes, scores, classes = decode_predictions(logits, np.zeros((1, 1, NUM_PRIORS, 4), np.float32))
+    assert len(indices) == len(boxes) == len(scores) == len(classes) == 0
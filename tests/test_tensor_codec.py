@@ -0,0 +1,95 @@
+#
+# Copyright (C) 2020-2023 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import numpy as np
+import pytest
+
+predict_pb2 = pytest.importorskip('ovmsclient.tfs_compat.protos.tensorflow_serving.apis.predict_pb2',
+                                  reason='the ovms adaptor protos come from ovmsclient')
+from adaptors.ovms.tensor_codec import NP_TO_TF_DTYPE, encode_tensor, decode_tensor
+
+
+def roundTrip(array, dtype):
+    request = predict_pb2.PredictRequest()
+    encode_tensor(request.inputs['input'], array, dtype)
+    #through the wire format, as the server sees it
+    tensor = predict_pb2.PredictRequest.FromString(request.SerializeToString()).inputs['input']
+    assert tensor.dtype == NP_TO_TF_DTYPE[np.dtype(dtype)]
+    assert [dim.size for dim in tensor.tensor_shape.dim] == list(np.shape(array))
+    return decode_tensor(tensor)
+
+@pytest.mark.parametrize("dtype", list(NP_TO_TF_DTYPE))
+def test_round_trip_keeps_dtype_and_shape(dtype):
+    array = (np.random.default_rng(0).random((2, 3, 5)) * 100).astype(dtype)
+    result = roundTrip(array, dtype)
+    assert result.dtype == dtype
+    np.testing.assert_array_equal(result, array)
+
+@pytest.mark.parametrize("source, dtype", [(np.float64, np.float32), (np.uint8, np.float32),
+                                           (np.float32, np.float16), (np.int64, np.int32)])
+def test_conversion(source, dtype):
+    array = (np.random.default_rng(1).random((1, 3, 4, 4)) * 200).astype(source)
+    result = roundTrip(array, dtype)
+    assert result.dtype == dtype
+    np.testing.assert_array_equal(result, array.astype(dtype))
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float16])
+def test_non_contiguous_input(dtype):
+    array = np.random.default_rng(2).random((4, 6, 3)).astype(np.float32).transpose(2, 0, 1)[:, ::2]
+    np.testing.assert_array_equal(roundTrip(array, dtype), array.astype(dtype))
+
+def test_empty_and_scalar_tensors():
+    assert roundTrip(np.zeros((0, 3), np.float32), np.float32).shape == (0, 3)
+    result = roundTrip(np.array(2.5), np.float32)
+    assert result.shape == () and result == 2.5
+
+def test_decode_is_a_view_on_tensor_content():
+    request = predict_pb2.PredictRequest()
+    encode_tensor(request.inputs['input'], np.arange(6, dtype=np.float32))
+    assert not decode_tensor(request.inputs['input']).flags['WRITEABLE']
+
+def test_decode_typed_value_fields():
+    request = predict_pb2.PredictRequest()
+    tensor = request.inputs['float']
+    tensor.dtype = NP_TO_TF_DTYPE[np.dtype(np.float32)]
+    tensor.tensor_shape.dim.add().size = 3
+    tensor.float_val.extend([1.0, 2.0, 3.0])
+    np.testing.assert_array_equal(decode_tensor(tensor), [1.0, 2.0, 3.0])
+    #half_val carries the raw float16 bits
+    tensor = request.inputs['half']
+    tensor.dtype = NP_TO_TF_DTYPE[np.dtype(np.float16)]
+    tensor.tensor_shape.dim.add().size = 2
+    tensor.half_val.extend(np.array([0.5, -2.0], np.float16).view(np.uint16).tolist())
+    result = decode_tensor(tensor)
+    assert result.dtype == np.float16
+    np.testing.assert_array_equal(result, [0.5, -2.0])
+    #a shorter value list is padded with its last element
+    tensor = request.inputs['int']
+    tensor.dtype = NP_TO_TF_DTYPE[np.dtype(np.int32)]
+    tensor.tensor_shape.dim.add().size = 2
+    tensor.tensor_shape.dim.add().size = 2
+    tensor.int_val.extend([7, 8])
+    np.testing.assert_array_equal(decode_tensor(tensor), [[7, 8], [8, 8]])
+
+def test_unsupported_dtype():
+    tensor = predict_pb2.PredictRequest().inputs['input']
+    tensor.dtype = 7    #DT_STRING
+    with pytest.raises(ValueError):
+        decode_tensor(tensor)
+    with pytest.raises(KeyError):
+        encode_tensor(tensor, np.zeros(2), np.complex64)